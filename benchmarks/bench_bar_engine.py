@@ -0,0 +1,52 @@
+#!/usr/bin/python
+"""Trade ingestion and last-N reads of the bar engine.
+
+    python -m benchmarks.bench_bar_engine [trades]
+
+Feeds a synthetic trade stream (20 trades/s) into BarEngine with 1, 2 and
+5 timeframes, then times reading the last N closes from the ring (a view)
+against the usual list of bar rows converted with ``np.array``.
+"""
+import sys
+import time
+
+import numpy as np
+
+from bitget.ws.bar_engine import CLOSE, BarEngine
+
+
+def stream(n):
+    ts = 1700000000000
+    return [(ts + i * 50, 100.0 + (i % 13) * 0.01, 1.0 + i % 3) for i in range(n)]
+
+
+def best(fn, rounds=5, number=10000):
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return min(times)
+
+
+def main():
+    trades = stream(int(sys.argv[1]) if len(sys.argv) > 1 else 200000)
+    engine = None
+    for timeframes in ((), (60,), (5, 60, 300, 3600)):
+        engine = BarEngine(timeframes, capacity=3600)
+        start = time.perf_counter()
+        for ts, price, size in trades:
+            engine.trade('BTCUSDT', ts, price, size)
+        elapsed = time.perf_counter() - start
+        print('ingest, %d timeframes: %8.2f us/trade' % (len(engine.timeframes), elapsed / len(trades) * 1e6))
+
+    rows = engine.bars('BTCUSDT', 1, 3600).T.tolist()
+    for n in (100, 1000, 3600):
+        ring = best(lambda: engine.closes('BTCUSDT', 1, n))
+        rebuilt = best(lambda: np.array(rows[-n:])[:, CLOSE], number=200)
+        print('last %4d closes: ring view %6.2f us, list -> np.array %8.2f us' % (n, ring * 1e6, rebuilt * 1e6))
+
+
+if __name__ == '__main__':
+    main()
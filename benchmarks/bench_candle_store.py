@@ -0,0 +1,84 @@
+#!/usr/bin/python
+"""Candle downloader concurrency and memory-mapped reads of the candle store.
+
+    python -m benchmarks.bench_candle_store [days]
+
+A stand-in ``historyCandles`` answers after 30 ms. ``days`` of 1-minute bars
+are downloaded one page at a time and with the concurrent downloader, then
+a year of bars is written and reopened: opening and slicing a day is timed
+together with the resident memory it costs before and after a full scan.
+"""
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bitget.candle_store import CandleDownloader, CandleStore, COLUMNS, PAGE_LIMIT
+
+MINUTE = 60000
+T0 = 1704067200000
+
+
+class StandInApi:
+    def __init__(self, latency=0.03):
+        self.latency = latency
+
+    async def historyCandles(self, params):
+        await asyncio.sleep(self.latency)
+        start, end = int(params['startTime']), int(params['endTime'])
+        times = range(start, end + 1, MINUTE)[-PAGE_LIMIT:]
+        return {'code': '00000', 'data': [[str(t), '1', '2', '0.5', '1.5', '10', '15'] for t in reversed(times)]}
+
+
+def rss_kb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+async def download(root, days, concurrency):
+    downloader = CandleDownloader(StandInApi(), CandleStore(root), concurrency=concurrency)
+    start = time.perf_counter()
+    rows = await downloader.download('BTCUSDT', '1m', T0, T0 + days * 1440 * MINUTE)
+    return rows, time.perf_counter() - start
+
+
+def main():
+    days = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    root = tempfile.mkdtemp()
+    try:
+        for concurrency in (1, 16):
+            shutil.rmtree(root)
+            rows, elapsed = asyncio.run(download(root, days, concurrency))
+            print('download %d days (%d rows), concurrency %2d: %6.2fs' % (days, rows, concurrency, elapsed))
+
+        shutil.rmtree(root)
+        store = CandleStore(root)
+        n = 365 * 1440
+        block = np.empty((n, len(COLUMNS)))
+        block[:, 0] = T0 + MINUTE * np.arange(n)
+        block[:, 1:] = np.random.default_rng(1).random((n, len(COLUMNS) - 1))
+        store.write('BTCUSDT', '1m', block, [[T0, T0 + n * MINUTE]])
+        del block
+
+        before = rss_kb()
+        start = time.perf_counter()
+        candles = store.open('BTCUSDT', '1m')
+        day = candles.window(T0 + 200 * 1440 * MINUTE, T0 + 201 * 1440 * MINUTE)
+        mean = float(day['close'].mean())
+        elapsed = time.perf_counter() - start
+        print('open a year (%d rows) + read one day: %.2f ms, rss %+d kB (mean %.3f)'
+              % (len(candles), elapsed * 1000, rss_kb() - before, mean))
+        start = time.perf_counter()
+        total = float(np.asarray(candles['close']).sum())
+        print('full scan of the close column:        %.2f ms, rss %+d kB (sum %.0f)'
+              % ((time.perf_counter() - start) * 1000, rss_kb() - before, total))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
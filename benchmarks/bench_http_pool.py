@@ -0,0 +1,92 @@
+#!/usr/bin/python
+"""Cold vs warm request latency against a local stand-in server.
+
+    python -m benchmarks.bench_http_pool [requests]
+
+"cold" opens a fresh connection for every request (what module-level
+``requests.get/post`` did), "warm" reuses the Client's pooled keep-alive
+transport. Loopback has no DNS/TLS cost, so real-world gains are larger.
+Both use a limiter without limits: all-position is in the 5 req/s
+``positions`` group, which would otherwise be all this measures.
+"""
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bitget import consts as c
+from bitget import transport as t
+from bitget.bitget_api import BitgetApi
+from bitget.rate_limit import RateLimiter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def _reply(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length:
+            self.rfile.read(length)
+        body = json.dumps({'code': '00000', 'msg': 'success', 'data': []}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _reply
+    do_POST = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+def _timed(fn, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _report(name, samples):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print('%-6s n=%d mean=%.3fms p50=%.3fms p99=%.3fms' % (
+        name, len(samples), statistics.mean(samples), statistics.median(samples), p99))
+
+
+def main(n=500):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    c.API_URL = 'http://127.0.0.1:%d' % server.server_address[1]
+    params = {'productType': 'USDT-FUTURES', 'marginCoin': 'USDT'}
+    path = '/api/v2/mix/position/all-position'
+    unlimited = RateLimiter(limits={'positions': (1e9, 1e9)})
+
+    def cold():
+        transport = t.create_transport()
+        api = BitgetApi('key', 'secret', 'pass', transport=transport)
+        api.rate_limiter = unlimited
+        api.get(path, params)
+        transport.close()
+
+    warm_api = BitgetApi('key', 'secret', 'pass', transport=t.create_transport())
+    warm_api.rate_limiter = unlimited
+
+    def warm():
+        warm_api.get(path, params)
+
+    cold_samples = _timed(cold, n)
+    warm_samples = _timed(warm, n)
+    _report('cold', cold_samples)
+    _report('warm', warm_samples)
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,98 @@
+#!/usr/bin/python
+"""OrderBatcher against the local Bitget stand-in (``standin.py``).
+
+    python -m benchmarks.bench_order_batcher [orders]
+
+Nothing in the webhook path feeds the batcher (the per-symbol dispatcher
+never has two orders of one symbol in flight), so this is its check: waves of
+concurrent same-symbol submits go through it, first against a clean stand-in,
+then one that fails 10% of requests before processing them and loses 10% of
+responses after processing them. Every wave must end with exactly one order
+on the stand-in per submit, each answer carrying the clientOid it was
+submitted with, and the position equal to the sum of the sizes; fewer
+requests than orders shows the submits were coalesced. Times include the
+client-side limiter: 5 batch calls/s, and 10 orders/s for the orders of a
+failed batch, which are settled one by one.
+"""
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+with socket.socket() as s:
+    s.bind(('127.0.0.1', 0))
+    PORT = s.getsockname()[1]
+STANDIN = 'http://127.0.0.1:%d' % PORT
+os.environ['BITGET_API_URL'] = STANDIN
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+import standin  # noqa: E402
+from bitget import retry  # noqa: E402
+from bitget.aio.order_batcher import OrderBatcher  # noqa: E402
+from bitget.aio.v2.mix.order_api import OrderApi  # noqa: E402
+
+SYMBOL = 'BTCUSDT'
+SIZE = 0.01
+ROUNDS = (
+    ('clean', {'error_rate': 0, 'lost_rate': 0}),
+    ('10% errors, 10% lost', {'error_rate': 0.1, 'lost_rate': 0.1}),
+)
+# the injected failures are random; give a wave enough attempts that it cannot run out
+POLICY = retry.RetryPolicy(attempts=20, base_delay=0.01, max_delay=0.1, deadline=60.0)
+
+
+def serve(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning', lifespan='on'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+async def wave(batcher, n, wave_no):
+    submitted = [{'symbol': SYMBOL, 'productType': 'USDT-FUTURES', 'marginCoin': 'USDT', 'marginMode': 'crossed',
+                  'side': 'buy', 'orderType': 'market', 'size': str(SIZE), 'clientOid': 'w%d-%d' % (wave_no, i)}
+                 for i in range(n)]
+    responses = await asyncio.gather(*(batcher.submit(params) for params in submitted))
+    for params, response in zip(submitted, responses):
+        assert response['code'] == '00000', response
+        assert response['data']['clientOid'] == params['clientOid'], (params['clientOid'], response)
+
+
+async def run(n, waves):
+    api = OrderApi('standin', 'standin', 'standin')
+    batcher = OrderBatcher(api, policy=POLICY)
+    http = httpx.AsyncClient()
+    for name, config in ROUNDS:
+        await http.post(STANDIN + '/standin/reset')
+        await http.post(STANDIN + '/standin/config', json=config)
+        before = (await http.get(STANDIN + '/standin/stats')).json()
+        orders, requests = batcher.orders, batcher.batches
+        start = time.perf_counter()
+        for wave_no in range(waves):
+            await wave(batcher, n, wave_no)
+        elapsed = time.perf_counter() - start
+        after = (await http.get(STANDIN + '/standin/stats')).json()
+        executed = after['orders'] - before['orders']
+        assert executed == n * waves, 'expected %d orders on the stand-in, found %d' % (n * waves, executed)
+        held = {p['symbol']: float(p['total']) for p in after['positions']}.get(SYMBOL, 0.0)
+        assert abs(held - SIZE * n * waves) < 1e-6, 'position %r, expected %r' % (held, SIZE * n * waves)
+        print('%-22s %d orders in %d batcher calls, %5.2fs | stand-in: %d requests, %d injected errors, %d lost'
+              % (name, batcher.orders - orders, batcher.batches - requests, elapsed,
+                 after['requests'] - before['requests'], after['errors'] - before['errors'],
+                 after['lost'] - before['lost']))
+    await http.aclose()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    serve(standin.app, PORT)
+    asyncio.run(run(n, 5))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/python
+"""Replay synthetic ``books`` updates through the order book engine.
+
+    python -m benchmarks.bench_order_book [updates]
+
+Reports updates/second for the incremental OrderBook (apply + checksum
+verify) next to the previous dict-rebuild-and-sort merge, and checks the
+chained checksum against a plain joined-string crc32.
+"""
+import random
+import sys
+import time
+from zlib import crc32
+
+from bitget.ws.order_book import OrderBook
+
+
+def _fmt(price):
+    return '%.2f' % price
+
+
+def make_replay(n, depth=200, seed=7):
+    rnd = random.Random(seed)
+    mid = 150.0
+    asks = [[_fmt(mid + 0.01 * (i + 1)), str(rnd.randint(1, 500))] for i in range(depth)]
+    bids = [[_fmt(mid - 0.01 * (i + 1)), str(rnd.randint(1, 500))] for i in range(depth)]
+    book = OrderBook()
+    book.snapshot(asks, bids)
+    updates = []
+    for _ in range(n):
+        u_asks, u_bids = [], []
+        for _ in range(rnd.randint(1, 6)):
+            side = u_asks if rnd.random() < 0.5 else u_bids
+            offset = 0.01 * rnd.randint(1, depth + 20)
+            price = _fmt(mid + offset if side is u_asks else mid - offset)
+            size = '0' if rnd.random() < 0.3 else str(rnd.randint(1, 500))
+            side.append([price, size])
+        book.update(u_asks, u_bids)
+        updates.append((u_asks, u_bids, book.checksum()))
+    return asks, bids, updates
+
+
+def reference_checksum(book):
+    parts = []
+    for i in range(25):
+        if i < len(book.bids):
+            parts.append('%s:%s' % book.bids.level(i))
+        if i < len(book.asks):
+            parts.append('%s:%s' % book.asks.level(i))
+    crc = crc32(':'.join(parts).encode())
+    return crc - 0x100000000 if crc > 0x7fffffff else crc
+
+
+def legacy_merge(all_list, update_list, is_reverse):
+    price_and_value = {}
+    for v in all_list:
+        price_and_value[v[0]] = v
+    for v in update_list:
+        if v[1] == '0':
+            price_and_value.pop(v[0], None)
+            continue
+        price_and_value[v[0]] = v
+    return [price_and_value[k] for k in sorted(price_and_value.keys(), reverse=is_reverse)]
+
+
+def legacy_checksum_string(asks, bids):
+    crc32str = ''
+    for x in range(min(25, len(asks), len(bids))):
+        crc32str = crc32str + bids[x][0] + ':' + bids[x][1] + ':'
+        crc32str = crc32str + asks[x][0] + ':' + asks[x][1] + ':'
+    return crc32(bytes(crc32str[0:-1], encoding='utf8'))
+
+
+def main(n=50000):
+    asks, bids, updates = make_replay(n)
+
+    book = OrderBook()
+    book.snapshot(asks, bids)
+    for u_asks, u_bids, checksum in updates[:1000]:
+        book.update(u_asks, u_bids)
+        assert book.verify(checksum) and reference_checksum(book) == checksum
+
+    book = OrderBook()
+    book.snapshot(asks, bids)
+    start = time.perf_counter()
+    for u_asks, u_bids, checksum in updates:
+        book.update(u_asks, u_bids)
+        if not book.verify(checksum):
+            raise AssertionError('checksum mismatch')
+    elapsed = time.perf_counter() - start
+    print('order_book    %10.0f updates/s' % (n / elapsed))
+
+    all_asks, all_bids = asks, bids
+    start = time.perf_counter()
+    for u_asks, u_bids, checksum in updates:
+        all_asks = legacy_merge(all_asks, u_asks, False)
+        all_bids = legacy_merge(all_bids, u_bids, True)
+        legacy_checksum_string(all_asks, all_bids)
+    elapsed = time.perf_counter() - start
+    print('legacy_merge  %10.0f updates/s' % (n / elapsed))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
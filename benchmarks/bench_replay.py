@@ -0,0 +1,105 @@
+#!/usr/bin/python
+"""Replay of recorded signals over a year of 1-minute bars.
+
+    python -m benchmarks.bench_replay [symbols] [signals_per_day]
+
+Writes a synthetic candle store (random walk, one year of 1m bars per
+symbol), a contracts snapshot, and a JSONL log of random ENTRY_/EXIT_
+alerts (some resent to exercise the dedup, some with TradingView ``.P``
+tickers to exercise symbol canonicalization), then times the two halves of ``replay.replay``:
+pushing the signals through ``trading.execute_signal`` against the
+simulated exchange, and the vectorized fills/fees/funding/PnL.
+"""
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from bitget import log
+from bitget.candle_store import COLUMNS, CandleStore
+
+MINUTE = 60000
+T0 = 1704067200000
+BARS = 365 * 1440
+
+
+def write_store(root, symbols, rng):
+    store = CandleStore(root)
+    block = np.empty((BARS, len(COLUMNS)))
+    block[:, 0] = T0 + MINUTE * np.arange(BARS)
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.0008, BARS)))
+        block[:, 1] = np.r_[close[0], close[:-1]]
+        block[:, 2] = np.maximum(block[:, 1], close) * 1.0005
+        block[:, 3] = np.minimum(block[:, 1], close) * 0.9995
+        block[:, 4] = close
+        block[:, 5] = block[:, 6] = 1.0
+        store.write(symbol, '1m', block, [[T0, T0 + BARS * MINUTE]])
+    return store
+
+
+def write_contracts(path, symbols):
+    with open(path, 'w') as f:
+        json.dump([{'symbol': symbol, 'baseCoin': symbol[:-4], 'quoteCoin': 'USDT', 'pricePlace': '4',
+                    'volumePlace': '1', 'sizeMultiplier': '0.1', 'minTradeNum': '0.1', 'symbolStatus': 'normal'}
+                   for symbol in symbols], f)
+
+
+def write_signals(path, symbols, per_day, rng):
+    n = len(symbols) * per_day * 365
+    received = np.sort(rng.uniform(T0 / 1000, T0 / 1000 + BARS * 60, n))
+    names = rng.choice(['ENTRY_LONG', 'ENTRY_SHORT', 'EXIT_LONG', 'EXIT_SHORT', 'EXIT_CONFIRMED'], n)
+    picked = rng.integers(0, len(symbols), n)
+    with open(path, 'w') as f:
+        for i in range(n):
+            symbol = symbols[picked[i]] + ('.P' if i % 3 == 0 else '')
+            alert = {'signal': str(names[i]), 'symbol': symbol, 'alert_id': str(i),
+                     'received': float(received[i])}
+            f.write(json.dumps(alert) + '\n')
+            if i % 50 == 0:
+                # TradingView resend
+                f.write(json.dumps(dict(alert, received=float(received[i]) + 1)) + '\n')
+    return n
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 24
+    per_day = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    log.setup_logging(level='WARNING')
+    import replay
+
+    root = tempfile.mkdtemp()
+    try:
+        rng = np.random.default_rng(7)
+        symbols = ['SYM%02dUSDT' % i for i in range(count)]
+        start = time.perf_counter()
+        store = write_store(os.path.join(root, 'candles'), symbols, rng)
+        write_contracts(os.path.join(root, 'contracts.json'), symbols)
+        alerts = write_signals(os.path.join(root, 'signals.jsonl'), symbols, per_day, rng)
+        print('setup: %d symbols x %d bars, %d alerts in %.1fs' % (count, BARS, alerts, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        replay.load_contracts(os.path.join(root, 'contracts.json'))
+        signals = replay.load_signals(os.path.join(root, 'signals.jsonl'))
+        sim = replay.SimExchange()
+        asyncio.run(replay.run_signals(signals, sim))
+        through = time.perf_counter() - start
+        start = time.perf_counter()
+        results = replay.simulate(sim.orders, store)
+        vectorized = time.perf_counter() - start
+        total = results['TOTAL']
+        print('signals through trading.execute_signal: %6.2fs (%d signals, %d orders)'
+              % (through, len(signals), len(sim.orders)))
+        print('vectorized fills/fees/funding/pnl:      %6.2fs (pnl %.2f, fees %.2f, funding %.2f, max dd %.2f)'
+              % (vectorized, total['pnl'], total['fees'], total['funding'], total['max_drawdown']))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/python
+"""Per-request signing and serialization cost.
+
+    python -m benchmarks.bench_signing [iterations]
+
+The ``legacy_*`` rows re-create the previous per-call behaviour (key bytes
+re-encoded / RSA key re-parsed, strings built by concatenation) so the
+numbers can be tracked against it.
+"""
+import base64
+import hmac
+import json
+import sys
+import timeit
+
+from Crypto.Hash import SHA256
+from Crypto.PublicKey import RSA
+from Crypto.Signature import PKCS1_v1_5 as pk
+
+from bitget import consts as c, utils
+from bitget.client import Client
+from bitget.signer import Signer
+
+SECRET = 'a' * 64
+PATH = '/api/v2/mix/order/place-order'
+PARAMS = {'symbol': 'SOLUSDT', 'marginCoin': 'USDT', 'productType': 'USDT-FUTURES', 'marginMode': 'isolated',
+          'size': '1', 'side': 'buy', 'orderType': 'market'}
+BODY = json.dumps(PARAMS)
+
+
+def legacy_sign(message, secret_key):
+    mac = hmac.new(bytes(secret_key, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
+    return str(base64.b64encode(mac.digest()), 'utf8')
+
+
+def legacy_sign_rsa(message, secret_key):
+    return str(base64.b64encode(pk.new(RSA.importKey(secret_key)).sign(SHA256.new(message.encode('utf-8')))), 'utf8')
+
+
+def legacy_pre_hash(timestamp, method, request_path, body=''):
+    return str(timestamp) + str.upper(method) + request_path + body
+
+
+def legacy_params_to_str(params):
+    params = sorted(params.items(), key=lambda x: x[0])
+    url = ''
+    for key, value in params:
+        url = url + str(key) + '=' + str(value) + '&'
+    return '?' + url[0:-1]
+
+
+def _row(name, fn, number):
+    per_call = min(timeit.repeat(fn, number=number, repeat=5)) / number
+    print('%-22s %10.2f us/op' % (name, per_call * 1e6))
+
+
+def main(number=20000):
+    rsa_key = RSA.generate(2048).export_key().decode()
+    hmac_signer = Signer(SECRET, c.SHA256)
+    rsa_signer = Signer(rsa_key, c.RSA)
+    client = Client('key', SECRET, 'pass', transport=object())
+    ts = 1700000000000
+
+    _row('legacy_pre_hash', lambda: legacy_pre_hash(ts, 'POST', PATH, BODY), number)
+    _row('pre_hash', lambda: utils.pre_hash(ts, 'POST', PATH, BODY), number)
+    _row('legacy_params_to_str', lambda: legacy_params_to_str(PARAMS), number)
+    _row('parse_params_to_str', lambda: utils.parse_params_to_str(PARAMS), number)
+    _row('json_body', lambda: json.dumps(PARAMS), number)
+    _row('legacy_sign_hmac', lambda: legacy_sign(legacy_pre_hash(ts, 'POST', PATH, BODY), SECRET), number)
+    _row('signer_hmac', lambda: hmac_signer.sign(ts, 'POST', PATH, BODY), number)
+    _row('legacy_sign_rsa', lambda: legacy_sign_rsa(legacy_pre_hash(ts, 'POST', PATH, BODY), rsa_key), number // 100)
+    _row('signer_rsa', lambda: rsa_signer.sign(ts, 'POST', PATH, BODY), number // 100)
+    _row('prepare_request_post', lambda: client._prepare_request(c.POST, PATH, PARAMS, ts), number)
+    _row('prepare_request_get', lambda: client._prepare_request(c.GET, PATH, PARAMS, ts), number)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
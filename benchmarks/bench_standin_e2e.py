@@ -0,0 +1,126 @@
+#!/usr/bin/python
+"""Whole stack against the local Bitget stand-in (``standin.py``).
+
+    python -m benchmarks.bench_standin_e2e [signals]
+
+The stand-in and ``main.py`` run in this process on two local ports, with
+the BITGET_* base URLs pointed at the stand-in before anything is imported.
+Three rounds of webhooks (distinct alert ids, entries and exits spread over
+the stand-in's symbols) are posted to main: a clean exchange, one answering
+after 20 +/- 10 ms, and one that additionally fails 10% of requests before
+processing them and loses 10% of responses after processing them. Each round
+reports webhook acknowledgement latency, the time until the stand-in has
+executed every order, and whether any order went through twice. The public
+``books`` channel is followed meanwhile; resubscribes mean a bad checksum.
+
+Exits use EXIT_MODE=place_order: the client-side limiter holds close-positions
+to Bitget's 1 request/s, which would be all this measures. place-order
+allows 10/s, so a round of N signals cannot finish in under N/10 seconds.
+"""
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+
+PORTS = []
+for _ in range(2):
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        PORTS.append(s.getsockname()[1])
+STANDIN = 'http://127.0.0.1:%d' % PORTS[0]
+os.environ.update({
+    'BITGET_API_URL': STANDIN,
+    'BITGET_WS_PUBLIC_URL': 'ws://127.0.0.1:%d/v2/ws/public' % PORTS[0],
+    'BITGET_WS_PRIVATE_URL': 'ws://127.0.0.1:%d/v2/ws/private' % PORTS[0],
+    'BITGET_API_KEY': 'standin', 'BITGET_API_SECRET': 'standin', 'BITGET_API_PASSPHRASE': 'standin',
+    'STANDIN_API_SECRET': 'standin', 'STANDIN_PUSH_MS': '50', 'EXIT_MODE': 'place_order',
+    'LOG_LEVEL': 'WARNING',
+})
+
+import httpx  # noqa: E402
+import numpy as np  # noqa: E402
+import uvicorn  # noqa: E402
+
+import main as webhook  # noqa: E402
+import standin  # noqa: E402
+from bitget import consts as c  # noqa: E402
+from bitget.ws.bitget_ws_client import BitgetWsClient, SubscribeReq  # noqa: E402
+
+ROUNDS = (
+    ('clean', {'latency_ms': 0, 'jitter_ms': 0, 'error_rate': 0, 'lost_rate': 0}),
+    ('20ms latency', {'latency_ms': 20, 'jitter_ms': 10, 'error_rate': 0, 'lost_rate': 0}),
+    ('+10% errors, 10% lost', {'latency_ms': 20, 'jitter_ms': 10, 'error_rate': 0.1, 'lost_rate': 0.1}),
+)
+
+
+def serve(app, port):
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=port, log_level='warning', lifespan='on'))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+def signals(n, round_no):
+    symbols = list(standin.markets)
+    # entries and exits alternate per symbol, so every exit has a position to close
+    for i in range(n):
+        symbol = symbols[i % len(symbols)]
+        leg = (i // len(symbols)) % 2
+        yield {'signal': 'EXIT_CONFIRMED' if leg else 'ENTRY_LONG', 'symbol': symbol,
+               'alert_id': 'r%d-%d' % (round_no, i)}
+
+
+async def run_round(n, round_no):
+    client = httpx.AsyncClient()
+    executed = (await client.get(STANDIN + '/standin/stats')).json()['orders']
+    acks = []
+    start = time.perf_counter()
+    for payload in signals(n, round_no):
+        sent = time.perf_counter()
+        response = await client.post('http://127.0.0.1:%d/' % PORTS[1], json=payload)
+        acks.append(time.perf_counter() - sent)
+        response.raise_for_status()
+    # done when every order is in, or nothing new arrived for 2s (an exit that found no position)
+    orders, last_change = executed, time.perf_counter()
+    while orders - executed < n and time.perf_counter() - last_change < 2:
+        await asyncio.sleep(0.01)
+        stats = (await client.get(STANDIN + '/standin/stats')).json()
+        if stats['orders'] != orders:
+            orders, last_change = stats['orders'], time.perf_counter()
+    await client.aclose()
+    return np.array(acks), last_change - start, orders - executed, stats['positions']
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    serve(standin.app, PORTS[0])
+    serve(webhook.app, PORTS[1])
+
+    # per-channel listener only: a resync that lost it would show up as frames on the default one
+    books = BitgetWsClient(c.V2_PUBLIC_WS_URL).error_listener(print).build()
+    books.subscribe([SubscribeReq('USDT-FUTURES', 'books', symbol) for symbol in standin.markets],
+                    lambda message: None)
+    time.sleep(1)
+    http = httpx.Client()
+    # books here, ticker per symbol and positions from main; anything above this is a checksum resync
+    subscribes = http.get(STANDIN + '/standin/stats').json()['subscribes']
+
+    for round_no, (name, config) in enumerate(ROUNDS):
+        http.post(STANDIN + '/standin/config', json=config)
+        acks, elapsed, executed, positions = asyncio.run(run_round(n, round_no))
+        print('%-22s ack p50 %5.2f ms p99 %5.2f ms | %d/%d orders in %5.2fs | open positions %d'
+              % (name, np.percentile(acks, 50) * 1000, np.percentile(acks, 99) * 1000, executed, n, elapsed,
+                 len(positions)))
+
+    stats = http.get(STANDIN + '/standin/stats').json()
+    print('stand-in: %d requests, %d injected errors, %d lost responses, %d book/ticker pushes, %d resubscribes'
+          % (stats['requests'], stats['errors'], stats['lost'], stats['pushes'],
+             stats['subscribes'] - subscribes))
+    books.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/python
+"""Connect + login + subscribe latency, thread client vs asyncio client.
+
+    python -m benchmarks.bench_ws_connect [rounds]
+
+Runs a local WebSocket server that acknowledges login/subscribe like
+Bitget (and answers ``ping`` with ``pong``), then times how long each
+client takes from ``build()`` until its subscription is acknowledged, and
+how long the asyncio client takes to be resubscribed after the server
+drops the connection.
+"""
+import asyncio
+import json
+import sys
+import threading
+import time
+
+import websockets
+
+from bitget.aio.ws_client import AsyncWsClient
+from bitget.ws.bitget_ws_client import BitgetWsClient, SubscribeReq
+
+
+async def _serve(ws):
+    async for message in ws:
+        if message == 'ping':
+            await ws.send('pong')
+            continue
+        request = json.loads(message)
+        if request['op'] == 'login':
+            await ws.send(json.dumps({'event': 'login', 'code': 0}))
+            continue
+        for arg in request['args']:
+            await ws.send(json.dumps({'event': request['op'], 'arg': arg}))
+
+
+def start_server():
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    holder = {}
+
+    async def main():
+        holder['server'] = await websockets.serve(_serve, '127.0.0.1', 0)
+        holder['loop'] = loop
+        started.set()
+        await asyncio.Future()
+
+    threading.Thread(target=loop.run_until_complete, args=(main(),), daemon=True).start()
+    started.wait()
+    port = list(holder['server'].sockets)[0].getsockname()[1]
+    return 'ws://127.0.0.1:%d' % port, holder
+
+
+def channel():
+    return SubscribeReq('USDT-FUTURES', 'ticker', 'BTCUSDT')
+
+
+def bench_thread(url):
+    acked = threading.Event()
+    start = time.perf_counter()
+    client = BitgetWsClient(url, need_login=True).api_key('k').api_secret_key('s').passphrase('p') \
+        .listener(lambda message: acked.set()).build()
+    client.subscribe([channel()])
+    acked.wait(10)
+    return time.perf_counter() - start
+
+
+async def bench_async(url, holder):
+    start = time.perf_counter()
+    client = await AsyncWsClient(url, need_login=True).api_key('k').api_secret_key('s').passphrase('p').build()
+    await client.subscribe([channel()])
+    connect = time.perf_counter() - start
+
+    reconnected = asyncio.Event()
+    client.reconnect_listener(reconnected.set)
+    start = time.perf_counter()
+    # drop every server-side connection
+    for conn in list(holder['server'].connections):
+        holder['loop'].call_soon_threadsafe(asyncio.ensure_future, conn.close())
+    await asyncio.wait_for(reconnected.wait(), 30)
+    reconnect = time.perf_counter() - start
+    await client.close()
+    return connect, reconnect
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    url, holder = start_server()
+    thread_times = [bench_thread(url) for _ in range(rounds)]
+    async_times = [asyncio.run(bench_async(url, holder)) for _ in range(rounds)]
+    print('thread client  build+login+subscribe: %8.2f ms (best of %d)' % (min(thread_times) * 1000, rounds))
+    print('asyncio client build+login+subscribe: %8.2f ms (best of %d)' % (min(t[0] for t in async_times) * 1000,
+                                                                         rounds))
+    print('asyncio client drop -> resubscribed:  %8.2f ms (best of %d)' % (min(t[1] for t in async_times) * 1000,
+                                                                         rounds))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/python
+"""Decode + route throughput for WebSocket frames.
+
+    python -m benchmarks.bench_ws_dispatch [frames]
+
+Feeds recorded-style frames (tickers, trades and books snapshot/updates)
+through BitgetWsClient's message handler and through the previous
+decode path (json.loads, then arg re-serialised and re-parsed into a
+SubscribeReq for the checksum and again for the listener lookup).
+"""
+import json
+import sys
+import time
+
+from benchmarks.bench_order_book import make_replay
+from bitget.ws.bitget_ws_client import BitgetWsClient, SubscribeReq
+
+
+def make_frames(n):
+    asks, bids, updates = make_replay(n // 3)
+    books_arg = {'instType': 'USDT-FUTURES', 'channel': 'books', 'instId': 'SOLUSDT'}
+    frames = [json.dumps({'action': 'snapshot', 'arg': books_arg,
+                          'data': [{'asks': asks, 'bids': bids, 'checksum': 0, 'ts': '1'}]})]
+    for i, (u_asks, u_bids, checksum) in enumerate(updates):
+        frames.append(json.dumps({'action': 'update', 'arg': books_arg,
+                                  'data': [{'asks': u_asks, 'bids': u_bids, 'checksum': checksum, 'ts': str(i)}]}))
+        frames.append(json.dumps({'action': 'snapshot', 'arg': {'instType': 'USDT-FUTURES', 'channel': 'ticker',
+                                                                'instId': 'SOLUSDT'},
+                                  'data': [{'instId': 'SOLUSDT', 'lastPr': '150.01', 'bidPr': '150.00',
+                                            'askPr': '150.02', 'markPrice': '150.01', 'ts': str(i)}]}))
+        frames.append(json.dumps({'action': 'update', 'arg': {'instType': 'USDT-FUTURES', 'channel': 'trade',
+                                                              'instId': 'SOLUSDT'},
+                                  'data': [{'ts': str(i), 'price': '150.01', 'size': '3', 'side': 'buy',
+                                            'tradeId': str(i)}]}))
+    return frames
+
+
+def _to_req(d):
+    return SubscribeReq(d['instType'], d['channel'], d.get('instId') or d.get('coin'))
+
+
+def legacy_dispatch(frames, scribe_map):
+    for message in frames:
+        json_obj = json.loads(message)
+        if 'data' in json_obj:
+            arg = str(json_obj.get('arg')).replace("'", '"')
+            json.loads(arg, object_hook=_to_req)
+            str(json_obj.get('data')).replace("'", '"')
+            json_str = str(json_obj.get('arg')).replace("'", '"')
+            listener = scribe_map.get(json.loads(json_str, object_hook=_to_req))
+            if listener:
+                listener(message)
+
+
+def check_resync():
+    # a bad checksum resubscribes the channel; its frames must still reach the channel's own listener
+    got = []
+    books = SubscribeReq('USDT-FUTURES', 'books', 'SOLUSDT')
+    client = BitgetWsClient('ws://unused').listener(lambda message: got.append('default'))
+    client.send_message = lambda op, args: None
+    client.subscribe([books], lambda message: got.append('books'))
+    on_message = client._BitgetWsClient__on_message
+    arg = {'instType': 'USDT-FUTURES', 'channel': 'books', 'instId': 'SOLUSDT'}
+    snapshot = json.dumps({'action': 'snapshot', 'arg': arg,
+                           'data': [{'asks': [['101', '1']], 'bids': [['100', '1']], 'checksum': 0, 'ts': '1'}]})
+    on_message(None, snapshot)
+    on_message(None, json.dumps({'action': 'update', 'arg': arg,
+                                 'data': [{'asks': [['102', '1']], 'bids': [], 'checksum': 1, 'ts': '2'}]}))
+    on_message(None, snapshot)
+    if got != ['books', 'books'] or client.get_book(books) is None:
+        raise SystemExit('books resync lost the channel listener: %s' % got)
+
+
+def main(n=30000):
+    check_resync()
+    frames = make_frames(n)
+    count = [0]
+
+    def listener(message):
+        count[0] += 1
+
+    channels = [SubscribeReq('USDT-FUTURES', ch, 'SOLUSDT') for ch in ('books', 'ticker', 'trade')]
+    client = BitgetWsClient('ws://unused')
+    client.send_message = lambda op, args: None
+    client.subscribe(channels, listener)
+    on_message = client._BitgetWsClient__on_message
+
+    start = time.perf_counter()
+    for frame in frames:
+        on_message(None, frame)
+    elapsed = time.perf_counter() - start
+    print('single_parse  %10.0f frames/s  (%d delivered)' % (len(frames) / elapsed, count[0]))
+
+    count[0] = 0
+    start = time.perf_counter()
+    legacy_dispatch(frames, {c: listener for c in channels})
+    elapsed = time.perf_counter() - start
+    print('legacy        %10.0f frames/s  (%d delivered, books merge not included)' % (len(frames) / elapsed, count[0]))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 30000)
@@ -0,0 +1,139 @@
+#!/usr/bin/python
+"""WsManager sharding and rebalancing against a local WebSocket server.
+
+    python -m benchmarks.bench_ws_manager [max_channels]
+
+The server acknowledges subscribe/unsubscribe like Bitget, keeps the channels
+of every connection and can push one message per channel or drop a given
+connection. The manager is filled past its cap in three calls (a full shard,
+another full shard, then a partial one), so the shards start uneven. Kicking
+the small shard must leave the channels spread evenly over as few
+connections as the cap allows, each on exactly one connection and still
+routed to its listener; after most channels are unsubscribed, another kick
+must drain the manager down to a single connection.
+"""
+import asyncio
+import json
+import sys
+import time
+
+import websockets
+
+from bitget.aio.ws_manager import WsManager
+from bitget.ws.bitget_ws_client import SubscribeReq, route_key, shard_sizes
+
+
+class StandIn:
+    def __init__(self):
+        self.channels = {}
+
+    async def start(self):
+        self.server = await websockets.serve(self.serve, '127.0.0.1', 0)
+        self.url = 'ws://127.0.0.1:%d' % list(self.server.sockets)[0].getsockname()[1]
+
+    async def serve(self, ws):
+        channels = self.channels[ws] = {}
+        try:
+            async for message in ws:
+                if message == 'ping':
+                    await ws.send('pong')
+                    continue
+                request = json.loads(message)
+                for arg in request['args']:
+                    if request['op'] == 'subscribe':
+                        channels[route_key(arg)] = arg
+                    else:
+                        channels.pop(route_key(arg), None)
+                    await ws.send(json.dumps({'event': request['op'], 'arg': arg}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            del self.channels[ws]
+
+    def loads(self):
+        return sorted((len(channels) for channels in self.channels.values()), reverse=True)
+
+    async def push(self):
+        for ws, channels in list(self.channels.items()):
+            for arg in list(channels.values()):
+                await ws.send(json.dumps({'action': 'snapshot', 'arg': arg, 'data': [{'lastPr': '1'}]}))
+
+    async def kick(self, key):
+        ws = next(ws for ws, channels in self.channels.items() if key in channels)
+        await ws.close()
+
+    def check(self, expected, max_channels):
+        owners = {}
+        for ws, channels in self.channels.items():
+            for key in channels:
+                assert key not in owners, '%s subscribed on two connections' % (key,)
+                owners[key] = ws
+        assert set(owners) == expected, 'server has %d channels, expected %d' % (len(owners), len(expected))
+        assert self.loads() == shard_sizes(len(expected), max_channels), \
+            'connections hold %s, expected %s' % (self.loads(), shard_sizes(len(expected), max_channels))
+
+
+async def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise SystemExit('timed out')
+        await asyncio.sleep(0.01)
+
+
+async def run(max_channels):
+    server = StandIn()
+    await server.start()
+    rebalanced = asyncio.Event()
+    manager = WsManager(server.url, max_channels=max_channels).reconnect_listener(rebalanced.set)
+    received = {}
+
+    def listener(message):
+        key = route_key(message['arg'])
+        received[key] = received.get(key, 0) + 1
+
+    symbols = ['SYM%dUSDT' % i for i in range(2 * max_channels + max_channels // 2)]
+    channels = [SubscribeReq('USDT-FUTURES', 'ticker', symbol) for symbol in symbols]
+    for start, end in ((0, max_channels), (max_channels, 2 * max_channels), (2 * max_channels, len(channels))):
+        await manager.subscribe(channels[start:end], listener)
+    keys = {chanel.route_key() for chanel in channels}
+    loads = sorted((s['channels'] for s in manager.stats()['shards']), reverse=True)
+    print('%d channels, cap %d: subscribed as %s' % (len(keys), max_channels, loads))
+    assert loads == [max_channels, max_channels, len(keys) - 2 * max_channels], loads
+
+    started = time.perf_counter()
+    await server.kick(channels[-1].route_key())
+    await asyncio.wait_for(rebalanced.wait(), 10)
+    elapsed = time.perf_counter() - started
+    server.check(keys, max_channels)
+    await server.push()
+    await wait_for(lambda: sum(received.values()) >= len(keys))
+    assert received == dict.fromkeys(keys, 1), 'pushes not routed once per channel: %s' % received
+    print('kicked the small shard: %s after %d moves in %.0f ms, every channel pushed to its listener once'
+          % (server.loads(), manager.stats()['moves'], elapsed * 1000))
+
+    # every fifth channel: a few left on each shard, which only a rebalance merges
+    kept = channels[::5]
+    await manager.unsubscribe([chanel for chanel in channels if chanel not in kept])
+    assert len(manager.stats()['shards']) > 1, manager.stats()
+    rebalanced.clear()
+    await server.kick(kept[0].route_key())
+    await asyncio.wait_for(rebalanced.wait(), 10)
+    server.check({chanel.route_key() for chanel in kept}, max_channels)
+    stats = manager.stats()
+    assert len(stats['shards']) == 1 and stats['shards'][0]['connected'], stats
+    await wait_for(lambda: len(server.channels) == 1)
+    print('unsubscribed down to %d channels and kicked: %s on the server, manager %s'
+          % (len(kept), server.loads(), stats))
+
+    await manager.close()
+    server.server.close()
+
+
+def main():
+    max_channels = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    asyncio.run(run(max_channels))
+
+
+if __name__ == '__main__':
+    main()
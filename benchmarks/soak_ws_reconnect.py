@@ -0,0 +1,114 @@
+#!/usr/bin/python
+"""Soak test: thousands of forced disconnects against a local stand-in server.
+
+    python -m benchmarks.soak_ws_reconnect [disconnects]
+
+The server acknowledges login/subscribe, pushes a books snapshot on every
+books subscription and can drop all connections on demand. The sync
+BitgetWsClient is kicked repeatedly; after each kick the script waits for
+``reconnect_listener`` and checks the book was resynced. Thread count and
+resident memory are sampled along the way and must stay flat.
+"""
+import asyncio
+import gc
+import json
+import os
+import sys
+import threading
+import time
+
+import websockets
+
+from bitget.ws.bitget_ws_client import BitgetWsClient, SubscribeReq
+
+BOOK = {'asks': [['101.5', '2'], ['102', '1']], 'bids': [['101', '3'], ['100.5', '4']], 'checksum': 0, 'ts': '1'}
+
+
+class StandIn:
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.connections = set()
+        ready = threading.Event()
+
+        async def main():
+            self.server = await websockets.serve(self.serve, '127.0.0.1', 0)
+            ready.set()
+            await asyncio.Future()
+
+        threading.Thread(target=self.loop.run_until_complete, args=(main(),), daemon=True).start()
+        ready.wait()
+        self.url = 'ws://127.0.0.1:%d' % list(self.server.sockets)[0].getsockname()[1]
+
+    async def serve(self, ws):
+        self.connections.add(ws)
+        try:
+            async for message in ws:
+                if message == 'ping':
+                    await ws.send('pong')
+                    continue
+                request = json.loads(message)
+                if request['op'] == 'login':
+                    await ws.send(json.dumps({'event': 'login', 'code': 0}))
+                    continue
+                for arg in request['args']:
+                    await ws.send(json.dumps({'event': request['op'], 'arg': arg}))
+                    if request['op'] == 'subscribe' and arg['channel'] == 'books':
+                        await ws.send(json.dumps({'action': 'snapshot', 'arg': arg, 'data': [BOOK]}))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(ws)
+
+    def kick(self):
+        async def close_all():
+            for ws in list(self.connections):
+                await ws.close()
+
+        asyncio.run_coroutine_threadsafe(close_all(), self.loop).result(5)
+
+
+def rss_kb():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+
+
+def main():
+    disconnects = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    server = StandIn()
+    books = SubscribeReq('USDT-FUTURES', 'books', 'BTCUSDT')
+    reconnected = threading.Event()
+    client = BitgetWsClient(server.url, need_login=True).api_key('k').api_secret_key('s').passphrase('p') \
+        .listener(lambda message: None).reconnect_listener(reconnected.set)
+    client.subscribe([books, SubscribeReq('USDT-FUTURES', 'ticker', 'BTCUSDT')], lambda message: None)
+    client.build()
+
+    samples = []
+    started = time.perf_counter()
+    for i in range(disconnects):
+        reconnected.clear()
+        server.kick()
+        if not reconnected.wait(10):
+            raise SystemExit('no reconnect after kick %d: %s' % (i, client.stats()))
+        # the resubscribe's snapshot lands just after the listener
+        deadline = time.monotonic() + 5
+        while client.get_book(books) is None and time.monotonic() < deadline:
+            time.sleep(0.001)
+        if client.get_book(books) is None:
+            raise SystemExit('book not resynced after kick %d' % i)
+        if i % max(1, disconnects // 10) == 0 or i == disconnects - 1:
+            gc.collect()
+            samples.append((i + 1, threading.active_count(), rss_kb()))
+    elapsed = time.perf_counter() - started
+
+    print('%10s %8s %10s' % ('kicks', 'threads', 'rss_kb'))
+    for kicks, threads, rss in samples:
+        print('%10d %8d %10d' % (kicks, threads, rss))
+    print('%d disconnects in %.1fs (%.1f ms per reconnect+resync), client: %s'
+          % (disconnects, elapsed, elapsed / disconnects * 1000, client.stats()))
+    warm = samples[min(1, len(samples) - 1)]
+    print('threads %+d, rss %+d kB after warm-up' % (samples[-1][1] - warm[1], samples[-1][2] - warm[2]))
+    client.close()
+
+
+if __name__ == '__main__':
+    main()
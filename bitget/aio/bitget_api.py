@@ -0,0 +1,8 @@
+#!/usr/bin/python
+from bitget.aio.client import AsyncClient
+from bitget.bitget_api import BitgetApi
+
+
+class AsyncBitgetApi(AsyncClient, BitgetApi):
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, transport=None):
+        AsyncClient.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, transport)
@@ -0,0 +1,38 @@
+#!/usr/bin/python
+import time
+
+from .. import consts as c, exceptions, retry, utils, transport as t
+from ..client import REQUESTS
+from ..client import Client
+
+
+class AsyncClient(Client):
+    """asyncio flavour of ``Client``: same signing, headers and exceptions, awaitable requests."""
+
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, transport=None,
+                 rate_limiter=None, retry_policy=retry.DEFAULT_POLICY):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first,
+                        transport or t.default_async_transport(), rate_limiter, retry_policy)
+
+    async def _request(self, method, request_path, params, cursor=False):
+        if method == c.GET and self.retry_policy:
+            return await retry.call_async(lambda: self._send(method, request_path, params, cursor), self.retry_policy)
+        return await self._send(method, request_path, params, cursor)
+
+    async def _send(self, method, request_path, params, cursor=False):
+        # wait for a token before stamping, so queued requests are not signed stale
+        waited = await self.rate_limiter.acquire_async(method, request_path)
+        started = time.perf_counter()
+        timestamp = utils.get_timestamp()
+        if self.use_server_time:
+            timestamp = self._get_timestamp()
+
+        url, body, header = self._prepare_request(method, request_path, params, timestamp)
+        prepared = time.perf_counter()
+
+        try:
+            response = await self.transport.request(method, url, body, header)
+        except exceptions.BitgetNetworkException:
+            REQUESTS.inc(request_path, 'network_error')
+            raise
+        return self._finish(method, request_path, response, cursor, waited, started, prepared)
@@ -0,0 +1,127 @@
+#!/usr/bin/python
+import asyncio
+import uuid
+
+from .. import retry
+from ..exceptions import BitgetRequestException
+
+# fields shared by every order of one batch-place-order call
+BATCH_KEYS = ('symbol', 'productType', 'marginCoin', 'marginMode')
+BATCH_LIMIT = 50
+
+
+class OrderBatcher:
+    """Coalesces place-order calls that arrive within ``window`` seconds.
+
+    v2 batch-place-order takes one symbol/productType/marginCoin/marginMode per
+    call, so orders are grouped on those fields and sent in chunks of at most
+    ``max_batch``. Every order gets a ``clientOid`` (kept if the caller set one)
+    and the batch's success/failure lists are mapped back through it; a caller
+    awaiting ``submit`` sees the same ``{"code": "00000", "data": {...}}`` shape
+    a single place-order returns.
+
+    Only orders submitted concurrently can share a call: a caller that awaits
+    each order before submitting the next (like the per-symbol dispatcher in
+    trading) never fills a batch and just pays ``window`` on every order.
+
+    Retries are as safe as ``retry.place_order_idempotent_async``: a lone
+    order goes through it directly, and when a batch fails transiently (it
+    may or may not have landed) or an order comes back as a duplicate
+    clientOid, those orders are settled through it one by one, so the
+    ``detail`` lookup finds what the exchange already has.
+    """
+
+    def __init__(self, order_api, window=0.01, max_batch=BATCH_LIMIT, policy=retry.ORDER_POLICY):
+        # order_api: bitget.aio.v2.mix.order_api.OrderApi
+        self.order_api = order_api
+        self.window = window
+        self.max_batch = max_batch
+        self.policy = policy
+        self.__pending = {}
+        # the loop keeps only weak references to tasks; these must live until the batch is answered
+        self.__sending = set()
+        self.batches = 0
+        self.orders = 0
+
+    async def submit(self, params):
+        params = dict(params)
+        params.setdefault('clientOid', uuid.uuid4().hex)
+        key = tuple(params.get(k) for k in BATCH_KEYS)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self.__pending.get(key)
+        if pending is None:
+            pending = self.__pending[key] = ([], loop.call_later(self.window, self.__flush, key))
+        group = pending[0]
+        group.append((params, future))
+        if len(group) >= self.max_batch:
+            pending[1].cancel()
+            self.__flush(key)
+        return await future
+
+    def __flush(self, key):
+        group, _ = self.__pending.pop(key)
+        task = asyncio.ensure_future(self.__send(key, group))
+        self.__sending.add(task)
+        task.add_done_callback(self.__sending.discard)
+
+    async def __send(self, key, group):
+        self.orders += len(group)
+        self.batches += 1
+        if len(group) == 1:
+            await self.__place_one(*group[0])
+            return
+        body = dict(zip(BATCH_KEYS, key))
+        body['orderList'] = [{k: v for k, v in params.items() if k not in BATCH_KEYS} for params, _ in group]
+        try:
+            response = await self.order_api.batchPlaceOrder(body)
+        except Exception as e:
+            if retry.is_transient(e) or retry.is_duplicate(e):
+                await asyncio.gather(*(self.__place_one(params, future) for params, future in group))
+                return
+            for _, future in group:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        unsettled = self.__resolve(group, response)
+        if unsettled:
+            await asyncio.gather(*(self.__place_one(params, future) for params, future in unsettled))
+
+    async def __place_one(self, params, future):
+        try:
+            response = await retry.place_order_idempotent_async(self.order_api, params, self.policy)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(response)
+
+    @staticmethod
+    def __resolve(group, response):
+        # returns the orders rejected as duplicates: they may already be on the exchange
+        data = response.get('data') or {}
+        succeeded = {o.get('clientOid'): o for o in data.get('successList') or []}
+        failed = {o.get('clientOid'): o for o in data.get('failureList') or []}
+        unsettled = []
+        for params, future in group:
+            if future.done():
+                continue
+            client_oid = params['clientOid']
+            if client_oid in succeeded:
+                future.set_result({'code': response.get('code'), 'msg': response.get('msg'),
+                                   'requestTime': response.get('requestTime'), 'data': succeeded[client_oid]})
+            elif client_oid in failed:
+                failure = failed[client_oid]
+                if 'duplicate' in str(failure.get('errorMsg')).lower():
+                    unsettled.append((params, future))
+                    continue
+                future.set_exception(BitgetRequestException(
+                    'order %s rejected (code=%s): %s' % (client_oid, failure.get('errorCode'), failure.get('errorMsg'))))
+            else:
+                future.set_exception(BitgetRequestException(
+                    'order %s missing from batch response: %s' % (client_oid, response)))
+        return unsettled
+
+    def stats(self):
+        return {'orders': self.orders, 'requests': self.batches, 'window_ms': self.window * 1000}
@@ -0,0 +1,8 @@
+#!/usr/bin/python
+from bitget.aio.client import AsyncClient
+from bitget.v2.mix import market_api
+
+
+class MarketApi(AsyncClient, market_api.MarketApi):
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, transport=None):
+        AsyncClient.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, transport)
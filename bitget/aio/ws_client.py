@@ -0,0 +1,360 @@
+#!/usr/bin/python
+import asyncio
+import inspect
+import logging
+import random
+import time
+
+import websockets
+
+from .. import consts as c, utils
+from ..consts import GET
+from ..exceptions import BitgetRequestException
+from ..rate_limit import TokenBucket
+from ..signer import Signer
+from ..ws.bitget_ws_client import (WS_DISPATCH, WS_OP_LOGIN, WS_OP_SUBSCRIBE, WS_OP_UNSUBSCRIBE, SubscribeReq,
+                                   WsLoginReq, _loads, batch_frames, handel_error, handle, route_key)
+from ..ws.order_book import OrderBook
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWsClient:
+    """asyncio flavour of ``BitgetWsClient`` with the same builder API.
+
+    One supervisor task owns the connection: it connects, logs in and
+    resubscribes, then reads until the socket drops and starts over with
+    jittered backoff. ``build`` returns as soon as the handshake (and login)
+    round trips complete instead of polling once a second; ``subscribe`` and
+    ``unsubscribe`` resolve when the exchange acknowledges every channel. A
+    single task sends the text ``ping`` heartbeat.
+
+    Listeners receive the parsed dict; one returning an awaitable is awaited
+    before the next message is read, so per-connection ordering holds.
+    """
+
+    def __init__(self, url, need_login=False, timeout=10, heartbeat=25):
+        utils.check_none(url, "url")
+        self.__url = url
+        self.__need_login = need_login
+        self.__timeout = timeout
+        self.__heartbeat = heartbeat
+        self.__api_key = None
+        self.__api_secret_key = None
+        self.__passphrase = None
+        self.__signer = None
+        self.__server_clock = None
+        self.__listener = handle
+        self.__error_listener = handel_error
+        self.__reconnect_listener = None
+        self.__all_suribe = set()
+        self.__scribe_map = {}
+        self.__allbooks_map = {}
+        self.__acks = {}
+        self.__login_future = None
+        self.__ws = None
+        self.__connection = False
+        self.__closing = False
+        self.__ready = None
+        self.__tasks = []
+        # the loop keeps only weak references to tasks; resubscribes must live until they finish
+        self.__background = set()
+        self.__last_message = 0.0
+        self.__last_error = None
+        self.__send_bucket = TokenBucket(c.WS_MESSAGES_PER_SECOND)
+        self.connects = 0
+
+    def api_key(self, api_key):
+        self.__api_key = api_key
+        return self
+
+    def api_secret_key(self, api_secret_key):
+        self.__api_secret_key = api_secret_key
+        self.__signer = None
+        return self
+
+    def passphrase(self, passphrase):
+        self.__passphrase = passphrase
+        return self
+
+    def listener(self, listener):
+        self.__listener = listener
+        return self
+
+    def error_listener(self, error_listener):
+        self.__error_listener = error_listener
+        return self
+
+    def server_clock(self, server_clock):
+        self.__server_clock = server_clock
+        return self
+
+    def reconnect_listener(self, reconnect_listener):
+        # called (and awaited if it returns an awaitable) once a reconnect has re-logged in and re-subscribed
+        self.__reconnect_listener = reconnect_listener
+        return self
+
+    def has_connect(self):
+        return self.__connection
+
+    def channels(self):
+        return set(self.__all_suribe)
+
+    async def build(self):
+        self.__closing = False
+        self.__ready = asyncio.Event()
+        self.__tasks = [asyncio.create_task(self.__run()), asyncio.create_task(self.__keep_connected())]
+        try:
+            await asyncio.wait_for(self.__ready.wait(), self.__timeout)
+        except asyncio.TimeoutError:
+            await self.close()
+            raise BitgetRequestException('websocket %s not ready: %r' % (self.__url, self.__last_error))
+        return self
+
+    async def close(self):
+        self.__closing = True
+        tasks = [task for task in self.__tasks if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.__tasks = []
+        if self.__ws is not None:
+            await self.__ws.close()
+        self.__connection = False
+
+    async def __run(self):
+        attempt = 0
+        while not self.__closing:
+            connects = self.connects
+            try:
+                await self.__session()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.__last_error = e
+                logger.warning("websocket session failed: %r", e)
+            if self.__closing:
+                break
+            if self.connects > connects:
+                # the session got as far as connected: this drop is not a failed attempt
+                attempt = 0
+            # a dropped session is retried at once; failed attempts back off with full jitter up to 30s
+            delay = random.uniform(0, min(30.0, 0.1 * (2 ** attempt))) if attempt else 0.0
+            attempt += 1
+            logger.info("reconnecting in %.2fs ...", delay)
+            await asyncio.sleep(delay)
+
+    async def __session(self):
+        ws = await websockets.connect(self.__url, ping_interval=None, open_timeout=self.__timeout, max_queue=None)
+        self.__ws = ws
+        # the message rate is limited per connection: a fresh socket starts with a full bucket
+        self.__send_bucket = TokenBucket(c.WS_MESSAGES_PER_SECOND)
+        self.__last_message = time.monotonic()
+        reader = asyncio.create_task(self.__read(ws))
+        try:
+            if self.__need_login:
+                await self.__login()
+            if self.__all_suribe:
+                # one frame for every channel instead of one round trip each
+                await self.__request(WS_OP_SUBSCRIBE, list(self.__all_suribe))
+            self.__connection = True
+            self.connects += 1
+            logger.info('connection is success....')
+            if self.connects > 1 and self.__reconnect_listener:
+                result = self.__reconnect_listener()
+                if inspect.isawaitable(result):
+                    await result
+            self.__ready.set()
+            await reader
+        finally:
+            self.__connection = False
+            reader.cancel()
+            self.__fail_pending(BitgetRequestException('websocket %s disconnected' % self.__url))
+            await ws.close()
+
+    async def __read(self, ws):
+        try:
+            async for message in ws:
+                self.__last_message = time.monotonic()
+                result = self.__on_message(message)
+                if result is not None:
+                    await result
+        except websockets.ConnectionClosed as e:
+            logger.warning("ws is closeing ......close_status:%s,close_msg:%s", e.code, e.reason)
+
+    async def __keep_connected(self):
+        interval = self.__heartbeat
+        while not self.__closing:
+            await asyncio.sleep(interval)
+            ws = self.__ws
+            if ws is None or not self.__connection:
+                continue
+            if time.monotonic() - self.__last_message > 2 * interval:
+                # no pong (or anything) for two intervals: drop it and let the supervisor reconnect
+                logger.warning("no message for %.0fs, reconnecting", time.monotonic() - self.__last_message)
+                await ws.close()
+                continue
+            try:
+                await ws.send("ping")
+            except websockets.ConnectionClosed:
+                pass
+
+    async def __login(self):
+        utils.check_none(self.__api_key, "api key")
+        utils.check_none(self.__api_secret_key, "api secret key")
+        utils.check_none(self.__passphrase, "passphrase")
+        timestamp = int(round(self.__server_clock.now() if self.__server_clock else time.time()))
+        if self.__signer is None:
+            self.__signer = Signer(self.__api_secret_key)
+        sign = self.__signer.sign(timestamp, GET, c.REQUEST_PATH)
+        self.__login_future = asyncio.get_running_loop().create_future()
+        await self.send_message(WS_OP_LOGIN, [WsLoginReq(self.__api_key, self.__passphrase, str(timestamp), sign)])
+        logger.info("logging in......")
+        try:
+            await asyncio.wait_for(self.__login_future, self.__timeout)
+        finally:
+            self.__login_future = None
+
+    async def send_message(self, op, args):
+        for message in batch_frames(op, args):
+            await self.__send_bucket.acquire_async()
+            logger.debug("send message: %s", message)
+            await self.__ws.send(message)
+
+    async def subscribe(self, channels, listener=None):
+        """Subscribe and wait for the acknowledgement of every channel.
+
+        While disconnected the channels are only recorded; the next
+        (re)connect subscribes them.
+        """
+        for chanel in channels:
+            chanel.inst_type = str(chanel.inst_type)
+            if listener:
+                self.__scribe_map[chanel.route_key()] = listener
+            self.__all_suribe.add(chanel)
+        if not self.__connection:
+            return []
+        return await self.__request(WS_OP_SUBSCRIBE, channels)
+
+    async def unsubscribe(self, channels):
+        for chanel in channels:
+            self.__scribe_map.pop(chanel.route_key(), None)
+            self.__all_suribe.discard(chanel)
+            self.__allbooks_map.pop(chanel.route_key(), None)
+        if not self.__connection:
+            return []
+        return await self.__request(WS_OP_UNSUBSCRIBE, channels)
+
+    async def __request(self, op, channels):
+        loop = asyncio.get_running_loop()
+        keys = [(op, chanel.route_key()) for chanel in channels]
+        futures = [self.__acks.get(key) or self.__acks.setdefault(key, loop.create_future()) for key in keys]
+        try:
+            await self.send_message(op, channels)
+            return await asyncio.wait_for(asyncio.gather(*futures), self.__timeout)
+        finally:
+            for key in keys:
+                future = self.__acks.get(key)
+                if future is not None and future.done():
+                    del self.__acks[key]
+
+    def __fail_pending(self, exc):
+        for future in list(self.__acks.values()):
+            if not future.done():
+                future.set_exception(exc)
+        self.__acks.clear()
+        if self.__login_future is not None and not self.__login_future.done():
+            self.__login_future.set_exception(exc)
+
+    def __resolve(self, json_obj):
+        # returns True when the message was an op acknowledgement or op error
+        event = json_obj.get("event")
+        arg = json_obj.get("arg")
+        if event == "login":
+            if self.__login_future is not None and not self.__login_future.done():
+                self.__login_future.set_result(json_obj)
+            return True
+        if event in (WS_OP_SUBSCRIBE, WS_OP_UNSUBSCRIBE) and arg:
+            future = self.__acks.get((event, route_key(arg)))
+            if future is not None and not future.done():
+                future.set_result(json_obj)
+            return True
+        if event == "error":
+            error = BitgetRequestException('websocket error %s: %s' % (json_obj.get("code"), json_obj.get("msg")))
+            if arg:
+                for op in (WS_OP_SUBSCRIBE, WS_OP_UNSUBSCRIBE):
+                    future = self.__acks.get((op, route_key(arg)))
+                    if future is not None and not future.done():
+                        future.set_exception(error)
+            elif self.__login_future is not None and not self.__login_future.done():
+                self.__login_future.set_exception(error)
+        return False
+
+    def __on_message(self, message):
+        if message == 'pong':
+            return None
+        started = time.perf_counter()
+        channel = 'event'
+        outcome = 'error'
+        try:
+            json_obj = _loads(message)
+            if "event" in json_obj and self.__resolve(json_obj):
+                outcome = 'ok'
+                return None
+            if "code" in json_obj and json_obj.get("code") != 0:
+                if self.__error_listener:
+                    self.__error_listener(json_obj)
+                outcome = 'exchange_error'
+                return None
+
+            listenner = None
+            arg = json_obj.get("arg")
+            if arg and "data" in json_obj:
+                key = route_key(arg)
+                channel = key[1]
+                if key[1] == "books" and not self.__check_sum(json_obj, key):
+                    outcome = 'resync'
+                    return None
+                listenner = self.__scribe_map.get(key)
+
+            result = (listenner or self.__listener)(json_obj)
+            outcome = 'ok'
+            return result if inspect.isawaitable(result) else None
+        finally:
+            WS_DISPATCH.observe(time.perf_counter() - started, channel, outcome)
+
+    def __check_sum(self, json_obj, key):
+        # noinspection PyBroadException
+        try:
+            action = json_obj.get('action')
+            books_info = json_obj.get('data')[0]
+            if action == "snapshot":
+                book = OrderBook()
+                book.snapshot(books_info['asks'], books_info['bids'], books_info.get('ts'))
+                self.__allbooks_map[key] = book
+                return True
+            if action == "update":
+                book = self.__allbooks_map.get(key)
+                if book is None:
+                    return False
+                book.update(books_info['asks'], books_info['bids'], books_info.get('ts'))
+                if not book.verify(books_info['checksum']):
+                    del self.__allbooks_map[key]
+                    task = asyncio.ensure_future(self.__resubscribe(SubscribeReq(*key)))
+                    self.__background.add(task)
+                    task.add_done_callback(self.__background.discard)
+                    return False
+        except Exception:
+            logger.exception("books checksum failed")
+        return True
+
+    async def __resubscribe(self, subscribe_req):
+        # a fresh subscription makes the exchange push a new snapshot
+        try:
+            await self.__request(WS_OP_UNSUBSCRIBE, [subscribe_req])
+            await self.__request(WS_OP_SUBSCRIBE, [subscribe_req])
+        except Exception as e:
+            logger.warning("books resubscribe failed: %r", e)
+
+    def get_book(self, subscribe_req):
+        return self.__allbooks_map.get(subscribe_req.route_key())
@@ -0,0 +1,214 @@
+#!/usr/bin/python
+import asyncio
+import inspect
+import logging
+
+from .. import consts as c, utils
+from ..ws.bitget_ws_client import handel_error, handle, shard_sizes
+from .ws_client import AsyncWsClient
+
+logger = logging.getLogger(__name__)
+
+
+class WsManager:
+    """Shards subscriptions over several ``AsyncWsClient`` connections.
+
+    Shards are sized like ``shard_sizes`` (the split the sync TickerTable and
+    BarEngine use): as few connections as ``max_channels`` allows, and a new
+    channel goes to the least loaded shard under the even share. Each shard
+    sends its subscribe/unsubscribe args in as few frames as the frame size
+    and message-rate limits allow. When a shard reconnects the manager
+    rebalances: shards above an even spread hand channels to the others
+    (subscribed on the new shard before being dropped from the old one), and
+    shards no longer needed are drained and closed.
+    """
+
+    def __init__(self, url, need_login=False, max_channels=c.WS_MAX_CHANNELS, timeout=10):
+        utils.check_none(url, "url")
+        self.__url = url
+        self.__need_login = need_login
+        self.__max_channels = max_channels
+        self.__timeout = timeout
+        self.__api_key = None
+        self.__api_secret_key = None
+        self.__passphrase = None
+        self.__server_clock = None
+        self.__listener = handle
+        self.__error_listener = handel_error
+        self.__reconnect_listener = None
+        self.__shards = []
+        self.__owner = {}
+        self.__channels = {}
+        self.__listeners = {}
+        self.__lock = asyncio.Lock()
+        self.__background = set()
+        self.moves = 0
+
+    def api_key(self, api_key):
+        self.__api_key = api_key
+        return self
+
+    def api_secret_key(self, api_secret_key):
+        self.__api_secret_key = api_secret_key
+        return self
+
+    def passphrase(self, passphrase):
+        self.__passphrase = passphrase
+        return self
+
+    def listener(self, listener):
+        self.__listener = listener
+        return self
+
+    def error_listener(self, error_listener):
+        self.__error_listener = error_listener
+        return self
+
+    def server_clock(self, server_clock):
+        self.__server_clock = server_clock
+        return self
+
+    def reconnect_listener(self, reconnect_listener):
+        # called after any shard has reconnected, resubscribed and been rebalanced
+        self.__reconnect_listener = reconnect_listener
+        return self
+
+    async def __new_shard(self):
+        shard = AsyncWsClient(self.__url, self.__need_login, self.__timeout) \
+            .api_key(self.__api_key).api_secret_key(self.__api_secret_key).passphrase(self.__passphrase) \
+            .listener(self.__listener).error_listener(self.__error_listener).server_clock(self.__server_clock)
+        shard.reconnect_listener(self.__on_reconnect)
+        await shard.build()
+        self.__shards.append(shard)
+        return shard
+
+    def __loads(self):
+        loads = {shard: 0 for shard in self.__shards}
+        for shard in self.__owner.values():
+            loads[shard] += 1
+        return loads
+
+    async def subscribe(self, channels, listener=None):
+        async with self.__lock:
+            loads = self.__loads()
+            new = set()
+            for chanel in channels:
+                chanel.inst_type = str(chanel.inst_type)
+                if chanel.route_key() not in self.__owner:
+                    new.add(chanel.route_key())
+            sizes = shard_sizes(len(self.__owner) + len(new), self.__max_channels)
+            while len(self.__shards) < len(sizes):
+                loads[await self.__new_shard()] = 0
+            share = sizes[0] if sizes else self.__max_channels
+            plan = {}
+            for chanel in channels:
+                key = chanel.route_key()
+                if listener:
+                    self.__listeners[key] = listener
+                shard = self.__owner.get(key)
+                if shard is None:
+                    # shards filled before this call may be above the even share; rebalance evens them out
+                    room = [s for s in self.__shards if loads[s] < share] or \
+                           [s for s in self.__shards if loads[s] < self.__max_channels]
+                    shard = min(room, key=loads.get) if room else await self.__new_shard()
+                    loads[shard] = loads.get(shard, 0) + 1
+                    self.__owner[key] = shard
+                    self.__channels[key] = chanel
+                plan.setdefault(shard, []).append(chanel)
+        acks = await asyncio.gather(*(shard.subscribe(group, listener) for shard, group in plan.items()))
+        return [ack for group in acks for ack in group]
+
+    async def unsubscribe(self, channels):
+        async with self.__lock:
+            plan = {}
+            for chanel in channels:
+                key = chanel.route_key()
+                shard = self.__owner.pop(key, None)
+                self.__channels.pop(key, None)
+                self.__listeners.pop(key, None)
+                if shard is not None:
+                    plan.setdefault(shard, []).append(chanel)
+            acks = await asyncio.gather(*(shard.unsubscribe(group) for shard, group in plan.items()))
+            await self.__close_empty()
+        return [ack for group in acks for ack in group]
+
+    async def __close_empty(self):
+        loads = self.__loads()
+        for shard in [s for s in self.__shards if loads[s] == 0]:
+            self.__shards.remove(shard)
+            await shard.close()
+
+    def __on_reconnect(self):
+        # runs outside the shard's own session task: rebalancing may close that very shard
+        task = asyncio.ensure_future(self.__after_reconnect())
+        self.__background.add(task)
+        task.add_done_callback(self.__background.discard)
+
+    async def __after_reconnect(self):
+        try:
+            await self.rebalance()
+        except Exception as e:
+            logger.warning("rebalance after reconnect failed: %r", e)
+        if self.__reconnect_listener:
+            result = self.__reconnect_listener()
+            if inspect.isawaitable(result):
+                await result
+
+    async def rebalance(self):
+        """Even out channels across as few shards as the cap allows; returns the number moved."""
+        async with self.__lock:
+            total = len(self.__owner)
+            if not total or not self.__shards:
+                return 0
+            sizes = shard_sizes(total, self.__max_channels)
+            loads = self.__loads()
+            ordered = sorted(self.__shards, key=loads.get, reverse=True)
+            keep, drain = ordered[:len(sizes)], ordered[len(sizes):]
+            while len(keep) < len(sizes):
+                keep.append(await self.__new_shard())
+                loads[keep[-1]] = 0
+            # the fullest shards get the larger shares, so as few channels as possible move
+            target = dict(zip(keep, sizes))
+
+            surplus = {shard: loads[shard] for shard in drain}
+            surplus.update({shard: loads[shard] - target[shard] for shard in keep if loads[shard] > target[shard]})
+            moves = []
+            for key, shard in list(self.__owner.items()):
+                if surplus.get(shard, 0) > 0:
+                    surplus[shard] -= 1
+                    moves.append((key, shard))
+            if not moves:
+                return 0
+
+            subscribe, unsubscribe = {}, {}
+            for key, source in moves:
+                dest = min((s for s in keep if loads[s] < target[s]), key=loads.get)
+                loads[dest] += 1
+                loads[source] -= 1
+                self.__owner[key] = dest
+                subscribe.setdefault((dest, self.__listeners.get(key)), []).append(self.__channels[key])
+                unsubscribe.setdefault(source, []).append(self.__channels[key])
+            # make before break: the new shard is subscribed before the old one lets go
+            await asyncio.gather(*(dest.subscribe(group, listener) for (dest, listener), group in subscribe.items()))
+            await asyncio.gather(*(source.unsubscribe(group) for source, group in unsubscribe.items()))
+            await self.__close_empty()
+            self.moves += len(moves)
+            logger.info("rebalanced %d channels over %d shards", len(moves), len(self.__shards))
+            return len(moves)
+
+    def get_book(self, subscribe_req):
+        shard = self.__owner.get(subscribe_req.route_key())
+        return shard.get_book(subscribe_req) if shard else None
+
+    def stats(self):
+        loads = self.__loads()
+        return {
+            'shards': [{'channels': loads[s], 'connected': s.has_connect(), 'connects': s.connects}
+                       for s in self.__shards],
+            'channels': len(self.__owner),
+            'moves': self.moves,
+        }
+
+    async def close(self):
+        shards, self.__shards = self.__shards, []
+        await asyncio.gather(*(shard.close() for shard in shards))
@@ -4,8 +4,8 @@ from bitget.consts import GET, POST
 
 
 class BitgetApi(Client):
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
-        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first)
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, transport=None):
+        Client.__init__(self, api_key, api_secret_key, passphrase, use_server_time, first, transport)
 
     def post(self, request_path, params):
         return self._request_with_params(POST, request_path, params)
@@ -0,0 +1,257 @@
+#!/usr/bin/python
+import asyncio
+import json
+import logging
+import os
+import time
+
+import numpy as np
+
+from .exceptions import BitgetParamsException
+
+logger = logging.getLogger(__name__)
+
+# Bitget candle granularity -> bar length in milliseconds
+GRANULARITY_MS = {'1m': 60000, '3m': 180000, '5m': 300000, '15m': 900000, '30m': 1800000, '1H': 3600000,
+                  '4H': 14400000, '6H': 21600000, '12H': 43200000, '1D': 86400000, '3D': 259200000,
+                  '1W': 604800000}
+# one file per column, in the order Bitget returns candle fields
+COLUMNS = (('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+           ('volume', '<f8'), ('quote_volume', '<f8'))
+# history-candles page size
+PAGE_LIMIT = 200
+
+
+def merge_ranges(ranges):
+    """Sort half-open ``[start, end)`` ranges and join the ones that overlap or touch."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def missing_ranges(start, end, covered):
+    """Parts of ``[start, end)`` not inside any of the (merged) ``covered`` ranges."""
+    missing = []
+    for c_start, c_end in covered:
+        if c_end <= start:
+            continue
+        if c_start >= end:
+            break
+        if c_start > start:
+            missing.append([start, c_start])
+        start = max(start, c_end)
+    if start < end:
+        missing.append([start, end])
+    return missing
+
+
+class Candles:
+    """Read-only, memory-mapped columns of one symbol and granularity.
+
+    Nothing is read until it is touched: ``window`` binary-searches the time
+    column and returns views, so years of 1-minute bars cost page cache, not
+    heap. A later write to the store does not change an open ``Candles``.
+    """
+
+    def __init__(self, path, generation, rows):
+        self.path = path
+        self.rows = rows
+        self.__columns = {}
+        for name, dtype in COLUMNS:
+            if rows:
+                column = np.memmap(os.path.join(path, '%s.%d.bin' % (name, generation)), dtype=dtype, mode='r',
+                                   shape=(rows,))
+            else:
+                column = np.zeros(0, dtype=dtype)
+            self.__columns[name] = column
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.__columns[name]
+
+    def window(self, start=None, end=None):
+        """Column views for open times in ``[start, end)`` (epoch ms; None = unbounded)."""
+        times = self.__columns['time']
+        i = 0 if start is None else int(np.searchsorted(times, start, 'left'))
+        j = self.rows if end is None else int(np.searchsorted(times, end, 'left'))
+        return {name: column[i:j] for name, column in self.__columns.items()}
+
+
+class CandleStore:
+    """Columnar candle files under ``root/<symbol>/<granularity>/``.
+
+    Each column is a raw little-endian array (``close.<generation>.bin``) so
+    it can be memory-mapped as is; ``meta.json`` holds the generation, the
+    committed row count and the time ranges already fetched (empty ones
+    included, so gaps the exchange has no data for are not asked for again).
+    Newer candles are appended in place and only become visible when the
+    meta file is replaced; bytes past the committed count (an interrupted
+    write) are truncated on the next append. Backfilling older history
+    rewrites the columns as a new generation.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, symbol, granularity):
+        if granularity not in GRANULARITY_MS:
+            raise BitgetParamsException('unknown granularity %r' % granularity)
+        return os.path.join(self.root, symbol, granularity)
+
+    def meta(self, symbol, granularity):
+        try:
+            with open(os.path.join(self.path(symbol, granularity), 'meta.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {'generation': 0, 'rows': 0, 'covered': []}
+
+    def covered(self, symbol, granularity):
+        return self.meta(symbol, granularity)['covered']
+
+    def open(self, symbol, granularity):
+        meta = self.meta(symbol, granularity)
+        return Candles(self.path(symbol, granularity), meta['generation'], meta['rows'])
+
+    def write(self, symbol, granularity, rows, ranges):
+        """Store ``rows`` (an ``(n, 7)`` array in COLUMNS order) and mark ``ranges`` as fetched."""
+        path = self.path(symbol, granularity)
+        os.makedirs(path, exist_ok=True)
+        meta = self.meta(symbol, granularity)
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(COLUMNS))
+        if len(rows):
+            # sorted, one row per open time
+            rows = rows[np.argsort(rows[:, 0], kind='stable')]
+            rows = rows[np.r_[rows[1:, 0] != rows[:-1, 0], True]]
+        existing = self.open(symbol, granularity)
+        last = existing['time'][-1] if len(existing) else None
+        if last is None or not len(rows) or rows[0, 0] > last:
+            self.__append(path, meta, rows)
+        else:
+            self.__rewrite(path, meta, existing, rows)
+        meta['covered'] = merge_ranges(meta['covered'] + [list(r) for r in ranges])
+        self.__commit(path, meta)
+        return len(rows)
+
+    @staticmethod
+    def __append(path, meta, rows):
+        generation = meta['generation']
+        for i, (name, dtype) in enumerate(COLUMNS):
+            with open(os.path.join(path, '%s.%d.bin' % (name, generation)), 'ab') as f:
+                f.truncate(meta['rows'] * np.dtype(dtype).itemsize)
+                rows[:, i].astype(dtype).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+        meta['rows'] += len(rows)
+
+    @staticmethod
+    def __rewrite(path, meta, existing, rows):
+        times = np.concatenate([np.asarray(existing['time']), rows[:, 0].astype('<i8')])
+        # new rows win over stored ones with the same open time
+        order = np.argsort(times, kind='stable')[::-1]
+        keep = order[np.unique(times[order], return_index=True)[1]]
+        generation = meta['generation'] + 1
+        for i, (name, dtype) in enumerate(COLUMNS):
+            column = np.concatenate([np.asarray(existing[name]), rows[:, i].astype(dtype)])[keep]
+            with open(os.path.join(path, '%s.%d.bin' % (name, generation)), 'wb') as f:
+                column.tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+        meta['previous'] = meta['generation']
+        meta['generation'] = generation
+        meta['rows'] = len(keep)
+
+    @staticmethod
+    def __commit(path, meta):
+        previous = meta.pop('previous', None)
+        tmp = os.path.join(path, 'meta.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(path, 'meta.json'))
+        if previous is not None:
+            # readers that mapped the old generation keep their inode until they close it
+            for name, _ in COLUMNS:
+                try:
+                    os.remove(os.path.join(path, '%s.%d.bin' % (name, previous)))
+                except FileNotFoundError:
+                    pass
+
+
+class CandleDownloader:
+    """Fills a ``CandleStore`` from ``history-candles`` with concurrent requests.
+
+    The range to fetch, minus what the store already covers, is cut into
+    ``PAGE_LIMIT``-bar windows from the newest backwards; up to
+    ``concurrency`` of them are in flight at once and the client's rate
+    limiter (the ``market`` group) paces them. Each missing range is written
+    when its pages are in; a window that failed is left uncovered and is
+    fetched again on the next run.
+    """
+
+    def __init__(self, market_api, store, product_type='USDT-FUTURES', concurrency=8):
+        # market_api: an asyncio v2 mix MarketApi
+        self.__api = market_api
+        self.store = store
+        self.product_type = product_type
+        self.__semaphore = asyncio.Semaphore(concurrency)
+        self.pages = 0
+        self.failed = 0
+
+    async def download(self, symbol, granularity, start, end=None):
+        """Fetch the missing candles with open time in ``[start, end)`` (epoch ms, default now); returns rows added."""
+        step = GRANULARITY_MS.get(granularity)
+        if step is None:
+            raise BitgetParamsException('unknown granularity %r' % granularity)
+        start -= start % step
+        end = int(time.time() * 1000) if end is None else end
+        # the candle still open is left out: it would be stored half built
+        end -= end % step
+        missing = missing_ranges(start, end, self.store.covered(symbol, granularity))
+        added = 0
+        for m_start, m_end in reversed(missing):
+            windows = []
+            w_end = m_end
+            while w_end > m_start:
+                w_start = max(m_start, w_end - PAGE_LIMIT * step)
+                windows.append((w_start, w_end))
+                w_end = w_start
+            pages = await asyncio.gather(*(self.__page(symbol, granularity, w) for w in windows))
+            done = [w for w, page in zip(windows, pages) if page is not None]
+            rows = [page for page in pages if page is not None and len(page)]
+            added += self.store.write(symbol, granularity, np.concatenate(rows) if rows else [], done)
+            logger.info("%s %s: %d windows, %d rows, %d failed", symbol, granularity, len(windows),
+                        sum(len(r) for r in rows), len(windows) - len(done))
+        return added
+
+    async def download_many(self, symbols, granularity, start, end=None):
+        added = await asyncio.gather(*(self.download(symbol, granularity, start, end) for symbol in symbols))
+        return dict(zip(symbols, added))
+
+    async def __page(self, symbol, granularity, window):
+        w_start, w_end = window
+        params = {'symbol': symbol, 'productType': self.product_type, 'granularity': granularity,
+                  'startTime': str(w_start), 'endTime': str(w_end - 1), 'limit': str(PAGE_LIMIT)}
+        async with self.__semaphore:
+            try:
+                response = await self.__api.historyCandles(params)
+            except Exception as e:
+                logger.warning("history-candles %s %s %s failed: %s", symbol, granularity, window, e)
+                self.failed += 1
+                return None
+        self.pages += 1
+        if response.get('code') != '00000':
+            logger.warning("history-candles %s %s %s failed: %s", symbol, granularity, window, response)
+            self.failed += 1
+            return None
+        data = response.get('data') or []
+        if not data:
+            return np.zeros((0, len(COLUMNS)))
+        page = np.array([row[:len(COLUMNS)] for row in data], dtype=np.float64)
+        return page[(page[:, 0] >= w_start) & (page[:, 0] < w_end)]
@@ -1,24 +1,50 @@
-import requests
 import json
-from . import consts as c, utils, exceptions
+import logging
+import time
+from . import clock, consts as c, utils, exceptions, metrics, rate_limit, retry, transport as t
+from .log import SAMPLED
+from .signer import Signer
+
+logger = logging.getLogger(__name__)
+
+REQUESTS = metrics.counter('bitget_requests_total', 'REST requests sent, by endpoint and outcome',
+                           ('endpoint', 'outcome'))
 
 
 class Client(object):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False):
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, first=False, transport=None,
+                 rate_limiter=None, retry_policy=retry.DEFAULT_POLICY):
 
         self.API_KEY = api_key
         self.API_SECRET_KEY = api_secret_key
         self.PASSPHRASE = passphrase
         self.use_server_time = use_server_time
         self.first = first
+        # pooled keep-alive connections, shared process-wide unless one is given
+        self.transport = transport or t.default_transport()
+        # client-side limits shared by every client in the process unless one is given
+        self.rate_limiter = rate_limiter or rate_limit.default_limiter()
+        # only safe (GET) requests are retried automatically; orders go through retry.place_order_idempotent
+        self.retry_policy = retry_policy
+        self.__signer = None
+
+    @property
+    def signer(self):
+        # built on first use so clients without credentials can still be constructed
+        if self.__signer is None:
+            self.__signer = Signer(self.API_SECRET_KEY)
+        return self.__signer
 
     def _request(self, method, request_path, params, cursor=False):
-        if method == c.GET:
-            request_path = request_path + utils.parse_params_to_str(params)
-        # url
-        url = c.API_URL + request_path
-
+        if method == c.GET and self.retry_policy:
+            return retry.call(lambda: self._send(method, request_path, params, cursor), self.retry_policy)
+        return self._send(method, request_path, params, cursor)
+
+    def _send(self, method, request_path, params, cursor=False):
+        # wait for a token before stamping, so queued requests are not signed stale
+        waited = self.rate_limiter.acquire(method, request_path)
+        started = time.perf_counter()
         # 获取本地时间
         timestamp = utils.get_timestamp()
 
@@ -27,36 +53,59 @@ class Client(object):
             # 获取服务器时间接口
             timestamp = self._get_timestamp()
 
+        url, body, header = self._prepare_request(method, request_path, params, timestamp)
+        prepared = time.perf_counter()
+
+        # send request
+        try:
+            response = self.transport.request(method, url, body, header)
+        except exceptions.BitgetNetworkException:
+            REQUESTS.inc(request_path, 'network_error')
+            raise
+        return self._finish(method, request_path, response, cursor, waited, started, prepared)
+
+    def _finish(self, method, request_path, response, cursor, waited, started, prepared):
+        received = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = self._parse_response(method, response, cursor)
+            outcome = 'ok'
+            return result
+        except exceptions.BitgetAPIException as e:
+            outcome = 'http_%s' % e.status_code
+            raise
+        finally:
+            stages = t.REQUEST_STAGES
+            stages.observe(waited, request_path, 'rate_limit')
+            stages.observe(prepared - started, request_path, 'prepare')
+            stages.observe(received - prepared, request_path, 'roundtrip')
+            stages.observe(time.perf_counter() - received, request_path, 'parse')
+            REQUESTS.inc(request_path, outcome)
+
+    def _prepare_request(self, method, request_path, params, timestamp):
+        if method == c.GET:
+            request_path = request_path + utils.parse_params_to_str(params)
+        # url
+        url = c.API_URL + request_path
+
         body = json.dumps(params) if method == c.POST else ""
-        sign = utils.sign(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
-        if c.SIGN_TYPE == c.RSA:
-            sign = utils.signByRSA(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
-        header = utils.get_header(self.API_KEY, sign, timestamp, self.PASSPHRASE)
+        if self.API_SECRET_KEY is None:
+            # public market data needs no credentials
+            header = {c.CONTENT_TYPE: c.APPLICATION_JSON, c.LOCALE: 'zh-CN'}
+        else:
+            sign = self.signer.sign(timestamp, method, request_path, body)
+            header = utils.get_header(self.API_KEY, sign, timestamp, self.PASSPHRASE)
 
         if self.first:
-            print("url:", url)
-            print("method:", method)
-            print("body:", body)
-            print("headers:", header)
-            # print("sign:", sign)
+            # credentials stay out of the log: only the header names are shown
+            logger.info("first request %s %s body=%s headers=%s", method, url, body, sorted(header))
             self.first = False
 
+        return url, body, header
 
-
-
-        # send request
-        response = None
-        if method == c.GET:
-            response = requests.get(url, headers=header)
-            print("response : ",response.text)
-        elif method == c.POST:
-            response = requests.post(url, data=body, headers=header)
-            print("response : ",response.text)
-            #response = requests.post(url, json=body, headers=header)
-        elif method == c.DELETE:
-            response = requests.delete(url, headers=header)
-
-        print("status:", response.status_code)
+    def _parse_response(self, method, response, cursor=False):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s %s -> %s %s", method, response.url, response.status_code, response.text, extra=SAMPLED)
         # exception handle
         if not str(response.status_code).startswith('2'):
             raise exceptions.BitgetAPIException(response)
@@ -83,9 +132,5 @@ class Client(object):
         return self._request(method, request_path, params, cursor)
 
     def _get_timestamp(self):
-        url = c.API_URL + c.SERVER_TIMESTAMP_URL
-        response = requests.get(url)
-        if response.status_code == 200:
-            return response.json()['timestamp']
-        else:
-            return ""
+        # server time from the background clock estimate, no extra round trip
+        return clock.default_clock().now_ms()
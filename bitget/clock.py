@@ -0,0 +1,124 @@
+#!/usr/bin/python
+import logging
+import threading
+import time
+from collections import deque
+
+from . import consts as c, transport as t
+from .exceptions import BitgetRequestException
+
+logger = logging.getLogger(__name__)
+
+
+class ServerClock:
+    """Local estimate of Bitget server time, NTP style.
+
+    Each sample brackets a ``/api/v2/public/time`` call with local timestamps:
+    ``offset = server - (sent + received) / 2`` and ``rtt = received - sent``.
+    The offset of the lowest-RTT sample in the window is used (it has the
+    smallest error bound) and drift is the least-squares slope of the window's
+    offsets, so ``now_ms`` needs no network call.
+    """
+
+    def __init__(self, transport=None, interval=30, window=8):
+        self.transport = transport
+        self.interval = interval
+        self.__samples = deque(maxlen=window)
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.offset_ms = 0.0
+        self.__offset_at = 0.0
+        self.rtt_ms = None
+        self.drift_ppm = 0.0
+        self.synced_at = None
+        self.errors = 0
+
+    def sample(self):
+        transport = self.transport or t.default_transport()
+        sent = time.time() * 1000
+        response = transport.request(c.GET, c.API_URL + c.SERVER_TIMESTAMP_URL)
+        received = time.time() * 1000
+        if not str(response.status_code).startswith('2'):
+            raise BitgetRequestException('server time request failed: HTTP %s %s'
+                                         % (response.status_code, response.text[:200]))
+        body = response.json()
+        if body.get('code') != '00000' or not (body.get('data') or {}).get('serverTime'):
+            raise BitgetRequestException('server time request failed: %s' % body)
+        server = int(body['data']['serverTime'])
+        rtt = received - sent
+        offset = server - (sent + received) / 2
+        with self.__lock:
+            self.__samples.append((received, offset, rtt))
+            self.__estimate()
+        return offset, rtt
+
+    def __estimate(self):
+        samples = self.__samples
+        at, offset, rtt = min(samples, key=lambda s: s[2])
+        self.offset_ms = offset
+        self.__offset_at = at
+        self.rtt_ms = rtt
+        self.synced_at = samples[-1][0]
+        if len(samples) > 1:
+            n = len(samples)
+            mean_t = sum(s[0] for s in samples) / n
+            mean_o = sum(s[1] for s in samples) / n
+            var = sum((s[0] - mean_t) ** 2 for s in samples)
+            if var:
+                slope = sum((s[0] - mean_t) * (s[1] - mean_o) for s in samples) / var
+                self.drift_ppm = slope * 1e6
+
+    def now_ms(self):
+        local = time.time() * 1000
+        # extrapolate the chosen sample's offset along the measured drift
+        return int(local + self.offset_ms + self.drift_ppm * 1e-6 * (local - self.__offset_at))
+
+    def now(self):
+        return self.now_ms() / 1000.0
+
+    def start(self):
+        if self.__thread is not None:
+            return self
+        try:
+            self.sample()
+        except Exception as e:
+            self.errors += 1
+            logger.warning('server time sample failed: %s', e)
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__stop.set()
+
+    def __run(self):
+        while not self.__stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                self.errors += 1
+                logger.warning('server time sample failed: %s', e)
+
+    def stats(self):
+        return {
+            'offset_ms': self.offset_ms,
+            'rtt_ms': self.rtt_ms,
+            'drift_ppm': self.drift_ppm,
+            'samples': len(self.__samples),
+            'last_sync_age_s': None if self.synced_at is None else time.time() - self.synced_at / 1000,
+            'errors': self.errors,
+        }
+
+
+_default_clock = None
+_default_lock = threading.Lock()
+
+
+def default_clock():
+    global _default_clock
+    if _default_clock is None:
+        with _default_lock:
+            if _default_clock is None:
+                _default_clock = ServerClock().start()
+    return _default_clock
@@ -1,6 +1,23 @@
-# Base Url
-API_URL = 'https://api.bitget.com'
-CONTRACT_WS_URL = 'wss://ws.bitget.com/mix/v1/stream'
+import os
+
+# Base Url, overridable from the environment (e.g. to point at the local stand-in, standin.py)
+API_URL = os.getenv('BITGET_API_URL', 'https://api.bitget.com')
+CONTRACT_WS_URL = os.getenv('BITGET_CONTRACT_WS_URL', 'wss://ws.bitget.com/mix/v1/stream')
+V2_PUBLIC_WS_URL = os.getenv('BITGET_WS_PUBLIC_URL', 'wss://ws.bitget.com/v2/ws/public')
+V2_PRIVATE_WS_URL = os.getenv('BITGET_WS_PRIVATE_URL', 'wss://ws.bitget.com/v2/ws/private')
+
+# server time, used by clock.ServerClock
+SERVER_TIMESTAMP_URL = '/api/v2/public/time'
+
+# http transport
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = 10
+HTTP2 = False
+
+# websocket limits per connection: op frames per second, bytes of args per frame, channels (1000 max, 50 advised)
+WS_MESSAGES_PER_SECOND = 10
+WS_MAX_FRAME_BYTES = 4096
+WS_MAX_CHANNELS = 50
 
 # http header
 CONTENT_TYPE = 'Content-Type'
@@ -0,0 +1,131 @@
+#!/usr/bin/python
+import logging
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP
+
+from .exceptions import BitgetParamsException
+
+logger = logging.getLogger(__name__)
+
+# v1 contract suffixes: SOLUSDT_UMCBL, BTCUSD_DMCBL, BTCPERP_CMCBL, ...
+V1_SUFFIXES = ('_UMCBL', '_DMCBL', '_CMCBL', '_SUMCBL', '_SDMCBL', '_SCMCBL')
+
+
+def normalize_symbol(symbol):
+    symbol = symbol.strip().upper()
+    # TradingView perpetual tickers: SOLUSDT.P
+    if symbol.endswith('.P'):
+        symbol = symbol[:-2]
+    for suffix in V1_SUFFIXES:
+        if symbol.endswith(suffix):
+            symbol = symbol[:-len(suffix)]
+            break
+    return symbol.replace('/', '').replace('-', '')
+
+
+class Contract:
+    """One v2 mix contract with its size/price quantizers precomputed."""
+
+    __slots__ = ('symbol', 'base_coin', 'quote_coin', 'price_place', 'volume_place',
+                 'size_step', 'price_step', 'min_size', 'status', 'info')
+
+    def __init__(self, info):
+        self.info = info
+        self.symbol = info['symbol']
+        self.base_coin = info.get('baseCoin')
+        self.quote_coin = info.get('quoteCoin')
+        self.price_place = int(info.get('pricePlace') or 0)
+        self.volume_place = int(info.get('volumePlace') or 0)
+        self.size_step = Decimal(info.get('sizeMultiplier') or '1')
+        self.price_step = Decimal(info.get('priceEndStep') or '1').scaleb(-self.price_place)
+        self.min_size = Decimal(info.get('minTradeNum') or '0')
+        self.status = info.get('symbolStatus')
+
+    def quantize_size(self, size):
+        steps = (Decimal(str(size)) / self.size_step).to_integral_value(ROUND_DOWN)
+        return (steps * self.size_step).quantize(Decimal(1).scaleb(-self.volume_place), ROUND_DOWN)
+
+    def quantize_price(self, price):
+        steps = (Decimal(str(price)) / self.price_step).to_integral_value(ROUND_HALF_UP)
+        return (steps * self.price_step).quantize(Decimal(1).scaleb(-self.price_place))
+
+    def normalize_size(self, size):
+        quantized = self.quantize_size(size)
+        if quantized <= 0 or quantized < self.min_size:
+            raise BitgetParamsException('size %s below minimum %s for %s' % (size, self.min_size, self.symbol))
+        return str(quantized)
+
+    def normalize_price(self, price):
+        return str(self.quantize_price(price))
+
+
+class ContractRegistry:
+    """Contracts for one product type, loaded once and refreshed in the background.
+
+    Lookups are a dict access for the exchange symbol and for its aliases
+    (v1 ``_UMCBL`` names, TradingView ``.P`` tickers, ``BASE/QUOTE``), so signals
+    are validated without any network call.
+    """
+
+    def __init__(self, market_api, product_type='USDT-FUTURES', ttl=3600):
+        # market_api: a v2 mix MarketApi
+        self.product_type = product_type
+        self.ttl = ttl
+        self.__api = market_api
+        self.__index = {}
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.loaded_at = None
+
+    @property
+    def loaded(self):
+        return self.loaded_at is not None
+
+    def refresh(self):
+        response = self.__api.contracts({'productType': self.product_type})
+        if response.get('code') != '00000':
+            raise BitgetParamsException('contracts request failed: %s' % response.get('msg'))
+        return self.load(response.get('data') or [])
+
+    def load(self, data):
+        # data: the contracts endpoint's ``data`` list, live or from a saved snapshot
+        index = {}
+        for info in data:
+            contract = Contract(info)
+            index[contract.symbol] = contract
+            index[normalize_symbol(contract.symbol)] = contract
+        # swap the whole index so readers never see a half-built map
+        self.__index = index
+        self.loaded_at = time.time()
+        return len(data)
+
+    def start(self):
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.__stop.set()
+
+    def __run(self):
+        wait = 0
+        while not self.__stop.wait(wait):
+            try:
+                self.refresh()
+                wait = self.ttl
+            except Exception as e:
+                logger.warning('contract refresh failed: %s', e)
+                wait = min(self.ttl, 30)
+
+    def lookup(self, symbol):
+        contract = self.__index.get(symbol)
+        if contract is None:
+            contract = self.__index.get(normalize_symbol(symbol))
+        return contract
+
+    def __contains__(self, symbol):
+        return self.lookup(symbol) is not None
+
+    def __len__(self):
+        return len({id(contract) for contract in self.__index.values()})
@@ -43,3 +43,11 @@ class BitgetParamsException(Exception):
 
     def __str__(self):
         return 'BitgetParamsException: %s' % self.message
+
+
+
+class BitgetNetworkException(BitgetRequestException):
+    """The request may or may not have reached Bitget (connect error, timeout, reset)."""
+
+    def __str__(self):
+        return 'BitgetNetworkException: %s' % self.message
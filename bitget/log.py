@@ -0,0 +1,94 @@
+#!/usr/bin/python
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# extra={'sampled': True} marks bulky records (payloads, response bodies) that may be sampled out
+SAMPLED = {'sampled': True}
+
+_STANDARD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sampled'}
+
+# header / JSON field values that must never reach the logs
+_SECRET_FIELDS = re.compile(
+    r'''(?i)(["']?(?:ACCESS-KEY|ACCESS-SIGN|ACCESS-PASSPHRASE|passphrase|apiKey|api_key|secret|sign)["']?\s*[:=]\s*["']?)'''
+    r'''([^"',}\s]+)''')
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps every normal record and ``rate`` of the ones flagged ``sampled``."""
+
+    def __init__(self, rate=1.0):
+        logging.Filter.__init__(self)
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, 'sampled', False) and self.rate < 1.0:
+            return random.random() < self.rate
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with secrets redacted and long messages truncated."""
+
+    def __init__(self, max_length=2000, secrets=()):
+        logging.Formatter.__init__(self)
+        self.max_length = max_length
+        self.secrets = [s for s in secrets if s]
+
+    def redact(self, text):
+        text = _SECRET_FIELDS.sub(r'\1***', text)
+        for secret in self.secrets:
+            text = text.replace(secret, '***')
+        return text
+
+    def format(self, record):
+        message = self.redact(record.getMessage())
+        if self.max_length and len(message) > self.max_length:
+            message = '%s...[%d chars truncated]' % (message[:self.max_length], len(message) - self.max_length)
+        entry = {
+            'ts': time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(record.created)) + '.%03dZ' % record.msecs,
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': message,
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _stop(listener):
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logging(level=logging.INFO, sample_rate=1.0, max_length=2000, secrets=(), stream=None):
+    """Route the root logger through a queue; formatting and I/O happen on a listener thread.
+
+    Callers only pay for building the record and a queue put. Returns the
+    started ``QueueListener`` (stopped and flushed at exit).
+    """
+    records = queue.SimpleQueue()
+    handler = QueueHandler(records)
+    handler.addFilter(SamplingFilter(sample_rate))
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter(max_length, secrets))
+    listener = QueueListener(records, output, respect_handler_level=False)
+    listener.start()
+    atexit.register(_stop, listener)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    return listener
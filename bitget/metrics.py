@@ -0,0 +1,177 @@
+#!/usr/bin/python
+import threading
+import time
+from bisect import bisect_left
+
+# seconds; covers sub-millisecond local work up to slow exchange round trips
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_str(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join('%s="%s"' % (k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, one series per label-value tuple."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self.__series = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self.__lock:
+            series = self.__series.get(labelvalues)
+            if series is None:
+                series = self.__series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labelvalues):
+        return _Timer(self, labelvalues)
+
+    def dump(self):
+        with self.__lock:
+            return [[list(k), list(s[0]), s[1], s[2]] for k, s in self.__series.items()]
+
+    def load(self, dumped):
+        # adds another process's series to these (bucket layouts must match)
+        with self.__lock:
+            for labelvalues, counts, total, count in dumped:
+                series = self.__series.setdefault(tuple(labelvalues), [[0] * (len(self.buckets) + 1), 0.0, 0])
+                series[0] = [a + b for a, b in zip(series[0], counts)]
+                series[1] += total
+                series[2] += count
+
+    def summary(self):
+        with self.__lock:
+            items = list(self.__series.items())
+        return {'/'.join(map(str, k)) or 'all': {'count': s[2], 'mean': s[1] / s[2] if s[2] else 0.0}
+                for k, s in items}
+
+    def expose(self):
+        lines = ['# HELP %s %s' % (self.name, self.documentation), '# TYPE %s histogram' % self.name]
+        with self.__lock:
+            items = [(k, (list(s[0]), s[1], s[2])) for k, s in self.__series.items()]
+        for labelvalues, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append('%s_bucket%s %d' % (self.name, _label_str(self.labelnames, labelvalues, [('le', le)]),
+                                                 cumulative))
+            lines.append('%s_sum%s %r' % (self.name, _label_str(self.labelnames, labelvalues), total))
+            lines.append('%s_count%s %d' % (self.name, _label_str(self.labelnames, labelvalues), count))
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.__values = {}
+        self.__lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self.__lock:
+            self.__values[labelvalues] = self.__values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self.__values.get(labelvalues, 0)
+
+    def dump(self):
+        with self.__lock:
+            return [[list(k), v] for k, v in self.__values.items()]
+
+    def load(self, dumped):
+        with self.__lock:
+            for labelvalues, value in dumped:
+                self.__values[tuple(labelvalues)] = self.__values.get(tuple(labelvalues), 0) + value
+
+    def expose(self):
+        lines = ['# HELP %s %s' % (self.name, self.documentation), '# TYPE %s counter' % self.name]
+        with self.__lock:
+            items = list(self.__values.items())
+        for labelvalues, value in items:
+            lines.append('%s%s %r' % (self.name, _label_str(self.labelnames, labelvalues), value))
+        return lines
+
+
+class _Timer:
+    __slots__ = ('metric', 'labelvalues', 'start')
+
+    def __init__(self, metric, labelvalues):
+        self.metric = metric
+        self.labelvalues = labelvalues
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metric.observe(time.perf_counter() - self.start, *self.labelvalues)
+
+
+class Registry:
+    def __init__(self):
+        self.__metrics = {}
+        self.__lock = threading.Lock()
+
+    def get_or_create(self, cls, name, documentation, labelnames=(), **kwargs):
+        with self.__lock:
+            metric = self.__metrics.get(name)
+            if metric is None:
+                metric = self.__metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            return metric
+
+    def expose(self):
+        lines = []
+        for metric in list(self.__metrics.values()):
+            lines.extend(metric.expose())
+        return '\n'.join(lines) + '\n'
+
+    def dump(self):
+        """JSON-serialisable copy of every series, for ``merge`` in another process."""
+        dumped = {}
+        for name, metric in list(self.__metrics.items()):
+            entry = {'type': 'histogram' if isinstance(metric, Histogram) else 'counter',
+                     'documentation': metric.documentation, 'labelnames': list(metric.labelnames),
+                     'series': metric.dump()}
+            if isinstance(metric, Histogram):
+                entry['buckets'] = list(metric.buckets)
+            dumped[name] = entry
+        return dumped
+
+
+def merge(dumps):
+    """One registry summing the ``Registry.dump()`` of several processes (counters and histograms add up)."""
+    merged = Registry()
+    for dumped in dumps:
+        for name, entry in dumped.items():
+            if entry['type'] == 'histogram':
+                metric = merged.get_or_create(Histogram, name, entry['documentation'], entry['labelnames'],
+                                              buckets=tuple(entry['buckets']))
+            else:
+                metric = merged.get_or_create(Counter, name, entry['documentation'], entry['labelnames'])
+            metric.load(entry['series'])
+    return merged
+
+
+REGISTRY = Registry()
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.get_or_create(Counter, name, documentation, labelnames)
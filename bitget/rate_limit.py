@@ -0,0 +1,227 @@
+#!/usr/bin/python
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+from . import consts as c
+
+PRIORITY_ORDER = 0
+PRIORITY_QUERY = 1
+
+# (path prefix, group), first match wins
+DEFAULT_RULES = [
+    ('/api/v2/mix/order/place-order', 'place-order'),
+    ('/api/v2/mix/order/click-backhand', 'place-order'),
+    ('/api/v2/mix/order/batch-place-order', 'batch-order'),
+    ('/api/v2/mix/order/close-positions', 'close-positions'),
+    ('/api/v2/mix/order/cancel-order', 'cancel-order'),
+    ('/api/v2/mix/order/batch-cancel-orders', 'cancel-order'),
+    ('/api/v2/mix/order/', 'order-query'),
+    ('/api/v2/mix/position/', 'positions'),
+    ('/api/v2/mix/account/', 'account'),
+    ('/api/v2/mix/market/', 'market'),
+    ('/api/v2/spot/market/', 'market'),
+    ('/api/v2/public/', 'market'),
+    ('/api/v2/spot/trade/place-order', 'place-order'),
+]
+
+# group -> (requests per second, burst); Bitget documents these per UID (per IP for market data)
+DEFAULT_LIMITS = {
+    'place-order': (10, 10),
+    'batch-order': (5, 5),
+    'close-positions': (1, 1),
+    'cancel-order': (10, 10),
+    'order-query': (10, 10),
+    'positions': (5, 5),
+    'account': (10, 10),
+    'market': (20, 20),
+    'default': (10, 10),
+}
+
+
+class _Waiter:
+    __slots__ = ('event', 'future', 'loop', 'granted', 'cancelled')
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.event = None if loop else threading.Event()
+        self.future = loop.create_future() if loop else None
+        self.granted = False
+        self.cancelled = False
+
+    def grant(self):
+        self.granted = True
+        if self.event is not None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self.__resolve)
+
+    def __resolve(self):
+        if not self.future.done():
+            self.future.set_result(True)
+
+
+class TokenBucket:
+    """Token bucket whose over-limit callers queue by (priority, arrival).
+
+    Works for threads and coroutines alike: every waiter periodically runs
+    ``_dispatch`` which refills the bucket and hands tokens to the head of the
+    priority heap, so an order never waits behind a query that arrived first.
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.__waiters = []
+        self.__seq = itertools.count()
+        self.__lock = threading.Lock()
+        self.requests = 0
+        self.waited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _dispatch(self):
+        # caller holds the lock; returns seconds until the next token is due
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        waiters = self.__waiters
+        while waiters and self.tokens >= 1:
+            waiter = heapq.heappop(waiters)[2]
+            if waiter.cancelled:
+                continue
+            self.tokens -= 1
+            waiter.grant()
+        if waiters:
+            return (1 - self.tokens) / self.rate
+        return None
+
+    def __enter(self, priority, loop=None):
+        with self.__lock:
+            self.requests += 1
+            if not self.__waiters:
+                self._dispatch()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return None
+            waiter = _Waiter(loop)
+            heapq.heappush(self.__waiters, (priority, next(self.__seq), waiter))
+            return waiter
+
+    def __record(self, start):
+        wait = time.monotonic() - start
+        self.waited += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return wait
+
+    def acquire(self, priority=PRIORITY_QUERY):
+        start = time.monotonic()
+        waiter = self.__enter(priority)
+        if waiter is None:
+            return 0.0
+        while not waiter.granted:
+            with self.__lock:
+                delay = self._dispatch()
+            waiter.event.wait(delay)
+        return self.__record(start)
+
+    async def acquire_async(self, priority=PRIORITY_QUERY):
+        start = time.monotonic()
+        waiter = self.__enter(priority, asyncio.get_running_loop())
+        if waiter is None:
+            return 0.0
+        try:
+            while not waiter.granted:
+                with self.__lock:
+                    delay = self._dispatch()
+                await asyncio.wait({waiter.future}, timeout=delay)
+        except asyncio.CancelledError:
+            with self.__lock:
+                if waiter.granted:
+                    self.tokens = min(self.capacity, self.tokens + 1)
+                waiter.cancelled = True
+            raise
+        return self.__record(start)
+
+    def depth(self):
+        return sum(1 for entry in self.__waiters if not entry[2].cancelled)
+
+    def stats(self):
+        return {
+            'rate': self.rate,
+            'requests': self.requests,
+            'waited': self.waited,
+            'total_wait_s': self.total_wait,
+            'max_wait_s': self.max_wait,
+            'queued': self.depth(),
+        }
+
+
+class RateLimiter:
+    """Client-side limits keyed by endpoint group, shared by sync and async clients."""
+
+    def __init__(self, limits=None, rules=None):
+        self.limits = dict(DEFAULT_LIMITS)
+        self.limits.update(limits or {})
+        self.rules = rules or DEFAULT_RULES
+        self.__buckets = {}
+        self.__group_cache = {}
+        self.__lock = threading.Lock()
+
+    def group(self, request_path):
+        group = self.__group_cache.get(request_path)
+        if group is None:
+            group = 'default'
+            for prefix, name in self.rules:
+                if request_path.startswith(prefix):
+                    group = name
+                    break
+            self.__group_cache[request_path] = group
+        return group
+
+    def bucket(self, group):
+        bucket = self.__buckets.get(group)
+        if bucket is None:
+            with self.__lock:
+                bucket = self.__buckets.get(group)
+                if bucket is None:
+                    rate, burst = self.limits.get(group, self.limits['default'])
+                    bucket = self.__buckets[group] = TokenBucket(rate, burst)
+        return bucket
+
+    @staticmethod
+    def priority(method):
+        return PRIORITY_ORDER if method in (c.POST, c.DELETE) else PRIORITY_QUERY
+
+    def acquire(self, method, request_path):
+        return self.bucket(self.group(request_path)).acquire(self.priority(method))
+
+    async def acquire_async(self, method, request_path):
+        return await self.bucket(self.group(request_path)).acquire_async(self.priority(method))
+
+    def stats(self):
+        return {group: bucket.stats() for group, bucket in list(self.__buckets.items())}
+
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+def default_limiter():
+    global _default_limiter
+    if _default_limiter is None:
+        with _default_lock:
+            if _default_limiter is None:
+                _default_limiter = RateLimiter()
+    return _default_limiter
+
+
+def set_default_limiter(limiter):
+    global _default_limiter
+    with _default_lock:
+        _default_limiter = limiter
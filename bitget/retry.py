@@ -0,0 +1,144 @@
+#!/usr/bin/python
+import asyncio
+import hashlib
+import random
+import time
+
+from .exceptions import BitgetAPIException, BitgetNetworkException
+
+
+class RetryPolicy:
+    """Bounded retries with full-jitter exponential backoff and an overall deadline."""
+
+    def __init__(self, attempts=3, base_delay=0.1, max_delay=2.0, deadline=10.0):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def next_delay(self, attempt, started):
+        # None when no attempt is left or the next one would start past the deadline
+        if attempt + 1 >= self.attempts:
+            return None
+        delay = self.backoff(attempt)
+        if time.monotonic() + delay - started > self.deadline:
+            return None
+        return delay
+
+
+DEFAULT_POLICY = RetryPolicy()
+ORDER_POLICY = RetryPolicy(attempts=5, base_delay=0.2, max_delay=3.0, deadline=20.0)
+
+
+def is_transient(exc):
+    if isinstance(exc, BitgetNetworkException):
+        return True
+    if isinstance(exc, BitgetAPIException):
+        return exc.status_code == 429 or exc.status_code >= 500
+    return False
+
+
+def call(fn, policy=DEFAULT_POLICY):
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            delay = policy.next_delay(attempt, started) if is_transient(e) else None
+            if delay is None:
+                raise
+        time.sleep(delay)
+        attempt += 1
+
+
+async def call_async(fn, policy=DEFAULT_POLICY):
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as e:
+            delay = policy.next_delay(attempt, started) if is_transient(e) else None
+            if delay is None:
+                raise
+        await asyncio.sleep(delay)
+        attempt += 1
+
+
+def client_oid(*parts):
+    # deterministic per signal + leg, so every resend of one order carries the same id
+    return 'tv' + hashlib.sha256('|'.join(str(p) for p in parts).encode('utf-8')).hexdigest()[:30]
+
+
+def is_duplicate(exc):
+    message = str(getattr(exc, 'message', '')).lower()
+    return isinstance(exc, BitgetAPIException) and 'duplicate' in message
+
+
+def _found(detail, params):
+    data = (detail or {}).get('data') or {}
+    if data.get('clientOid') != params['clientOid']:
+        return None
+    return {'code': detail.get('code'), 'msg': detail.get('msg'), 'requestTime': detail.get('requestTime'),
+            'data': {'orderId': data.get('orderId'), 'clientOid': data.get('clientOid')}}
+
+
+def _detail_params(params):
+    return {'symbol': params['symbol'], 'productType': params['productType'], 'clientOid': params['clientOid']}
+
+
+def place_order_idempotent(order_api, params, policy=ORDER_POLICY):
+    """Place a v2 mix order at least once without ever duplicating it.
+
+    ``params`` must carry a ``clientOid``. After a transient failure (or a
+    duplicate-clientOid rejection) the order is looked up by that id through
+    ``detail`` and only resent when the exchange does not have it; a resend
+    reusing the id is rejected by Bitget rather than filled twice.
+    """
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return order_api.placeOrder(params)
+        except Exception as e:
+            if not (is_transient(e) or is_duplicate(e)):
+                raise
+            error = e
+        try:
+            found = _found(order_api.detail(_detail_params(params)), params)
+            if found:
+                return found
+        except Exception:
+            pass
+        delay = policy.next_delay(attempt, started)
+        if delay is None:
+            raise error
+        time.sleep(delay)
+        attempt += 1
+
+
+async def place_order_idempotent_async(order_api, params, policy=ORDER_POLICY):
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        try:
+            return await order_api.placeOrder(params)
+        except Exception as e:
+            if not (is_transient(e) or is_duplicate(e)):
+                raise
+            error = e
+        try:
+            found = _found(await order_api.detail(_detail_params(params)), params)
+            if found:
+                return found
+        except Exception:
+            pass
+        delay = policy.next_delay(attempt, started)
+        if delay is None:
+            raise error
+        await asyncio.sleep(delay)
+        attempt += 1
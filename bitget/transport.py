@@ -0,0 +1,168 @@
+#!/usr/bin/python
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import consts as c, metrics
+from .exceptions import BitgetNetworkException
+
+REQUEST_STAGES = metrics.histogram('bitget_request_stage_seconds', 'REST request time spent per stage',
+                                   ('endpoint', 'stage'))
+
+# httpcore trace event -> stage; headers and body of one direction are summed
+_TRACE_STAGES = {
+    'connection.connect_tcp': 'connect',
+    'connection.start_tls': 'connect',
+    'http11.send_request_headers': 'send',
+    'http11.send_request_body': 'send',
+    'http2.send_request_headers': 'send',
+    'http2.send_request_body': 'send',
+    'http11.receive_response_headers': 'wait',
+    'http2.receive_response_headers': 'wait',
+    'http11.receive_response_body': 'receive',
+    'http2.receive_response_body': 'receive',
+}
+
+
+class _Trace(object):
+    """httpcore ``trace`` extension splitting one request into connect / send / wait / receive."""
+    __slots__ = ('url', 'started', 'stages')
+
+    def __init__(self, url):
+        self.url = url
+        self.started = 0.0
+        self.stages = {}
+
+    def __call__(self, event, info):
+        name, _, phase = event.rpartition('.')
+        stage = _TRACE_STAGES.get(name)
+        if stage is None:
+            return
+        if phase == 'started':
+            self.started = time.perf_counter()
+        else:
+            self.stages[stage] = self.stages.get(stage, 0.0) + time.perf_counter() - self.started
+
+    def observe(self):
+        endpoint = urlsplit(self.url).path
+        for stage, elapsed in self.stages.items():
+            REQUEST_STAGES.observe(elapsed, endpoint, stage)
+
+
+class _AsyncTrace(_Trace):
+    __slots__ = ()
+
+    async def __call__(self, event, info):
+        _Trace.__call__(self, event, info)
+
+
+class RequestsTransport(object):
+    """Keep-alive HTTP/1.1 connection pool backed by ``requests.Session``."""
+
+    def __init__(self, pool_size=c.HTTP_POOL_SIZE, timeout=c.HTTP_TIMEOUT):
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def request(self, method, url, body=None, headers=None):
+        try:
+            return self.session.request(method, url, data=body or None, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            raise BitgetNetworkException('%s %s: %r' % (method, url, e))
+
+    def close(self):
+        self.session.close()
+
+
+class Http2Transport(object):
+    """HTTP/2 connection backed by ``httpx`` (``pip install httpx[http2]``)."""
+
+    def __init__(self, pool_size=c.HTTP_POOL_SIZE, timeout=c.HTTP_TIMEOUT):
+        import httpx
+
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.session = httpx.Client(http2=True, limits=limits, timeout=timeout)
+        self.errors = httpx.TransportError
+
+    def request(self, method, url, body=None, headers=None):
+        trace = _Trace(url)
+        try:
+            response = self.session.request(method, url, content=body or None, headers=headers,
+                                            extensions={'trace': trace})
+        except self.errors as e:
+            raise BitgetNetworkException('%s %s: %r' % (method, url, e))
+        trace.observe()
+        return response
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncTransport(object):
+    """Pooled keep-alive connections for asyncio callers, backed by ``httpx.AsyncClient``."""
+
+    def __init__(self, pool_size=c.HTTP_POOL_SIZE, http2=False, timeout=c.HTTP_TIMEOUT):
+        import httpx
+
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        self.session = httpx.AsyncClient(http2=http2, limits=limits, timeout=timeout)
+        self.errors = httpx.TransportError
+
+    async def request(self, method, url, body=None, headers=None):
+        trace = _AsyncTrace(url)
+        try:
+            response = await self.session.request(method, url, content=body or None, headers=headers,
+                                                  extensions={'trace': trace})
+        except self.errors as e:
+            raise BitgetNetworkException('%s %s: %r' % (method, url, e))
+        trace.observe()
+        return response
+
+    async def close(self):
+        await self.session.aclose()
+
+
+def create_transport(pool_size=c.HTTP_POOL_SIZE, http2=False, timeout=c.HTTP_TIMEOUT):
+    if http2:
+        return Http2Transport(pool_size, timeout)
+    return RequestsTransport(pool_size, timeout)
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def default_transport():
+    # one pool per process, shared by every Client that is not given its own
+    global _default_transport
+    if _default_transport is None:
+        with _default_lock:
+            if _default_transport is None:
+                _default_transport = create_transport(c.HTTP_POOL_SIZE, c.HTTP2)
+    return _default_transport
+
+
+def set_default_transport(transport):
+    global _default_transport
+    with _default_lock:
+        _default_transport = transport
+
+
+_default_async_transport = None
+
+
+def default_async_transport():
+    global _default_async_transport
+    if _default_async_transport is None:
+        _default_async_transport = AsyncTransport(c.HTTP_POOL_SIZE, c.HTTP2)
+    return _default_async_transport
+
+
+def set_default_async_transport(transport):
+    global _default_async_transport
+    _default_async_transport = transport
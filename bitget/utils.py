@@ -1,6 +1,7 @@
 import base64
 import hmac
 import time
+from functools import lru_cache
 
 from Crypto.Hash import SHA256
 from Crypto.PublicKey import RSA
@@ -15,15 +16,19 @@ def sign(message, secret_key):
     return str(base64.b64encode(d), 'utf8')
 
 def signByRSA(message, secret_key):
-    privatekey = RSA.importKey(secret_key)
     h = SHA256.new(message.encode('utf-8'))
-    signer = pk.new(privatekey)
-    sign = signer.sign(h)
+    sign = _rsa_signer(secret_key).sign(h)
     return str(base64.b64encode(sign), 'utf8')
 
 
+@lru_cache(maxsize=8)
+def _rsa_signer(secret_key):
+    # parsing the PEM costs milliseconds, do it once per key
+    return pk.new(RSA.importKey(secret_key))
+
+
 def pre_hash(timestamp, method, request_path, body = ""):
-    return str(timestamp) + str.upper(method) + request_path + body
+    return '%s%s%s%s' % (timestamp, method.upper(), request_path, body)
 
 
 def get_header(api_key, sign, timestamp, passphrase):
@@ -39,25 +44,12 @@ def get_header(api_key, sign, timestamp, passphrase):
 
 
 def parse_params_to_str(params):
-    params = [(key, val) for key, val in params.items()]
-    params.sort(key=lambda x: x[0])
-    # from urllib.parse import urlencode
-    # url = '?' +urlencode(params);
-    url = '?' +toQueryWithNoEncode(params);
-    if url == '?':
+    if not params:
         return ''
-    return url
-    # url = '?'
-    # for key, value in params.items():
-    #     url = url + str(key) + '=' + str(value) + '&'
-    #
-    # return url[0:-1]
+    return '?' + toQueryWithNoEncode(sorted(params.items(), key=lambda x: x[0]))
 
 def toQueryWithNoEncode(params):
-    url = ''
-    for key, value in params:
-        url = url + str(key) + '=' + str(value) + '&'
-    return url[0:-1]
+    return '&'.join(['%s=%s' % (key, value) for key, value in params])
 
 
 def get_timestamp():
@@ -13,6 +13,9 @@ class MarketApi(Client):
     def orderbook(self, params):
         return self._request_with_params(GET, '/api/v2/mix/market/orderbook', params)
 
+    def ticker(self, params):
+        return self._request_with_params(GET, '/api/v2/mix/market/ticker', params)
+
     def tickers(self, params):
         return self._request_with_params(GET, '/api/v2/mix/market/tickers', params)
 
@@ -21,3 +24,6 @@ class MarketApi(Client):
 
     def candles(self, params):
         return self._request_with_params(GET, '/api/v2/mix/market/candles', params)
+
+    def historyCandles(self, params):
+        return self._request_with_params(GET, '/api/v2/mix/market/history-candles', params)
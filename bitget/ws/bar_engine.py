@@ -0,0 +1,305 @@
+#!/usr/bin/python
+import logging
+import threading
+
+import numpy as np
+
+from .. import consts as c
+from ..exceptions import BitgetParamsException, BitgetRequestException
+from .bitget_ws_client import BitgetWsClient, SubscribeReq, shard
+
+logger = logging.getLogger(__name__)
+
+# rows of a bar block; TIME is the bar open time in epoch milliseconds
+TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+# timeframe (seconds) -> Bitget candle granularity, used to seed rings over REST
+GRANULARITIES = {60: '1m', 180: '3m', 300: '5m', 900: '15m', 1800: '30m', 3600: '1H', 14400: '4H',
+                 21600: '6H', 43200: '12H', 86400: '1D', 259200: '3D', 604800: '1W'}
+# WebSocket candle channel suffix -> timeframe (seconds)
+CANDLE_CHANNELS = {'candle' + g: tf for tf, g in GRANULARITIES.items()}
+
+
+class BarRing:
+    """Fixed-size ring of OHLCV bars for one symbol and timeframe.
+
+    Every bar is written twice, at ``slot`` and ``slot + capacity`` of a
+    ``(6, 2 * capacity)`` array, so the last ``n`` bars are always one
+    contiguous slice and ``last`` returns a view instead of stitching the
+    wrapped halves together. The newest bar is the open one; it keeps being
+    updated in place until a trade lands in the next bucket. Buckets without
+    trades are filled flat at the previous close with zero volume, so column
+    ``i`` is always ``i`` timeframes after column ``0``.
+    """
+
+    __slots__ = ('timeframe', 'capacity', 'count', 'data', '__slot', '__span', '__bar')
+
+    def __init__(self, timeframe, capacity):
+        self.timeframe = timeframe
+        self.capacity = capacity
+        self.count = 0
+        self.data = np.zeros((len(FIELDS), 2 * capacity))
+        self.__slot = -1
+        self.__span = timeframe * 1000
+        self.__bar = None
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def open_time(self):
+        # open time of the newest bar, None while empty
+        return self.__bar[TIME] if self.count else None
+
+    def __put(self, bar):
+        slot = (self.__slot + 1) % self.capacity
+        self.__bar = [float(value) for value in bar]
+        self.data[:, slot] = self.__bar
+        self.data[:, slot + self.capacity] = self.__bar
+        self.__slot = slot
+        self.count += 1
+
+    def __fill(self, start, until):
+        # flat bars at the last close for every empty bucket in [start, until)
+        k = int((until - start) // self.__span)
+        if k <= 0:
+            return
+        if k == 1:
+            close = self.__bar[CLOSE]
+            self.__put((start, close, close, close, close, 0.0))
+            return
+        k = min(k, self.capacity)
+        start = until - k * self.__span
+        slots = (self.__slot + 1 + np.arange(k)) % self.capacity
+        close = self.data[CLOSE, self.__slot]
+        block = np.empty((len(FIELDS), k))
+        block[TIME] = start + self.__span * np.arange(k)
+        block[OPEN:VOLUME] = close
+        block[VOLUME] = 0.0
+        self.data[:, slots] = block
+        self.data[:, slots + self.capacity] = block
+        self.__slot = int(slots[-1])
+        self.__bar = block[:, -1].tolist()
+        self.count += k
+
+    def trade(self, ts, price, size):
+        start = ts - ts % self.__span
+        if not self.count:
+            self.__put((start, price, price, price, price, size))
+            return
+        bar = self.__bar
+        current = bar[TIME]
+        if start == current:
+            # plain floats for the open bar: numpy scalar arithmetic would dominate the cost
+            if price > bar[HIGH]:
+                bar[HIGH] = price
+            elif price < bar[LOW]:
+                bar[LOW] = price
+            bar[CLOSE] = price
+            bar[VOLUME] += size
+            self.data[:, self.__slot] = bar
+            self.data[:, self.__slot + self.capacity] = bar
+        elif start > current:
+            self.__fill(current + self.__span, start)
+            self.__put((start, price, price, price, price, size))
+        # a trade for a bar already closed is dropped
+
+    def merge(self, bar):
+        """Upsert a complete bar (time, open, high, low, close, volume), e.g. from REST or a candle push.
+
+        Older than the newest bar: dropped. Same bucket: extremes and volume
+        are merged, the trade-fed close is kept. Newer: appended.
+        """
+        start = bar[TIME]
+        if not self.count or start > self.__bar[TIME]:
+            if self.count:
+                self.__fill(self.__bar[TIME] + self.__span, start)
+            self.__put(bar)
+        elif start == self.__bar[TIME]:
+            current = self.__bar
+            current[HIGH] = max(current[HIGH], float(bar[HIGH]))
+            current[LOW] = min(current[LOW], float(bar[LOW]))
+            current[VOLUME] = max(current[VOLUME], float(bar[VOLUME]))
+            self.data[:, self.__slot] = current
+            self.data[:, self.__slot + self.capacity] = current
+
+    def load(self, block):
+        """Replace the contents with a ``(6, n)`` block of consecutive bars, oldest first."""
+        block = block[:, -self.capacity:]
+        n = block.shape[1]
+        self.data[:, :n] = block
+        self.data[:, self.capacity:self.capacity + n] = block
+        self.__slot = n - 1
+        self.__bar = block[:, -1].tolist() if n else None
+        self.count = n
+
+    def last(self, n, closed=False):
+        """View of the last ``n`` bars as a ``(6, n)`` block, oldest first; no copy.
+
+        ``closed`` leaves out the open bar. The view is live: the writer keeps
+        updating it, so copy it to keep a stable snapshot.
+        """
+        end = self.__slot + self.capacity + 1 - (1 if closed else 0)
+        n = max(0, min(n, len(self) - (1 if closed else 0)))
+        return self.data[:, end - n:end]
+
+
+def resample(block, timeframe):
+    """Aggregate a ``(6, n)`` block of bars into ``timeframe``-second bars, vectorized."""
+    if not block.shape[1]:
+        return np.zeros((len(FIELDS), 0))
+    span = timeframe * 1000
+    buckets = block[TIME] - block[TIME] % span
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], block.shape[1]] - 1
+    out = np.empty((len(FIELDS), len(starts)))
+    out[TIME] = buckets[starts]
+    out[OPEN] = block[OPEN, starts]
+    out[HIGH] = np.maximum.reduceat(block[HIGH], starts)
+    out[LOW] = np.minimum.reduceat(block[LOW], starts)
+    out[CLOSE] = block[CLOSE, ends]
+    out[VOLUME] = np.add.reduceat(block[VOLUME], starts)
+    return out
+
+
+class BarEngine:
+    """OHLCV bars per symbol and timeframe, aggregated locally from the ``trade`` channel.
+
+    Each trade updates a 1 s base ring and every other timeframe (any whole
+    number of seconds) of its symbol. A timeframe added later is backfilled
+    by resampling the 1 s ring. With a ``market_api`` the timeframes Bitget
+    has candles for are seeded over REST on start, so they have history
+    before the first trade. ``candle*`` channel pushes routed to
+    ``on_message`` are merged the same way.
+
+    One WebSocket thread writes each symbol; ``bars`` hands out views
+    without locking.
+    """
+
+    def __init__(self, timeframes=(60,), capacity=1440, market_api=None, product_type="USDT-FUTURES",
+                 url=None, max_channels=c.WS_MAX_CHANNELS):
+        self.capacity = capacity
+        self.product_type = product_type
+        self.url = url or c.V2_PUBLIC_WS_URL
+        # market_api: a v2 mix MarketApi, optional
+        self.__rest = market_api
+        self.__max_channels = max_channels
+        self.__timeframes = (1,)
+        self.__rings = {}
+        self.__lock = threading.Lock()
+        self.__ws_clients = []
+        for timeframe in timeframes:
+            self.add_timeframe(timeframe)
+
+    @property
+    def timeframes(self):
+        return self.__timeframes
+
+    def add_timeframe(self, timeframe):
+        if int(timeframe) != timeframe or timeframe < 1:
+            raise BitgetParamsException('timeframe must be a whole number of seconds: %r' % timeframe)
+        timeframe = int(timeframe)
+        with self.__lock:
+            if timeframe in self.__timeframes:
+                return
+            extended = {}
+            for symbol, rings in self.__rings.items():
+                ring = BarRing(timeframe, self.capacity)
+                base = rings[1]
+                ring.load(resample(base.last(len(base)), timeframe))
+                # a new dict: the writer may be iterating the old one
+                extended[symbol] = {**rings, timeframe: ring}
+            self.__rings = extended
+            self.__timeframes = tuple(sorted(self.__timeframes + (timeframe,)))
+
+    def __symbol(self, symbol):
+        rings = self.__rings.get(symbol)
+        if rings is None:
+            with self.__lock:
+                rings = self.__rings.get(symbol)
+                if rings is None:
+                    rings = {timeframe: BarRing(timeframe, self.capacity) for timeframe in self.__timeframes}
+                    extended = dict(self.__rings)
+                    extended[symbol] = rings
+                    self.__rings = extended
+        return rings
+
+    def start(self, symbols):
+        symbols = list(symbols)
+        for symbol in symbols:
+            self.__symbol(symbol)
+            if self.__rest is not None:
+                self.load_history(symbol)
+        for group in shard(symbols, self.__max_channels):
+            client = BitgetWsClient(self.url).error_listener(self.__on_error)
+            client.subscribe([SubscribeReq(self.product_type, "trade", symbol) for symbol in group], self.on_message)
+            self.__ws_clients.append(client)
+            try:
+                client.build()
+            except BitgetRequestException as e:
+                logger.warning("trade stream not up yet, still retrying: %s", e)
+        return self
+
+    def stop(self):
+        clients, self.__ws_clients = self.__ws_clients, []
+        for client in clients:
+            client.close()
+
+    def load_history(self, symbol):
+        rings = self.__symbol(symbol)
+        for timeframe, ring in rings.items():
+            granularity = GRANULARITIES.get(timeframe)
+            if granularity is None:
+                continue
+            try:
+                response = self.__rest.candles({"symbol": symbol, "productType": self.product_type,
+                                                "granularity": granularity, "limit": str(min(self.capacity, 1000))})
+            except Exception as e:
+                logger.warning("candles for %s %s failed: %s", symbol, granularity, e)
+                continue
+            if response.get("code") != "00000":
+                logger.warning("candles for %s %s failed: %s", symbol, granularity, response)
+                continue
+            for candle in sorted(response.get("data") or [], key=lambda row: int(row[0])):
+                ring.merge([float(value) for value in candle[:6]])
+
+    def on_message(self, json_obj):
+        arg = json_obj.get("arg") or {}
+        symbol = arg.get("instId")
+        channel = arg.get("channel")
+        data = json_obj.get("data") or []
+        if channel == "trade":
+            # the subscribe snapshot lists the latest trades newest first
+            for trade in sorted(data, key=lambda t: int(t["ts"])):
+                self.trade(symbol, int(trade["ts"]), float(trade["price"]), float(trade["size"]))
+        elif channel in CANDLE_CHANNELS:
+            ring = self.__symbol(symbol).get(CANDLE_CHANNELS[channel])
+            if ring is not None:
+                for candle in sorted(data, key=lambda row: int(row[0])):
+                    ring.merge([float(value) for value in candle[:6]])
+
+    def trade(self, symbol, ts, price, size):
+        """Feed one trade (epoch ms, price, size); the WebSocket listener and replays both end up here."""
+        for ring in self.__symbol(symbol).values():
+            ring.trade(ts, price, size)
+
+    def __on_error(self, message):
+        logger.error("bar engine error: %s", message)
+
+    def ring(self, symbol, timeframe):
+        rings = self.__rings.get(symbol)
+        return rings.get(timeframe) if rings else None
+
+    def bars(self, symbol, timeframe, n, closed=False):
+        """Last ``n`` bars of ``symbol`` as a ``(6, n)`` view (rows TIME..VOLUME), oldest first."""
+        ring = self.ring(symbol, timeframe)
+        if ring is None:
+            return np.zeros((len(FIELDS), 0))
+        return ring.last(n, closed)
+
+    def closes(self, symbol, timeframe, n, closed=False):
+        return self.bars(symbol, timeframe, n, closed)[CLOSE]
+
+    def symbols(self):
+        return list(self.__rings)
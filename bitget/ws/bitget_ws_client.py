@@ -1,38 +1,125 @@
 #!/usr/bin/python
 import json
-import math
+import logging
+import random
 import threading
 import time
-import traceback
-from threading import Timer
-from zlib import crc32
 
 import websocket
 
+try:
+    # optional faster decoder, same output as json.loads
+    from orjson import loads as _loads
+except ImportError:
+    _loads = json.loads
+
 from bitget.consts import GET
-from .. import consts as c, utils
+from .. import consts as c, metrics, utils
+from ..exceptions import BitgetRequestException
+from ..rate_limit import TokenBucket
+from .order_book import OrderBook
+from ..signer import Signer
+
+logger = logging.getLogger(__name__)
 
 WS_OP_LOGIN = 'login'
 WS_OP_SUBSCRIBE = "subscribe"
 WS_OP_UNSUBSCRIBE = "unsubscribe"
 
+# connection states of BitgetWsClient
+DISCONNECTED = 'disconnected'
+CONNECTING = 'connecting'
+LOGGING_IN = 'logging_in'
+SUBSCRIBING = 'subscribing'
+CONNECTED = 'connected'
+BACKOFF = 'backoff'
+CLOSED = 'closed'
+
+WS_DISPATCH = metrics.histogram('bitget_ws_dispatch_seconds',
+                                'Pushed message decode, book check and listener time', ('channel', 'outcome'),
+                                buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                                         0.005, 0.01, 0.025, 0.1))
+
 
 def handle(message):
-    print("default:" + message)
+    logger.info("default: %s", message)
 
 
 def handel_error(message):
-    print("default_error:" + message)
+    logger.error("default_error: %s", message)
+
+
+def route_key(arg):
+    # (instType, channel, instId) straight from the pushed ``arg`` dict
+    return arg.get('instType'), arg.get('channel'), arg.get('instId') or arg.get('coin')
+
+
+def batch_frames(op, args, max_bytes=c.WS_MAX_FRAME_BYTES):
+    """Encode ``op`` over ``args`` in as few frames as the per-frame size limit allows.
+
+    Each frame is what ``json.dumps(BaseWsReq(op, chunk))`` would produce.
+    """
+    prefix = '{"op": %s, "args": [' % json.dumps(op)
+    frames = []
+    chunk = []
+    size = len(prefix) + 2
+    for arg in args:
+        encoded = json.dumps(arg, default=_to_wire)
+        if chunk and size + len(encoded) + 2 > max_bytes:
+            frames.append(prefix + ', '.join(chunk) + ']}')
+            chunk = []
+            size = len(prefix) + 2
+        chunk.append(encoded)
+        size += len(encoded) + 2
+    if chunk:
+        frames.append(prefix + ', '.join(chunk) + ']}')
+    return frames
+
+
+def shard_sizes(total, max_channels=c.WS_MAX_CHANNELS):
+    """Channels per connection for ``total`` channels: as few connections as
+    ``max_channels`` allows, spread evenly (largest first)."""
+    if total <= 0:
+        return []
+    needed = -(-total // max_channels)
+    base, extra = divmod(total, needed)
+    return [base + 1] * extra + [base] * (needed - extra)
+
+
+def shard(items, max_channels=c.WS_MAX_CHANNELS):
+    """Split ``items`` into consecutive groups of ``shard_sizes``, one per connection."""
+    items = list(items)
+    groups = []
+    start = 0
+    for size in shard_sizes(len(items), max_channels):
+        groups.append(items[start:start + size])
+        start += size
+    return groups
 
 
 class BitgetWsClient:
+    """Thread-based client: one supervisor thread per client owns the connection.
+
+    The supervisor walks an explicit state machine::
 
-    def __init__(self, url, need_login=False):
+        DISCONNECTED -> CONNECTING -> LOGGING_IN -> SUBSCRIBING -> CONNECTED
+              ^                                                     |
+              +---------------- BACKOFF <---------------------------+
+
+    and is the only reader of the socket; the ``ping`` heartbeat is sent from
+    the same loop (on a receive timeout or when it falls due), so a client
+    never owns more than one thread however often it reconnects. A dropped
+    session is retried at once, failed attempts back off exponentially with
+    full jitter. On every reconnect books are dropped (the resubscribe pushes
+    fresh snapshots) and ``reconnect_listener`` runs to resync private state.
+    """
+
+    def __init__(self, url, need_login=False, timeout=10, heartbeat=25):
         utils.check_none(url, "url")
         self.__need_login = need_login
-        self.__connection = False
-        self.__login_status = False
-        self.__reconnect_status = False
+        self.__timeout = timeout
+        self.__heartbeat = heartbeat
+        self.__state = DISCONNECTED
         self.__api_key = None
         self.__api_secret_key = None
         self.__passphrase = None
@@ -42,21 +129,30 @@ class BitgetWsClient:
         self.__url = url
         self.__scribe_map = {}
         self.__allbooks_map = {}
+        self.__reconnect_listener = None
+        self.__server_clock = None
+        self.__signer = None
+        self.__ws = None
+        self.__thread = None
+        self.__ready = threading.Event()
+        self.__wakeup = threading.Event()
+        # guards the subscription set against the supervisor's resubscribe
+        self.__lock = threading.RLock()
+        # op frames are paced to the exchange's per-connection message limit
+        self.__send_bucket = TokenBucket(c.WS_MESSAGES_PER_SECOND)
+        self.__last_error = None
+        self.connects = 0
+        self.disconnects = 0
 
     def build(self):
-        self.__ws_client = self.__init_client()
-        __thread = threading.Thread(target=self.connect)
-        __thread.start()
-
-        while not self.has_connect():
-            print("start connecting... url: ", self.__url)
-            time.sleep(1)
-
-        if self.__need_login:
-            self.__login()
-
-        self.__keep_connected(25)
-
+        """Start the supervisor and wait until connected (and logged in)."""
+        if self.__thread is None or not self.__thread.is_alive():
+            if self.__state == CLOSED:
+                self.__state = DISCONNECTED
+            self.__thread = threading.Thread(target=self.__run, name='bitget-ws', daemon=True)
+            self.__thread.start()
+        if not self.__ready.wait(self.__timeout):
+            raise BitgetRequestException('websocket %s not ready: %r' % (self.__url, self.__last_error))
         return self
 
     def api_key(self, api_key):
@@ -65,6 +161,7 @@ class BitgetWsClient:
 
     def api_secret_key(self, api_secret_key):
         self.__api_secret_key = api_secret_key
+        self.__signer = None
         return self
 
     def passphrase(self, passphrase):
@@ -79,247 +176,256 @@ class BitgetWsClient:
         self.__error_listener = error_listener
         return self
 
-    def has_connect(self):
-        return self.__connection
+    def server_clock(self, server_clock):
+        # clock.ServerClock used to correct the login timestamp
+        self.__server_clock = server_clock
+        return self
 
-    def __init_client(self):
-        try:
-            return websocket.WebSocketApp(self.__url,
-                                          on_open=self.__on_open,
-                                          on_message=self.__on_message,
-                                          on_error=self.__on_error,
-                                          on_close=self.__on_close)
+    def reconnect_listener(self, reconnect_listener):
+        # called on the supervisor thread after a reconnect has re-logged in and re-subscribed, to resync state
+        self.__reconnect_listener = reconnect_listener
+        return self
 
-        except Exception as ex:
-            print(ex)
+    def has_connect(self):
+        return self.__state == CONNECTED
+
+    @property
+    def state(self):
+        return self.__state
+
+    def close(self):
+        self.__state = CLOSED
+        self.__wakeup.set()
+        ws = self.__ws
+        if ws is not None:
+            ws.abort()
+        if self.__thread is not None and self.__thread is not threading.current_thread():
+            self.__thread.join(self.__timeout)
+
+    def __run(self):
+        attempt = 0
+        while self.__state != CLOSED:
+            connects = self.connects
+            try:
+                self.__session()
+            except Exception as e:
+                self.__last_error = e
+                if self.__state != CLOSED:
+                    logger.warning("websocket session failed: %r", e)
+            finally:
+                self.__drop()
+            if self.__state == CLOSED:
+                break
+            if self.connects > connects:
+                # the session got as far as CONNECTED: this drop is not a failed attempt
+                attempt = 0
+            self.__state = BACKOFF
+            # a dropped session is retried at once; failed attempts back off with full jitter up to 30s
+            delay = random.uniform(0, min(30.0, 0.1 * (2 ** attempt))) if attempt else 0.0
+            attempt += 1
+            logger.info("start reconnection in %.2fs ...", delay)
+            self.__wakeup.wait(delay)
+        self.__state = CLOSED
+
+    def __session(self):
+        self.__state = CONNECTING
+        self.__ws = websocket.create_connection(self.__url, timeout=self.__timeout, enable_multithread=True)
+        # the message rate is limited per connection: a fresh socket starts with a full bucket
+        self.__send_bucket = TokenBucket(c.WS_MESSAGES_PER_SECOND)
+        if self.__need_login:
+            self.__state = LOGGING_IN
+            self.__login()
+        with self.__lock:
+            self.__state = SUBSCRIBING
+            if self.__all_suribe:
+                # as few frames as the size limit allows, not one message per channel
+                self.send_message(WS_OP_SUBSCRIBE, list(self.__all_suribe))
+            self.__state = CONNECTED
+        self.connects += 1
+        logger.info('connection is success....')
+        if self.connects > 1 and self.__reconnect_listener:
+            self.__reconnect_listener()
+        self.__ready.set()
+        self.__read()
+
+    def __read(self):
+        ws = self.__ws
+        interval = self.__heartbeat
+        last_ping = last_message = time.monotonic()
+        while self.__state == CONNECTED:
+            ws.settimeout(max(0.01, last_ping + interval - time.monotonic()))
+            try:
+                message = ws.recv()
+            except websocket.WebSocketTimeoutException:
+                message = None
+            now = time.monotonic()
+            if message:
+                last_message = now
+                self.__on_message(ws, message)
+            elif message is not None:
+                # empty read: the server closed the socket
+                raise BitgetRequestException('websocket closed by server')
+            if now - last_ping >= interval:
+                if now - last_message > 2 * interval:
+                    raise BitgetRequestException('no message for %.0fs' % (now - last_message))
+                ws.send("ping")
+                last_ping = now
+
+    def __drop(self):
+        with self.__lock:
+            if self.__state == CONNECTED:
+                self.disconnects += 1
+            if self.__state != CLOSED:
+                self.__state = DISCONNECTED
+            ws, self.__ws = self.__ws, None
+        # books are rebuilt from the snapshots the resubscribe brings
+        self.__allbooks_map.clear()
+        if ws is not None:
+            try:
+                ws.close(timeout=0)
+            except Exception:
+                pass
+            # close() is a no-op once a server close frame was read; the socket must still be released
+            ws.shutdown()
 
     def __login(self):
         utils.check_none(self.__api_key, "api key")
         utils.check_none(self.__api_secret_key, "api secret key")
         utils.check_none(self.__passphrase, "passphrase")
-        timestamp = int(round(time.time()))
-        sign = utils.sign(utils.pre_hash(timestamp, GET, c.REQUEST_PATH), self.__api_secret_key)
-        if c.SIGN_TYPE == c.RSA:
-            sign = utils.signByRSA(utils.pre_hash(timestamp, GET, c.REQUEST_PATH), self.__api_secret_key)
+        timestamp = int(round(self.__server_clock.now() if self.__server_clock else time.time()))
+        if self.__signer is None:
+            self.__signer = Signer(self.__api_secret_key)
+        sign = self.__signer.sign(timestamp, GET, c.REQUEST_PATH)
         ws_login_req = WsLoginReq(self.__api_key, self.__passphrase, str(timestamp), sign)
         self.send_message(WS_OP_LOGIN, [ws_login_req])
-        print("logging in......")
-        while not self.__login_status:
-            time.sleep(1)
-
-    def connect(self):
-        try:
-            self.__ws_client.run_forever(ping_timeout=10)
-        except Exception as ex:
-            print(ex)
-
-    def __keep_connected(self, interval):
-        try:
-            __timer_thread = Timer(interval, self.__keep_connected, (interval,))
-            __timer_thread.start()
-            self.__ws_client.send("ping")
-        except Exception as ex:
-            print(ex)
+        logger.info("logging in......")
+        # the supervisor is the only reader, so the answer is read right here
+        deadline = time.monotonic() + self.__timeout
+        while time.monotonic() < deadline:
+            message = self.__ws.recv()
+            if not message or message == 'pong':
+                continue
+            json_obj = _loads(message)
+            if json_obj.get("event") == "login":
+                logger.info("login msg: %s", message)
+                return
+            if json_obj.get("event") == "error":
+                raise BitgetRequestException('websocket login failed: %s' % message)
+        raise BitgetRequestException('websocket login timed out')
 
     def send_message(self, op, args):
-        message = json.dumps(BaseWsReq(op, args), default=lambda o: o.__dict__)
-        print("send message:" + message)
-        self.__ws_client.send(message)
+        ws = self.__ws
+        if ws is None:
+            raise BitgetRequestException('websocket %s is not connected' % self.__url)
+        for message in batch_frames(op, args):
+            self.__send_bucket.acquire()
+            logger.debug("send message: %s", message)
+            ws.send(message)
 
     def subscribe(self, channels, listener=None):
-
-        if listener:
+        with self.__lock:
             for chanel in channels:
                 chanel.inst_type = str(chanel.inst_type)
-                self.__scribe_map[chanel] = listener
-
-        for channel in channels:
-            self.__all_suribe.add(channel)
-
-        self.send_message(WS_OP_SUBSCRIBE, channels)
+                if listener:
+                    self.__scribe_map[chanel.route_key()] = listener
+                self.__all_suribe.add(chanel)
+            # while disconnected the channels are only recorded; the next connect subscribes them
+            if self.__state in (CONNECTED, SUBSCRIBING):
+                self.send_message(WS_OP_SUBSCRIBE, channels)
 
     def unsubscribe(self, channels):
-        try:
+        with self.__lock:
             for chanel in channels:
-                if chanel in self.__scribe_map:
-                    del self.__scribe_map[chanel]
-
-            for channel in channels:
-                if chanel in self.__all_suribe:
-                    self.__all_suribe.remove(channel)
-
-            self.send_message(WS_OP_UNSUBSCRIBE, channels)
-        except Exception as e:
-            pass
-
-    def __on_open(self, ws):
-        print('connection is success....')
-        self.__connection = True
-        self.__reconnect_status = False
+                self.__scribe_map.pop(chanel.route_key(), None)
+                self.__all_suribe.discard(chanel)
+                self.__allbooks_map.pop(chanel.route_key(), None)
+            if self.__state == CONNECTED:
+                try:
+                    self.send_message(WS_OP_UNSUBSCRIBE, channels)
+                except Exception as e:
+                    logger.warning("unsubscribe failed: %r", e)
 
     def __on_message(self, ws, message):
 
         if message == 'pong':
-            print("Keep connected:" + message)
+            logger.debug("Keep connected: %s", message)
             return
-        json_obj = json.loads(message)
-        if "code" in json_obj and json_obj.get("code") != 0:
-            if self.__error_listener:
-                self.__error_listener(message)
-                return
-
-        if "event" in json_obj and json_obj.get("event") == "login":
-            print("login msg:" + message)
-            self.__login_status = True
-            return
-        listenner = None
-        if "data" in json_obj:
-            if not self.__check_sum(json_obj):
-                return
-
-            listenner = self.get_listener(json_obj)
-
-        if listenner:
-            listenner(message)
-            return
-
-        self.__listener(message)
+        started = time.perf_counter()
+        channel = 'event'
+        outcome = 'error'
+        try:
+            # decoded exactly once; listeners receive the parsed dict
+            json_obj = _loads(message)
+            if "code" in json_obj and json_obj.get("code") != 0:
+                if self.__error_listener:
+                    self.__error_listener(json_obj)
+                    outcome = 'exchange_error'
+                    return
+
+            listenner = None
+            arg = json_obj.get("arg")
+            if arg and "data" in json_obj:
+                key = route_key(arg)
+                channel = key[1]
+                if key[1] == "books" and not self.__check_sum(json_obj, key):
+                    outcome = 'resync'
+                    return
+
+                listenner = self.__scribe_map.get(key)
+
+            (listenner or self.__listener)(json_obj)
+            outcome = 'ok'
+        finally:
+            WS_DISPATCH.observe(time.perf_counter() - started, channel, outcome)
 
-    def __dict_books_info(self, dict):
-        return BooksInfo(dict['asks'], dict['bids'], dict['checksum'])
+    def get_listener(self, json_obj):
+        arg = json_obj.get('arg')
+        if arg:
+            return self.__scribe_map.get(route_key(arg))
 
-    def __dict_to_subscribe_req(self, dict):
-        if "instId" in dict:
-            instId = dict['instId']
-        else:
-            instId = dict['coin']
-        return SubscribeReq(dict['instType'], dict['channel'], instId)
+    def stats(self):
+        return {'state': self.__state, 'connects': self.connects, 'disconnects': self.disconnects,
+                'channels': len(self.__all_suribe), 'books': len(self.__allbooks_map)}
 
-    def get_listener(self, json_obj):
-        try:
-            if json_obj.get('arg'):
-                json_str = str(json_obj.get('arg')).replace("\'", "\"")
-                subscribe_req = json.loads(json_str, object_hook=self.__dict_to_subscribe_req)
-                return self.__scribe_map.get(subscribe_req)
-        except Exception as e:
-            print(json_obj.get('arg'), e)
-            pass
-
-    def __on_error(self, ws, msg):
-        print("error:", msg)
-        self.__close()
-        if not self.__reconnect_status:
-            self.__re_connect()
-
-    def __on_close(self, ws, close_status_code, close_msg):
-        print("ws is closeing ......close_status:{},close_msg:{}".format(close_status_code, close_msg))
-        self.__close()
-        if not self.__reconnect_status:
-            self.__re_connect()
-
-    def __re_connect(self):
-        # 重连
-        self.__reconnect_status = True
-        print("start reconnection ...")
-        self.build()
-        for channel in self.__all_suribe :
-            self.subscribe([channel])
-        pass
-
-    def __close(self):
-        self.__login_status = False
-        self.__connection = False
-        self.__ws_client.close()
-
-    def __check_sum(self, json_obj):
+    def __check_sum(self, json_obj, key):
         # noinspection PyBroadException
         try:
-            if "arg" not in json_obj or "action" not in json_obj:
-                return True
-            arg = str(json_obj.get('arg')).replace("\'", "\"")
-            action = str(json_obj.get('action')).replace("\'", "\"")
-            data = str(json_obj.get('data')).replace("\'", "\"")
-
-            subscribe_req = json.loads(arg, object_hook=self.__dict_to_subscribe_req)
-
-            if subscribe_req.channel != "books":
-                return True
-
-            books_info = json.loads(data, object_hook=self.__dict_books_info)[0]
+            action = json_obj.get('action')
+            books_info = json_obj.get('data')[0]
 
             if action == "snapshot":
-                self.__allbooks_map[subscribe_req] = books_info
+                book = OrderBook()
+                book.snapshot(books_info['asks'], books_info['bids'], books_info.get('ts'))
+                self.__allbooks_map[key] = book
                 return True
             if action == "update":
-                all_books = self.__allbooks_map[subscribe_req]
-                if all_books is None:
+                book = self.__allbooks_map.get(key)
+                if book is None:
                     return False
 
-                all_books = all_books.merge(books_info)
-                check_sum = all_books.check_sum(books_info.checksum)
-                if not check_sum:
+                book.update(books_info['asks'], books_info['bids'], books_info.get('ts'))
+                if not book.verify(books_info['checksum']):
+                    del self.__allbooks_map[key]
+                    subscribe_req = SubscribeReq(*key)
+                    # unsubscribe drops the channel's listener; keep it for the resubscribe
+                    listener = self.__scribe_map.get(key)
                     self.unsubscribe([subscribe_req])
-                    self.subscribe([subscribe_req])
+                    self.subscribe([subscribe_req], listener)
                     return False
-                self.__allbooks_map[subscribe_req] = all_books
         except Exception as e:
-            msg = traceback.format_exc()
-            print(msg)
+            logger.exception("books checksum failed")
 
         return True
 
+    def get_book(self, subscribe_req):
+        return self.__allbooks_map.get(subscribe_req.route_key())
 
-class BooksInfo:
-    def __init__(self, asks, bids, checksum):
-        self.asks = asks
-        self.bids = bids
-        self.checksum = checksum
-
-    def merge(self, book_info):
-        self.asks = self.innerMerge(self.asks, book_info.asks, False)
-        self.bids = self.innerMerge(self.bids, book_info.bids, True)
-        return self
-
-    def innerMerge(self, all_list, update_list, is_reverse):
-        price_and_value = {}
-        for v in all_list:
-            price_and_value[v[0]] = v
-
-        for v in update_list:
-            if v[1] == "0":
-                del price_and_value[v[0]]
-                continue
-            price_and_value[v[0]] = v
-
-        keys = sorted(price_and_value.keys(), reverse=is_reverse)
-
-        result = []
-
-        for i in keys:
-            result.append(price_and_value[i])
-
-        return result
-
-    def check_sum(self, new_check_sum):
-        crc32str = ''
-        for x in range(25):
-            if self.bids[x] is not None:
-                crc32str = crc32str + self.bids[x][0] + ":" + self.bids[x][1] + ":"
 
-            if self.asks[x] is not None:
-                crc32str = crc32str + self.asks[x][0] + ":" + self.asks[x][1] + ":"
+def _to_wire(o):
+    if hasattr(o, 'to_wire'):
+        return o.to_wire()
+    return o.__dict__
 
-        crc32str = crc32str[0:len(crc32str) - 1]
-        print(crc32str)
-        merge_num = crc32(bytes(crc32str, encoding="utf8"))
-        print("start checknum mergeVal:" + str(merge_num) + ",checkVal:" + str(new_check_sum)+",checkSin:"+str(self.__signed_int(merge_num)))
-        return self.__signed_int(merge_num) == new_check_sum
-
-    def __signed_int(self, checknum):
-        int_max = math.pow(2, 31) - 1
-        if checknum > int_max:
-            return checknum - int_max * 2 - 2
-        return checknum
 
 class SubscribeReq:
 
@@ -335,6 +441,12 @@ class SubscribeReq:
     def __hash__(self) -> int:
         return hash(self.inst_type + self.channel + self.inst_id)
 
+    def route_key(self):
+        return self.inst_type, self.channel, self.inst_id
+
+    def to_wire(self):
+        return {"instType": self.inst_type, "channel": self.channel, "instId": self.inst_id}
+
 
 class BaseWsReq:
 
@@ -350,3 +462,6 @@ class WsLoginReq:
         self.passphrase = passphrase
         self.timestamp = timestamp
         self.sign = sign
+
+    def to_wire(self):
+        return {"apiKey": self.api_key, "passphrase": self.passphrase, "timestamp": self.timestamp, "sign": self.sign}
@@ -0,0 +1,115 @@
+#!/usr/bin/python
+from bisect import bisect_left
+from zlib import crc32
+
+CHECKSUM_DEPTH = 25
+
+
+class BookSide:
+    """One side of an L2 book.
+
+    ``keys`` is kept sorted with the best level first (asks by price, bids by
+    negated price), so the best level is ``keys[0]``; finding a level is a
+    bisect. ``levels`` maps the numeric key to ``(price, size, wire)`` where the
+    original strings are kept for the checksum and ``wire`` is the pre-encoded
+    ``b"price:size"`` chunk.
+    """
+
+    __slots__ = ('descending', 'keys', 'levels')
+
+    def __init__(self, descending):
+        self.descending = descending
+        self.keys = []
+        self.levels = {}
+
+    def clear(self):
+        self.keys = []
+        self.levels = {}
+
+    def apply(self, price, size):
+        # returns the index of the touched level (len(keys) if nothing changed)
+        key = float(price)
+        if self.descending:
+            key = -key
+        keys = self.keys
+        if float(size) == 0:
+            if self.levels.pop(key, None) is None:
+                return len(keys)
+            index = bisect_left(keys, key)
+            del keys[index]
+            return index
+        index = bisect_left(keys, key)
+        if key not in self.levels:
+            keys.insert(index, key)
+        self.levels[key] = (price, size, ('%s:%s' % (price, size)).encode())
+        return index
+
+    def best(self):
+        if not self.keys:
+            return None
+        price, size, _ = self.levels[self.keys[0]]
+        return float(price), float(size)
+
+    def level(self, index):
+        price, size, _ = self.levels[self.keys[index]]
+        return price, size
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class OrderBook:
+    """Per-symbol L2 book maintained incrementally from ``books`` snapshot/update pushes."""
+
+    __slots__ = ('asks', 'bids', 'ts', '_checksum')
+
+    def __init__(self):
+        self.asks = BookSide(False)
+        self.bids = BookSide(True)
+        self.ts = None
+        self._checksum = None
+
+    def snapshot(self, asks, bids, ts=None):
+        self.asks.clear()
+        self.bids.clear()
+        self.update(asks, bids, ts)
+        self._checksum = None
+
+    def update(self, asks, bids, ts=None):
+        # levels below the checksum depth do not change the checksum, keep the cached one
+        top = CHECKSUM_DEPTH
+        apply = self.asks.apply
+        for level in asks:
+            top = min(top, apply(level[0], level[1]))
+        apply = self.bids.apply
+        for level in bids:
+            top = min(top, apply(level[0], level[1]))
+        if top < CHECKSUM_DEPTH:
+            self._checksum = None
+        self.ts = ts
+
+    def best_bid(self):
+        return self.bids.best()
+
+    def best_ask(self):
+        return self.asks.best()
+
+    def checksum(self):
+        # crc32 over "bid1:ask1:bid2:ask2:..." from the pre-encoded level chunks
+        if self._checksum is not None:
+            return self._checksum
+        bid_keys, bid_levels = self.bids.keys, self.bids.levels
+        ask_keys, ask_levels = self.asks.keys, self.asks.levels
+        n_bids, n_asks = len(bid_keys), len(ask_keys)
+        parts = []
+        for i in range(min(CHECKSUM_DEPTH, max(n_bids, n_asks))):
+            if i < n_bids:
+                parts.append(bid_levels[bid_keys[i]][2])
+            if i < n_asks:
+                parts.append(ask_levels[ask_keys[i]][2])
+        crc = crc32(b':'.join(parts))
+        self._checksum = crc - 0x100000000 if crc > 0x7fffffff else crc
+        return self._checksum
+
+    def verify(self, checksum):
+        return self.checksum() == checksum
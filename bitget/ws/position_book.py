@@ -0,0 +1,140 @@
+#!/usr/bin/python
+import logging
+import threading
+import time
+
+from .. import clock, consts as c
+from ..exceptions import BitgetRequestException
+from ..v2.mix.account_api import AccountApi
+from .bitget_ws_client import BitgetWsClient, SubscribeReq
+
+logger = logging.getLogger(__name__)
+
+
+class PositionBook:
+    """Live symbol -> holdSide -> position map fed by the private ``positions`` channel.
+
+    A REST ``all-position`` snapshot seeds the book on start and after every
+    reconnect; WebSocket pushes keep it current in between.
+
+    An order we just had acknowledged is not in the book until its push
+    arrives: ``mark_dirty`` flags the symbol and ``dirty`` stays true until a
+    push carrying that symbol lands or ``dirty_ttl`` seconds pass, so callers
+    can read REST meanwhile.
+    """
+
+    def __init__(self, api_key, api_secret_key, passphrase, product_type="USDT-FUTURES",
+                 margin_coin="USDT", url=None, dirty_ttl=5.0):
+        self.__api_key = api_key
+        self.__api_secret_key = api_secret_key
+        self.__passphrase = passphrase
+        self.product_type = product_type
+        self.margin_coin = margin_coin
+        # resolved here rather than as a default argument, so a base URL changed after import still applies
+        self.url = url or c.V2_PRIVATE_WS_URL
+        self.__rest = AccountApi(api_key, api_secret_key, passphrase)
+        self.__positions = {}
+        self.dirty_ttl = dirty_ttl
+        self.__dirty = {}
+        self.__lock = threading.Lock()
+        self.__ws_snapshots = 0
+        self.__ws_client = None
+        self.__loaded = False
+
+    def start(self):
+        self.__ws_client = BitgetWsClient(self.url, need_login=True) \
+            .api_key(self.__api_key) \
+            .api_secret_key(self.__api_secret_key) \
+            .passphrase(self.__passphrase) \
+            .error_listener(self.__on_error) \
+            .reconnect_listener(self.load_snapshot) \
+            .server_clock(clock.default_clock())
+        # recorded now, sent by the client on every (re)connect
+        channel = SubscribeReq(self.product_type, "positions", "default")
+        self.__ws_client.subscribe([channel], self.on_message)
+        try:
+            self.__ws_client.build()
+        except BitgetRequestException as e:
+            logger.warning("position stream not up yet, still retrying: %s", e)
+        self.load_snapshot()
+        return self
+
+    def stop(self):
+        if self.__ws_client is not None:
+            self.__ws_client.close()
+
+    @property
+    def ready(self):
+        return self.__loaded and self.__ws_client is not None and self.__ws_client.has_connect()
+
+    def load_snapshot(self):
+        self.__loaded = False
+        seen = self.__ws_snapshots
+        try:
+            response = self.__rest.allPosition({"productType": self.product_type, "marginCoin": self.margin_coin})
+        except Exception as e:
+            logger.warning("position snapshot failed: %s", e)
+            return
+        if response.get("code") != "00000":
+            logger.warning("position snapshot failed: %s", response)
+            return
+        with self.__lock:
+            # a WebSocket snapshot that landed meanwhile is newer than this REST answer
+            if seen == self.__ws_snapshots:
+                self.__positions = self.__index(response.get("data") or [])
+        self.__loaded = True
+
+    def on_message(self, json_obj):
+        data = json_obj.get("data") or []
+        with self.__lock:
+            if self.__dirty:
+                for pos in data:
+                    self.__dirty.pop(pos.get("symbol") or pos.get("instId"), None)
+            if json_obj.get("action") == "snapshot":
+                self.__ws_snapshots += 1
+                self.__positions = self.__index(data)
+                return
+            positions = dict(self.__positions)
+            for pos in data:
+                symbol = pos.get("symbol") or pos.get("instId")
+                sides = dict(positions.get(symbol, {}))
+                if float(pos.get("total") or 0) > 0:
+                    sides[pos.get("holdSide")] = pos
+                else:
+                    sides.pop(pos.get("holdSide"), None)
+                positions[symbol] = sides
+            self.__positions = positions
+
+    def __on_error(self, message):
+        logger.error("position book error: %s", message)
+
+    @staticmethod
+    def __index(data):
+        positions = {}
+        for pos in data:
+            if float(pos.get("total") or 0) <= 0:
+                continue
+            symbol = pos.get("symbol") or pos.get("instId")
+            positions.setdefault(symbol, {})[pos.get("holdSide")] = pos
+        return positions
+
+    def mark_dirty(self, symbol):
+        with self.__lock:
+            self.__dirty[symbol] = time.monotonic() + self.dirty_ttl
+
+    def dirty(self, symbol):
+        deadline = self.__dirty.get(symbol)
+        if deadline is None:
+            return False
+        if time.monotonic() < deadline:
+            return True
+        with self.__lock:
+            if self.__dirty.get(symbol) == deadline:
+                del self.__dirty[symbol]
+        return False
+
+    def positions(self, symbol):
+        return list(self.__positions.get(symbol, {}).values())
+
+    def get(self, symbol, hold_side):
+        return self.__positions.get(symbol, {}).get(hold_side)
@@ -0,0 +1,220 @@
+#!/usr/bin/python
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+
+from .. import consts as c, metrics
+from ..contracts import normalize_symbol
+from ..exceptions import BitgetRequestException
+from .bitget_ws_client import BitgetWsClient, SubscribeReq, shard
+
+logger = logging.getLogger(__name__)
+
+# columns of a ticker row
+LAST, MARK, BID, ASK, FUNDING, TS, RECEIVED = range(7)
+FIELDS = ('last', 'mark', 'bid', 'ask', 'funding', 'ts', 'received')
+# exchange field for each column (REST tickers and the WebSocket ticker push share names)
+_SOURCE = ('lastPr', 'markPrice', 'bidPr', 'askPr', 'fundingRate', 'ts')
+
+TICKER_FALLBACKS = metrics.counter('bitget_ticker_rest_fallbacks_total',
+                                   'Ticker reads served by REST because the table was stale', ('outcome',))
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class Ticker:
+    __slots__ = ('symbol', 'last', 'mark', 'bid', 'ask', 'funding', 'ts', 'age')
+
+    def __init__(self, symbol, row, now):
+        self.symbol = symbol
+        self.last, self.mark, self.bid, self.ask, self.funding, ts, received = row.tolist()
+        self.ts = int(ts) if ts == ts else None
+        self.age = now - received
+
+    def __repr__(self):
+        return 'Ticker(%s last=%s mark=%s bid=%s ask=%s funding=%s age=%.3fs)' % (
+            self.symbol, self.last, self.mark, self.bid, self.ask, self.funding, self.age)
+
+
+class TickerTable:
+    """Latest ticker of every contract, kept current by the public ``ticker`` channel.
+
+    Rows live in one float64 array indexed by a symbol id handed out on first
+    sight (``symbol_id``); a row is written with a single NumPy assignment and
+    read with a single copy, both under the GIL, so readers never take a lock
+    and never see half a row. Only adding a symbol locks, and growing the
+    array swaps in a bigger copy. A REST ``tickers`` snapshot seeds the table
+    on start and after every reconnect; ``get`` refetches a symbol over REST
+    when its row is older than ``max_age``.
+    """
+
+    def __init__(self, market_api, product_type="USDT-FUTURES", url=None, max_age=5.0,
+                 capacity=512, max_channels=c.WS_MAX_CHANNELS):
+        self.product_type = product_type
+        self.url = url or c.V2_PUBLIC_WS_URL
+        self.max_age = max_age
+        # market_api: a v2 mix MarketApi
+        self.__rest = market_api
+        self.__max_channels = max_channels
+        self.__rows = np.full((capacity, len(FIELDS)), np.nan)
+        self.__ids = {}
+        self.__symbols = []
+        self.__lock = threading.Lock()
+        self.__ws_clients = []
+
+    def start(self, symbols=None):
+        # symbols: contracts to stream, all of the product type by default
+        self.load_snapshot()
+        symbols = list(symbols) if symbols is not None else list(self.__symbols)
+        if not symbols:
+            # without a snapshot there is nothing to subscribe to and the table would silently stay empty
+            logger.error("ticker table not started: no symbols (snapshot failed or empty)")
+            return self
+        for group in shard(symbols, self.__max_channels):
+            # same spread as the async WsManager shards
+            client = BitgetWsClient(self.url) \
+                .error_listener(self.__on_error) \
+                .reconnect_listener(self.load_snapshot)
+            client.subscribe([SubscribeReq(self.product_type, "ticker", symbol) for symbol in group], self.on_message)
+            self.__ws_clients.append(client)
+            try:
+                client.build()
+            except BitgetRequestException as e:
+                logger.warning("ticker stream not up yet, still retrying: %s", e)
+        return self
+
+    def stop(self):
+        clients, self.__ws_clients = self.__ws_clients, []
+        for client in clients:
+            client.close()
+
+    @property
+    def ready(self):
+        return bool(self.__ws_clients) and all(client.has_connect() for client in self.__ws_clients)
+
+    def load_snapshot(self):
+        try:
+            response = self.__rest.tickers({"productType": self.product_type})
+        except Exception as e:
+            logger.warning("ticker snapshot failed: %s", e)
+            return
+        if response.get("code") != "00000":
+            logger.warning("ticker snapshot failed: %s", response)
+            return
+        data = response.get("data") or []
+        if not data:
+            logger.error("ticker snapshot for %s came back empty", self.product_type)
+            return
+        self.__write(data)
+
+    def on_message(self, json_obj):
+        self.__write(json_obj.get("data") or [])
+
+    def __on_error(self, message):
+        logger.error("ticker table error: %s", message)
+
+    def __write(self, data):
+        received = time.monotonic()
+        for item in data:
+            symbol = item.get("symbol") or item.get("instId")
+            if not symbol:
+                continue
+            ts = _float(item.get("ts"))
+            row = self.__id(symbol)
+            # a snapshot fetched before a push must not overwrite it
+            if ts < self.__rows[row, TS]:
+                continue
+            self.__rows[row] = [_float(item.get(key)) for key in _SOURCE[:TS]] + [ts, received]
+
+    def __id(self, symbol):
+        row = self.__ids.get(symbol)
+        if row is not None:
+            return row
+        with self.__lock:
+            row = self.__ids.get(symbol)
+            if row is None:
+                row = len(self.__symbols)
+                if row == len(self.__rows):
+                    rows = np.full((2 * len(self.__rows), len(FIELDS)), np.nan)
+                    rows[:row] = self.__rows
+                    self.__rows = rows
+                self.__symbols.append(symbol)
+                self.__ids[symbol] = row
+                self.__ids.setdefault(normalize_symbol(symbol), row)
+        return row
+
+    def symbol_id(self, symbol):
+        row = self.__ids.get(symbol)
+        return row if row is not None else self.__ids.get(normalize_symbol(symbol))
+
+    def symbols(self):
+        return list(self.__symbols)
+
+    def row(self, symbol_id):
+        """Copy of one row (see the column constants); NaN where nothing was received."""
+        return self.__rows[symbol_id].copy()
+
+    def peek(self, symbol):
+        """Latest ticker as held in the table, however old; None for an unknown symbol."""
+        row = self.symbol_id(symbol)
+        if row is None:
+            return None
+        return Ticker(self.__symbols[row], self.__rows[row].copy(), time.monotonic())
+
+    def get(self, symbol, max_age=None):
+        """Latest ticker, refetched over REST when older than ``max_age`` seconds.
+
+        Blocks on the REST call when stale; if that fails the stale row (or
+        None) is returned so callers can decide.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        ticker = self.peek(symbol)
+        if ticker is not None and ticker.age <= max_age:
+            return ticker
+        try:
+            response = self.__rest.ticker({"symbol": symbol, "productType": self.product_type})
+        except Exception as e:
+            logger.warning("ticker fallback for %s failed: %s", symbol, e)
+            TICKER_FALLBACKS.inc("error")
+            return ticker
+        if response.get("code") != "00000" or not response.get("data"):
+            logger.warning("ticker fallback for %s failed: %s", symbol, response)
+            TICKER_FALLBACKS.inc("error")
+            return ticker
+        TICKER_FALLBACKS.inc("ok")
+        self.__write(response["data"])
+        return self.peek(symbol)
+
+    def last(self, symbol, max_age=None):
+        ticker = self.get(symbol, max_age)
+        return ticker.last if ticker is not None else None
+
+    def mark(self, symbol, max_age=None):
+        ticker = self.get(symbol, max_age)
+        return ticker.mark if ticker is not None else None
+
+    def staleness(self, symbol=None):
+        """Seconds since the last update of ``symbol`` (inf if never), or a dict for every symbol."""
+        now = time.monotonic()
+        if symbol is not None:
+            row = self.symbol_id(symbol)
+            return math.inf if row is None else now - float(self.__rows[row, RECEIVED])
+        symbols = list(self.__symbols)
+        ages = now - self.__rows[:len(symbols), RECEIVED]
+        return dict(zip(symbols, np.nan_to_num(ages, nan=math.inf).tolist()))
+
+    def stale(self, max_age=None):
+        """Symbols whose row is older than ``max_age`` seconds."""
+        max_age = self.max_age if max_age is None else max_age
+        return [symbol for symbol, age in self.staleness().items() if age > max_age]
+
+    def __len__(self):
+        return len(self.__symbols)
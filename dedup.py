@@ -0,0 +1,61 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+
+def payload_key(payload: dict) -> str:
+    # canonical form: sorted keys, no whitespace, so field order and spacing do not matter
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class DedupCache:
+    """Bounded TTL set of recently seen keys.
+
+    Entries keep their first-seen time (a hit does not extend it), so the
+    OrderedDict is also ordered by expiry: expired and overflow entries are
+    always at the front and each lookup is O(1) amortised.
+    """
+
+    def __init__(self, ttl=30.0, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expire(self, now):
+        entries = self._entries
+        while entries:
+            key, seen_at = next(iter(entries.items()))
+            if now - seen_at < self.ttl and len(entries) <= self.max_size:
+                break
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def seen(self, key, now=None) -> bool:
+        """True if ``key`` was already seen within the TTL; records it otherwise.
+
+        ``now`` overrides the clock, e.g. with recorded arrival times in a replay.
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        if key in self._entries:
+            self.hits += 1
+            return True
+        self.misses += 1
+        self._entries[key] = now
+        if len(self._entries) > self.max_size:
+            self._expire(now)
+        return False
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "ttl": self.ttl,
+        }
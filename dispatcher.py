@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolDispatcher:
+    """Runs jobs in background workers: strictly ordered per symbol, parallel across symbols."""
+
+    def __init__(self):
+        self._queues = {}
+        self._workers = {}
+        self._running = {}
+        self.executed = 0
+        self.failed = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+
+    def submit(self, symbol, fn, *args):
+        queue = self._queues.get(symbol)
+        if queue is None:
+            queue = self._queues[symbol] = asyncio.Queue()
+            self._workers[symbol] = asyncio.create_task(self._worker(symbol, queue))
+        queue.put_nowait((time.monotonic(), fn, args))
+
+    async def _worker(self, symbol, queue):
+        while True:
+            enqueued, fn, args = await queue.get()
+            lag = time.monotonic() - enqueued
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            self._running[symbol] = enqueued
+            try:
+                await fn(*args)
+                self.executed += 1
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"❌ Error ejecutando tarea de {symbol}: {e}")
+            finally:
+                del self._running[symbol]
+                queue.task_done()
+
+    def depth(self):
+        return sum(q.qsize() for q in self._queues.values()) + len(self._running)
+
+    def stats(self):
+        now = time.monotonic()
+        per_symbol = {}
+        for symbol, queue in self._queues.items():
+            pending = queue.qsize() + (1 if symbol in self._running else 0)
+            if pending:
+                oldest = self._running.get(symbol)
+                if oldest is None:
+                    oldest = queue._queue[0][0]
+                per_symbol[symbol] = {"depth": pending, "oldest_age": now - oldest}
+        return {
+            "depth": self.depth(),
+            "symbols": per_symbol,
+            "executed": self.executed,
+            "failed": self.failed,
+            "last_lag": self.last_lag,
+            "max_lag": self.max_lag,
+        }
+
+    async def join(self, timeout=None):
+        waits = [q.join() for q in self._queues.values()]
+        if waits:
+            await asyncio.wait_for(asyncio.gather(*waits), timeout)
+
+    async def close(self, timeout=10):
+        try:
+            await self.join(timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ Cerrando con {self.depth()} tareas pendientes")
+        for task in self._workers.values():
+            task.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._queues.clear()
+        self._workers.clear()
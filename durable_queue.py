@@ -0,0 +1,197 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    symbol TEXT NOT NULL,
+    signal TEXT NOT NULL,
+    signal_id TEXT NOT NULL,
+    received REAL NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    outcome TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, id);
+CREATE TABLE IF NOT EXISTS dedup (
+    key TEXT PRIMARY KEY,
+    seen REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS processes (
+    source TEXT PRIMARY KEY,
+    metrics TEXT NOT NULL,
+    stats TEXT,
+    updated REAL NOT NULL
+);
+"""
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+EXPIRED = "expired"
+
+# every process (ingest workers, executor) publishes its metrics this often; a row this old is a dead process
+PUBLISH_INTERVAL = 5.0
+PUBLISH_MAX_AGE = 60.0
+
+
+class DurableQueue:
+    """Signal queue in a local SQLite file, shared by the ingest workers and the executor.
+
+    WAL mode lets any number of ingest processes append while the executor
+    reads; each ``put`` is one short transaction. Rows move
+    pending -> running -> done/failed, and rows left ``running`` by a process
+    that died are put back to ``pending`` by ``recover``. Replaying them is safe
+    because every order carries a clientOid derived from ``signal_id``.
+
+    Dedup lives in the same file so it holds across workers: a key seen within
+    ``ttl`` seconds is not queued again.
+
+    So do the metrics: each process ``publish``es a ``metrics.Registry.dump()``
+    (and, for the executor, its stats) under its own name, and whichever worker
+    answers ``/metrics`` merges everything ``published`` recently.
+    """
+
+    def __init__(self, path="signals.db", ttl=30.0, synchronous="NORMAL"):
+        self.path = path
+        self.ttl = ttl
+        # NORMAL: a commit survives a process crash without an fsync per signal (FULL also survives power loss)
+        self.synchronous = synchronous
+        self._conn = None
+        self._pid = None
+        self._puts = 0
+
+    @property
+    def conn(self):
+        # one connection per process, opened lazily so gunicorn workers never share a forked one
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def put(self, symbol, signal, signal_id, received, dedup_key=None):
+        """Append a signal; returns its id, or None when ``dedup_key`` was seen within the TTL."""
+        now = time.time()
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if dedup_key is not None:
+                conn.execute("DELETE FROM dedup WHERE key = ? AND seen <= ?", (dedup_key, now - self.ttl))
+                if conn.execute("INSERT OR IGNORE INTO dedup (key, seen) VALUES (?, ?)",
+                                (dedup_key, now)).rowcount == 0:
+                    conn.execute("COMMIT")
+                    return None
+            job_id = conn.execute(
+                "INSERT INTO jobs (symbol, signal, signal_id, received, updated) VALUES (?, ?, ?, ?, ?)",
+                (symbol, signal, signal_id, received, now)).lastrowid
+            self._puts += 1
+            if self._puts % 1000 == 0:
+                conn.execute("DELETE FROM dedup WHERE seen <= ?", (now - self.ttl,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return job_id
+
+    def claim(self, limit=100):
+        """Mark the oldest pending rows running and return them in arrival order."""
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute("SELECT id, symbol, signal, signal_id, received FROM jobs "
+                                "WHERE state = ? ORDER BY id LIMIT ?", (PENDING, limit)).fetchall()
+            if rows:
+                conn.executemany("UPDATE jobs SET state = ?, attempts = attempts + 1, updated = ? WHERE id = ?",
+                                 [(RUNNING, time.time(), row[0]) for row in rows])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return rows
+
+    def finish(self, job_id, outcome, state=DONE):
+        self.conn.execute("UPDATE jobs SET state = ?, outcome = ?, updated = ? WHERE id = ?",
+                          (state, outcome, time.time(), job_id))
+
+    def recover(self, max_age=None):
+        """Requeue rows a dead executor left running; expire ones older than ``max_age`` seconds.
+
+        Returns (requeued, expired).
+        """
+        now = time.time()
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = 0
+            if max_age:
+                expired = conn.execute("UPDATE jobs SET state = ?, outcome = 'too_old', updated = ? "
+                                       "WHERE state IN (?, ?) AND received < ?",
+                                       (EXPIRED, now, PENDING, RUNNING, now - max_age)).rowcount
+            requeued = conn.execute("UPDATE jobs SET state = ?, updated = ? WHERE state = ?",
+                                    (PENDING, now, RUNNING)).rowcount
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return requeued, expired
+
+    def purge(self, retention):
+        """Drop finished rows older than ``retention`` seconds."""
+        return self.conn.execute("DELETE FROM jobs WHERE state IN (?, ?, ?) AND updated < ?",
+                                 (DONE, FAILED, EXPIRED, time.time() - retention)).rowcount
+
+    def publish(self, source, metrics, stats=None):
+        self.conn.execute("INSERT OR REPLACE INTO processes (source, metrics, stats, updated) VALUES (?, ?, ?, ?)",
+                          (source, json.dumps(metrics), json.dumps(stats, default=str) if stats is not None else None,
+                           time.time()))
+
+    def published(self, max_age=PUBLISH_MAX_AGE):
+        """{source: (metrics, stats)} of the processes that published within ``max_age`` seconds."""
+        cutoff = time.time() - max_age
+        conn = self.conn
+        # a counter of a process that is gone drops out of the sum, which Prometheus reads as a reset
+        conn.execute("DELETE FROM processes WHERE updated < ?", (cutoff,))
+        rows = conn.execute("SELECT source, metrics, stats FROM processes").fetchall()
+        return {source: (json.loads(metrics), json.loads(stats) if stats else None) for source, metrics, stats in rows}
+
+    def heartbeat(self):
+        """Mark the executor alive: touches ``<path>.heartbeat``, next to the database."""
+        with open(self.path + ".heartbeat", "a"):
+            pass
+        os.utime(self.path + ".heartbeat")
+
+    def heartbeat_age(self):
+        """Seconds since the executor last called ``heartbeat``; None if it never has."""
+        try:
+            return time.time() - os.path.getmtime(self.path + ".heartbeat")
+        except OSError:
+            return None
+
+    def stats(self):
+        conn = self.conn
+        counts = dict(conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall())
+        oldest = conn.execute("SELECT MIN(received) FROM jobs WHERE state IN (?, ?)", (PENDING, RUNNING)).fetchone()[0]
+        return {
+            "path": self.path,
+            "states": counts,
+            "oldest_pending_age": time.time() - oldest if oldest else 0.0,
+            "dedup_keys": conn.execute("SELECT COUNT(*) FROM dedup WHERE seen >= ?",
+                                       (time.time() - self.ttl,)).fetchone()[0],
+            "executor_heartbeat_age": self.heartbeat_age(),
+        }
+
+    def close(self):
+        if self._conn is not None and self._pid == os.getpid():
+            self._conn.close()
+        self._conn = None
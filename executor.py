@@ -0,0 +1,132 @@
+# Proceso ejecutor (QUEUE_MODE=durable): consume la cola SQLite que escriben los workers de main.py
+import os
+import asyncio
+import fcntl
+import logging
+import signal as signals
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bitget import clock, metrics, rate_limit
+from dispatcher import SymbolDispatcher
+from durable_queue import DurableQueue, EXPIRED, FAILED, PUBLISH_INTERVAL
+import trading
+
+trading.setup_logging()
+logger = logging.getLogger("executor")
+
+QUEUE_PATH = os.getenv("QUEUE_PATH", "signals.db")
+QUEUE_POLL_MS = float(os.getenv("QUEUE_POLL_MS", 10))
+# una entrada que llega tarde es peor que ninguna: se descarta lo que lleva más de esto en cola
+QUEUE_MAX_AGE_SECONDS = float(os.getenv("QUEUE_MAX_AGE_SECONDS", 300))
+QUEUE_RETENTION_SECONDS = float(os.getenv("QUEUE_RETENTION_SECONDS", 86400))
+# opcional: las métricas del ejecutor ya llegan al /metrics de main.py a través de la cola
+EXECUTOR_METRICS_PORT = int(os.getenv("EXECUTOR_METRICS_PORT", 0))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = metrics.REGISTRY.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def acquire_lock(path):
+    # un solo ejecutor por cola: dos a la vez romperían el orden por símbolo
+    handle = open(path + ".lock", "w")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        logger.error(f"❌ Ya hay un ejecutor usando {path}")
+        sys.exit(1)
+    return handle
+
+
+async def run_job(queue, job_id, signal, symbol, signal_id, received):
+    age = time.time() - received
+    if QUEUE_MAX_AGE_SECONDS and age > QUEUE_MAX_AGE_SECONDS:
+        logger.warning(f"⌛ Señal {signal} {symbol} descartada: lleva {age:.0f}s en cola")
+        queue.finish(job_id, "too_old", EXPIRED)
+        return
+    try:
+        outcome = await trading.execute_signal(signal, symbol, signal_id, received)
+    except Exception:
+        queue.finish(job_id, "exception", FAILED)
+        raise
+    queue.finish(job_id, outcome)
+
+
+def publish(queue, dispatcher):
+    # lo que main.py no puede ver desde su proceso: Bitget, reloj, limitador y la cola en ejecución
+    queue.publish("executor", metrics.REGISTRY.dump(), {
+        "queue": dispatcher.stats(),
+        "clock": clock.default_clock().stats(),
+        "rate_limit": rate_limit.default_limiter().stats(),
+        "exit_latency": trading.exit_latency.summary(),
+    })
+
+
+async def run(queue):
+    requeued, expired = queue.recover(QUEUE_MAX_AGE_SECONDS)
+    if requeued or expired:
+        # lo que quedó a medias se repite: el clientOid deriva del signal_id, Bitget no duplica órdenes
+        logger.info(f"♻️ Recuperadas {requeued} señales sin terminar ({expired} caducadas)")
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signals.SIGTERM, signals.SIGINT):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await trading.start()
+    dispatcher = SymbolDispatcher()
+    last_purge = 0.0
+    last_beat = 0.0
+    last_publish = 0.0
+    logger.info(f"🚀 Ejecutor leyendo {QUEUE_PATH}")
+    try:
+        while not stopping.is_set():
+            rows = queue.claim()
+            for job_id, symbol, signal, signal_id, received in rows:
+                dispatcher.submit(symbol, run_job, queue, job_id, signal, symbol, signal_id, received)
+            # /health de main.py falla si esto se para: el ejecutor murió o el bucle está bloqueado
+            if time.monotonic() - last_beat > 1:
+                queue.heartbeat()
+                last_beat = time.monotonic()
+            if time.monotonic() - last_publish > PUBLISH_INTERVAL:
+                publish(queue, dispatcher)
+                last_publish = time.monotonic()
+            if time.monotonic() - last_purge > 60:
+                queue.purge(QUEUE_RETENTION_SECONDS)
+                last_purge = time.monotonic()
+            if not rows:
+                try:
+                    await asyncio.wait_for(stopping.wait(), QUEUE_POLL_MS / 1000)
+                except asyncio.TimeoutError:
+                    pass
+    finally:
+        # lo que no termine aquí queda "running" y se recupera en el próximo arranque
+        await dispatcher.close()
+        trading.stop()
+        queue.close()
+
+
+def main():
+    lock = acquire_lock(QUEUE_PATH)
+    if EXECUTOR_METRICS_PORT:
+        server = ThreadingHTTPServer(("0.0.0.0", EXECUTOR_METRICS_PORT), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        asyncio.run(run(DurableQueue(QUEUE_PATH)))
+    finally:
+        lock.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,106 +1,171 @@
 import os
+import asyncio
 import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
-from pydantic import BaseModel
-from bitget.bitget_api import BitgetApi
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from typing import Optional
+from bitget import clock, metrics, rate_limit
+from bitget.log import SAMPLED
+from dedup import DedupCache
+from dispatcher import SymbolDispatcher
+from durable_queue import DurableQueue, PUBLISH_INTERVAL
+import trading
+from trading import contracts, execute_signal, signal_label, validate_signal
 import uvicorn
 
-logging.basicConfig(level=logging.INFO)
+trading.setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+DEDUP_TTL_SECONDS = float(os.getenv("DEDUP_TTL_SECONDS", 30))
+# modo durable: sin latido del ejecutor en este tiempo, /health falla y las señales se quedarían en cola
+EXECUTOR_HEARTBEAT_TIMEOUT = float(os.getenv("EXECUTOR_HEARTBEAT_TIMEOUT", 30))
 
-API_KEY = os.getenv("BITGET_API_KEY")
-API_SECRET = os.getenv("BITGET_API_SECRET")
-API_PASSPHRASE = os.getenv("BITGET_API_PASSPHRASE")
+# memory: este proceso ejecuta las señales; durable: se escriben en SQLite y las ejecuta executor.py
+QUEUE_MODE = os.getenv("QUEUE_MODE", "memory")
+dispatcher = None
+dedup = None
+durable = None
+if QUEUE_MODE == "durable":
+    # el dedup vive en la misma base para que valga entre todos los workers
+    durable = DurableQueue(os.getenv("QUEUE_PATH", "signals.db"), ttl=DEDUP_TTL_SECONDS)
+else:
+    dispatcher = SymbolDispatcher()
+    dedup = DedupCache(ttl=DEDUP_TTL_SECONDS, max_size=int(os.getenv("DEDUP_MAX_SIZE", 10000)))
 
-api = BitgetApi(API_KEY, API_SECRET, API_PASSPHRASE)
+
+async def publish_metrics():
+    # cada worker deja sus métricas en la cola: el que atienda /metrics las suma con las del ejecutor
+    while True:
+        try:
+            await asyncio.to_thread(durable.publish, f"web-{os.getpid()}", metrics.REGISTRY.dump())
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron publicar las métricas: {e}")
+        await asyncio.sleep(PUBLISH_INTERVAL)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if durable:
+        # el worker de ingesta solo valida símbolos; posiciones, reloj y órdenes son cosa del ejecutor
+        contracts.start()
+        publisher = asyncio.create_task(publish_metrics())
+        yield
+        publisher.cancel()
+        contracts.stop()
+        durable.close()
+        return
+    await trading.start()
+    yield
+    # primero se vacían las señales en curso: las salidas aún usan el libro de posiciones
+    await dispatcher.close()
+    trading.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+webhook_latency = metrics.histogram("webhook_latency_seconds", "Time to answer TradingView (validate, dedup, enqueue)",
+                                    ("signal", "outcome"))
+validation_latency = metrics.histogram("webhook_validation_seconds", "Payload parse and symbol validation time",
+                                       ("outcome",))
 
 class SignalPayload(BaseModel):
     signal: str
     symbol: str
+    # opcional: id único de la alerta en TradingView (p. ej. {{timenow}}) para deduplicar reenvíos
+    alert_id: Optional[str] = None
 
-# ✅ Lógica para obtener posiciones abiertas
-def get_open_position(symbol: str):
-    params = {
-        "productType": "USDT-FUTURES",
-        "marginCoin": "USDT"
-    }
-    try:
-        response = api.get("/api/v2/mix/position/all-position", params)
-        logger.info(f"📊 Posiciones obtenidas: {response}")
-        return response
-    except Exception as e:
-        logger.error(f"❌ Error al obtener posiciones: {e}")
-        return None
-
-# ✅ Cerrar posición simplemente abriendo en sentido opuesto
-def exit_position(symbol: str):
-    data = get_open_position(symbol)
-    if data and data.get("code") == "00000":
-        for pos in data.get("data", []):
-            if pos.get("symbol") == symbol and float(pos.get("available", 0)) > 0:
-                side = pos.get("holdSide")
-                size = pos.get("available")
-                opposite_side = "sell" if side == "long" else "buy"
-                params = {
-                    "symbol": symbol,
-                    "marginCoin": "USDT",
-                    "productType": "USDT-FUTURES",
-                    "marginMode": "isolated",
-                    "size": size,
-                    "side": opposite_side,
-                    "orderType": "market"
-                }
-                try:
-                    logger.info(f"🔁 Cerrando posición {side.upper()} con orden {opposite_side.upper()} en {symbol}")
-                    response = api.post("/api/v2/mix/order/place-order", params)
-                    logger.info(f"✅ Orden de cierre enviada: {response}")
-                except Exception as e:
-                    logger.error(f"❌ Error cerrando posición: {e}")
-                break
-
-# ✅ Entradas long / short
-def place_entry_order(symbol: str, direction: str):
-    side = "buy" if direction == "long" else "sell"
-    params = {
-        "symbol": symbol,
-        "marginCoin": "USDT",
-        "productType": "USDT-FUTURES",
-        "marginMode": "isolated",
-        "size": "1",
-        "side": side,
-        "orderType": "market"
-    }
+# ✅ Webhook principal: valida, encola y responde sin esperar a Bitget
+# el cuerpo se valida a mano para poder medirlo; el esquema se sigue publicando en /docs
+@app.post("/", openapi_extra={"requestBody": {"required": True, "content": {
+    "application/json": {"schema": SignalPayload.model_json_schema()}}}})
+async def webhook(request: Request):
+    received = time.perf_counter()
+    received_at = time.time()
+    signal = "other"
+    outcome = "error"
     try:
-        logger.info(f"🟢 Colocando orden {side.upper()} en {symbol} con params: {params}")
-        response = api.post("/api/v2/mix/order/place-order", params)
-        logger.info(f"✅ Orden colocada: {response}")
-    except Exception as e:
-        logger.error(f"❌ Error colocando orden de entrada: {e}")
-
-# ✅ Webhook principal
-@app.post("/")
-async def webhook(payload: SignalPayload):
-    logger.info(f"📨 Payload recibido: {payload.dict()}")
-
-    signal = payload.signal.upper()
-    symbol = payload.symbol.upper()
-
-    if signal == "ENTRY_LONG":
-        place_entry_order(symbol, "long")
-    elif signal == "ENTRY_SHORT":
-        place_entry_order(symbol, "short")
-    elif signal.startswith("EXIT_"):
-        logger.info(f"🚨 Señal de salida: {signal}")
-        exit_position(symbol)
+        body = await request.body()
+        try:
+            payload = SignalPayload.model_validate_json(body)
+        except ValidationError as e:
+            outcome = "invalid_payload"
+            validation_latency.observe(time.perf_counter() - received, outcome)
+            raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)],
+                                         body=body)
+        logger.info("📨 Payload recibido: %s", payload.model_dump(), extra=SAMPLED)
 
-    return {"status": "ok"}
+        checked, signal, symbol, key, signal_id = validate_signal(payload.signal, payload.symbol, payload.alert_id)
+        if checked == "invalid_symbol":
+            outcome = checked
+            validation_latency.observe(time.perf_counter() - received, outcome)
+            logger.warning(f"❌ Símbolo no válido: {symbol}")
+            return JSONResponse({"status": "error", "msg": f"invalid symbol {symbol}"}, status_code=400)
+        validation_latency.observe(time.perf_counter() - received, "ok")
+
+        if checked == "ignored":
+            outcome = "ignored"
+            return {"status": "ok"}
+
+        if durable:
+            # una transacción corta en WAL: la señal sobrevive aunque este proceso muera después
+            duplicate = durable.put(symbol, signal, signal_id, received_at, dedup_key=key) is None
+        else:
+            duplicate = dedup.seen(key)
+            if not duplicate:
+                dispatcher.submit(symbol, execute_signal, signal, symbol, signal_id, received_at)
+        if duplicate:
+            outcome = "duplicate"
+            logger.info(f"♻️ Señal duplicada ignorada: {signal} {symbol}")
+            return {"status": "ok", "duplicate": True}
+        outcome = "queued"
+        return {"status": "ok"}
+    finally:
+        webhook_latency.observe(time.perf_counter() - received, signal_label(signal), outcome)
+
+@app.get("/stats")
+async def stats():
+    if durable:
+        published = await asyncio.to_thread(durable.published)
+        # reloj, limitador, cola en ejecución y salidas viven en el ejecutor
+        executor = (published.get("executor") or (None, None))[1]
+        return {
+            "mode": QUEUE_MODE,
+            "queue": await asyncio.to_thread(durable.stats),
+            "executor": executor,
+            "workers": sorted(source for source in published if source.startswith("web-")),
+        }
+    return {
+        "mode": QUEUE_MODE,
+        "queue": dispatcher.stats(),
+        "clock": clock.default_clock().stats(),
+        "rate_limit": rate_limit.default_limiter().stats(),
+        "dedup": dedup.stats(),
+        "exit_latency": trading.exit_latency.summary(),
+    }
 
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=int(os.environ.get("PORT", 8000)))
 
 @app.get("/health")
 async def health_check():
+    if durable:
+        age = durable.heartbeat_age()
+        if age is None or age > EXECUTOR_HEARTBEAT_TIMEOUT:
+            return JSONResponse({"status": "error", "executor_heartbeat_age": age}, status_code=503)
+        return {"status": "ok", "executor_heartbeat_age": age}
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    # formato de texto de Prometheus
+    registry = metrics.REGISTRY
+    if durable:
+        # este worker en vivo + lo publicado por los demás workers y el ejecutor
+        own = f"web-{os.getpid()}"
+        published = await asyncio.to_thread(durable.published)
+        registry = metrics.merge([registry.dump()] + [m for source, (m, _) in published.items() if source != own])
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
+
@@ -0,0 +1,253 @@
+# Replay de señales grabadas sobre velas guardadas (CANDLES_PATH): fills, comisiones, funding y PnL
+#
+#   python replay.py señales.jsonl|signals.db
+#
+# Las señales pasan por el mismo código que en vivo (trading.execute_signal, is_actionable, dedup), con un
+# exchange simulado en lugar de Bitget; lo que cuesta (precios, posiciones, equity) se calcula con NumPy.
+# JSONL: una alerta por línea, {"signal": ..., "symbol": ..., "alert_id": opcional, "received": epoch en s}
+# .db: la tabla jobs de la cola durable (QUEUE_MODE=durable), ya validada y deduplicada
+# Contratos: REPLAY_CONTRACTS (por defecto CANDLES_PATH/contracts.json, lo guarda download_candles.py) o REST
+import os
+import asyncio
+import json
+import logging
+import sqlite3
+import sys
+import time
+from collections import defaultdict
+import numpy as np
+from bitget import log
+from bitget.candle_store import CandleStore, GRANULARITY_MS
+from dedup import DedupCache
+import trading
+
+CANDLES_PATH = os.getenv("CANDLES_PATH", "candles")
+REPLAY_CONTRACTS = os.getenv("REPLAY_CONTRACTS", os.path.join(CANDLES_PATH, "contracts.json"))
+REPLAY_GRANULARITY = os.getenv("REPLAY_GRANULARITY", "1m")
+# comisión taker de futuros USDT y deslizamiento sobre la apertura de la vela siguiente
+REPLAY_FEE = float(os.getenv("REPLAY_FEE", 0.0006))
+REPLAY_SLIPPAGE_BPS = float(os.getenv("REPLAY_SLIPPAGE_BPS", 2))
+# funding cada 8h (00/08/16 UTC); positivo: los largos pagan a los cortos
+REPLAY_FUNDING_RATE = float(os.getenv("REPLAY_FUNDING_RATE", 0.0001))
+FUNDING_INTERVAL_MS = 8 * 3600 * 1000
+DEDUP_TTL_SECONDS = float(os.getenv("DEDUP_TTL_SECONDS", 30))
+
+logger = logging.getLogger("replay")
+
+
+class SimExchange:
+    """Ocupa el lugar de order_api, api y position_book de trading: apunta las órdenes y lleva la posición neta.
+
+    Órdenes de mercado en modo one-way, como las manda trading: buy suma, sell resta. El precio no se
+    decide aquí sino después, vectorizado, con las velas.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.net = defaultdict(float)
+        self.orders = []
+        self.ready = True
+
+    def __fill(self, symbol, qty):
+        self.net[symbol] += qty
+        self.orders.append((self.now, symbol, qty))
+
+    def mark_dirty(self, symbol):
+        pass
+
+    def dirty(self, symbol):
+        # aquí la posición se actualiza en el acto: nunca hace falta ir a REST
+        return False
+
+    def positions(self, symbol):
+        net = self.net.get(symbol, 0.0)
+        if not net:
+            return []
+        size = repr(abs(net))
+        return [{"symbol": symbol, "holdSide": "long" if net > 0 else "short", "available": size, "total": size}]
+
+    async def placeOrder(self, params):
+        size = float(params["size"])
+        qty = size if params["side"] == "buy" else -size
+        if params.get("reduceOnly") == "YES":
+            # como Bitget: nunca más allá de cero
+            net = self.net.get(params["symbol"], 0.0)
+            qty = max(-abs(net), min(abs(net), qty)) if net * qty < 0 else 0.0
+        if qty:
+            self.__fill(params["symbol"], qty)
+        return {"code": "00000", "data": {"orderId": str(len(self.orders)), "clientOid": params.get("clientOid")}}
+
+    async def closePositions(self, params):
+        symbol = params["symbol"]
+        net = self.net.get(symbol, 0.0)
+        closed = []
+        if net and params.get("holdSide") in (None, "long" if net > 0 else "short"):
+            self.__fill(symbol, -net)
+            closed.append({"symbol": symbol, "orderId": str(len(self.orders))})
+        return {"code": "00000", "data": {"successList": closed, "failureList": []}}
+
+    async def get(self, request_path, params):
+        # all-position, por si trading pregunta por REST
+        return {"code": "00000", "data": [pos for symbol in list(self.net) for pos in self.positions(symbol)]}
+
+
+def load_contracts(path=REPLAY_CONTRACTS):
+    """Carga trading.contracts: símbolos canónicos y tamaños normalizados como en vivo."""
+    if os.path.exists(path):
+        with open(path) as f:
+            data = json.load(f)
+        # el data del endpoint contracts, o la respuesta entera
+        count = trading.contracts.load(data.get("data") if isinstance(data, dict) else data)
+        logger.info(f"📄 {count} contratos de {path}")
+        return count
+    try:
+        count = trading.contracts.refresh()
+    except Exception as e:
+        logger.warning(f"⚠️ Sin contratos ({path} no existe y REST falló: {e}): símbolos y tamaños sin validar")
+        return 0
+    logger.info(f"📄 {count} contratos por REST")
+    return count
+
+
+def load_signals(path):
+    """(received, signal, symbol, signal_id) en orden de llegada, filtradas como en el webhook.
+
+    Llamar antes a load_contracts: sin contratos cargados los símbolos pasan tal cual, igual que en vivo.
+    """
+    if path.endswith(".db"):
+        with sqlite3.connect(path) as db:
+            rows = db.execute("SELECT received, signal, symbol, signal_id FROM jobs ORDER BY received, id").fetchall()
+        return [row for row in rows if trading.is_actionable(row[1])]
+
+    payloads = []
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                payloads.append(json.loads(line))
+    payloads.sort(key=lambda p: float(p["received"]))
+    dedup = DedupCache(ttl=DEDUP_TTL_SECONDS, max_size=10 ** 9)
+    signals = []
+    for payload in payloads:
+        received = float(payload["received"])
+        outcome, signal, symbol, key, signal_id = trading.validate_signal(
+            str(payload["signal"]), str(payload["symbol"]), payload.get("alert_id"), int(received * 1e9))
+        if outcome == "invalid_symbol":
+            logger.warning(f"❌ Símbolo no válido: {symbol}")
+            continue
+        if outcome != "ok" or dedup.seen(key, now=received):
+            continue
+        signals.append((received, signal, symbol, signal_id))
+    return signals
+
+
+async def run_signals(signals, sim):
+    # el exchange simulado sustituye a Bitget dentro de trading; el resto del camino es el de producción
+    trading.order_api = sim
+    trading.api = sim
+    trading.position_book = sim
+    for received, signal, symbol, signal_id in signals:
+        sim.now = received
+        await trading.execute_signal(signal, symbol, signal_id, received)
+    return sim.orders
+
+
+def simulate_symbol(times, opens, closes, order_ms, qty, fee=REPLAY_FEE, slippage_bps=REPLAY_SLIPPAGE_BPS,
+                    funding_rate=REPLAY_FUNDING_RATE):
+    """Equity por vela de un símbolo; cada orden se llena a la apertura de la primera vela posterior a la señal."""
+    n = len(times)
+    idx = np.searchsorted(times, order_ms, "right")
+    filled = idx < n
+    idx, qty = idx[filled], qty[filled]
+    price = opens[idx] * (1 + np.sign(qty) * slippage_bps / 10000)
+    notional = np.abs(qty) * price
+    fees = notional * fee
+
+    position = np.cumsum(np.bincount(idx, weights=qty, minlength=n))
+    cash = np.cumsum(np.bincount(idx, weights=-qty * price - fees, minlength=n))
+    # funding sobre la posición que había justo antes de cada hora de funding
+    funding = np.zeros(n)
+    at = np.flatnonzero(times % FUNDING_INTERVAL_MS == 0)
+    at = at[at > 0]
+    funding[at] = -position[at - 1] * closes[at - 1] * funding_rate
+    funding = np.cumsum(funding)
+    equity = cash + funding + position * closes
+    drawdown = np.maximum.accumulate(equity) - equity
+    return equity, {
+        "orders": int(filled.sum()),
+        "unfilled": int((~filled).sum()),
+        "volume": float(notional.sum()),
+        "fees": float(fees.sum()),
+        "funding": float(funding[-1]) if n else 0.0,
+        "pnl": float(equity[-1]) if n else 0.0,
+        "max_drawdown": float(drawdown.max()) if n else 0.0,
+        "position": float(position[-1]) if n else 0.0,
+    }
+
+
+def simulate(orders, store, granularity=REPLAY_GRANULARITY, **costs):
+    """Resultados por símbolo y de la cartera (suma de equity en una rejilla común de velas)."""
+    step = GRANULARITY_MS[granularity]
+    by_symbol = defaultdict(list)
+    for received, symbol, qty in orders:
+        by_symbol[symbol].append((received * 1000, qty))
+
+    results = {}
+    curves = []
+    for symbol, rows in by_symbol.items():
+        rows = np.array(rows)
+        candles = store.open(symbol, granularity)
+        if not len(candles):
+            logger.warning(f"⚠️ Sin velas {granularity} para {symbol}: {len(rows)} órdenes sin simular")
+            continue
+        # desde la vela de la primera señal: lo anterior no cambia nada
+        window = candles.window(rows[0, 0] - rows[0, 0] % step)
+        times = np.asarray(window["time"])
+        equity, stats = simulate_symbol(times, np.asarray(window["open"]), np.asarray(window["close"]),
+                                        rows[:, 0], rows[:, 1], **costs)
+        results[symbol] = stats
+        curves.append((times, equity))
+
+    if curves:
+        grid = np.arange(min(t[0] for t, _ in curves), max(t[-1] for t, _ in curves) + step, step)
+        total = np.zeros(len(grid))
+        for times, equity in curves:
+            j = np.searchsorted(times, grid, "right") - 1
+            total += np.where(j >= 0, equity[np.maximum(j, 0)], 0.0)
+        results["TOTAL"] = {
+            "orders": sum(r["orders"] for r in results.values()),
+            "unfilled": sum(r["unfilled"] for r in results.values()),
+            "volume": sum(r["volume"] for r in results.values()),
+            "fees": sum(r["fees"] for r in results.values()),
+            "funding": sum(r["funding"] for r in results.values()),
+            "pnl": float(total[-1]),
+            "max_drawdown": float((np.maximum.accumulate(total) - total).max()),
+            "position": None,
+        }
+    return results
+
+
+def replay(signals, store, granularity=REPLAY_GRANULARITY, **costs):
+    sim = SimExchange()
+    asyncio.run(run_signals(signals, sim))
+    return simulate(sim.orders, store, granularity, **costs)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("uso: python replay.py SEÑALES.jsonl|signals.db")
+        sys.exit(2)
+    # el camino de producción registra cada orden: en un replay solo interesan avisos y el resumen
+    log.setup_logging(level=os.getenv("LOG_LEVEL", "WARNING"))
+    started = time.perf_counter()
+    load_contracts()
+    signals = load_signals(sys.argv[1])
+    results = replay(signals, CandleStore(CANDLES_PATH))
+    print(f"{'symbol':<14}{'orders':>8}{'volume':>16}{'fees':>12}{'funding':>12}{'pnl':>14}{'max_dd':>14}")
+    for symbol, r in results.items():
+        print(f"{symbol:<14}{r['orders']:>8}{r['volume']:>16.2f}{r['fees']:>12.2f}{r['funding']:>12.2f}"
+              f"{r['pnl']:>14.2f}{r['max_drawdown']:>14.2f}")
+    print(f"{len(signals)} señales en {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
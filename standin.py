@@ -0,0 +1,505 @@
+# Bitget de mentira (REST v2 mix + WebSocket) para probar y medir todo el stack en una sola máquina
+#
+#   python standin.py
+#   BITGET_API_URL=http://127.0.0.1:8100 \
+#   BITGET_WS_PUBLIC_URL=ws://127.0.0.1:8100/v2/ws/public \
+#   BITGET_WS_PRIVATE_URL=ws://127.0.0.1:8100/v2/ws/private python main.py
+#
+# Latencia y errores: STANDIN_LATENCY_MS, STANDIN_JITTER_MS, STANDIN_ERROR_RATE (antes de procesar),
+# STANDIN_LOST_RATE (se procesa y la respuesta se pierde), STANDIN_ERROR_STATUS y STANDIN_WS_DROP_RATE;
+# también en caliente con POST /standin/config.
+import os
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+import zlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from bitget import consts as c
+from bitget.contracts import Contract
+from bitget.exceptions import BitgetParamsException
+from bitget.signer import Signer
+import uvicorn
+
+logger = logging.getLogger("standin")
+
+STANDIN_PORT = int(os.getenv("STANDIN_PORT", 8100))
+# si se define, se comprueban las firmas REST y el login del WebSocket como haría Bitget
+STANDIN_API_SECRET = os.getenv("STANDIN_API_SECRET")
+PRODUCT_TYPE = "USDT-FUTURES"
+BOOK_DEPTH = 50
+# niveles por lado que entran en el checksum de books
+CHECKSUM_DEPTH = 25
+
+config = {
+    "latency_ms": float(os.getenv("STANDIN_LATENCY_MS", 0)),
+    "jitter_ms": float(os.getenv("STANDIN_JITTER_MS", 0)),
+    "error_rate": float(os.getenv("STANDIN_ERROR_RATE", 0)),
+    "lost_rate": float(os.getenv("STANDIN_LOST_RATE", 0)),
+    "error_status": int(os.getenv("STANDIN_ERROR_STATUS", 500)),
+    # probabilidad por conexión y por tick de cortar el WebSocket
+    "ws_drop_rate": float(os.getenv("STANDIN_WS_DROP_RATE", 0)),
+    "push_ms": float(os.getenv("STANDIN_PUSH_MS", 100)),
+}
+stats = {"requests": 0, "errors": 0, "lost": 0, "orders": 0, "ws_connections": 0, "ws_drops": 0, "subscribes": 0,
+         "pushes": 0}
+
+# símbolo -> (precio inicial, pricePlace, volumePlace)
+SYMBOLS = {"BTCUSDT": (60000.0, 1, 4), "ETHUSDT": (3000.0, 2, 2), "SOLUSDT": (150.0, 3, 1),
+           "XRPUSDT": (0.6, 4, 0), "DOGEUSDT": (0.15, 5, 0)}
+for extra in filter(None, os.getenv("STANDIN_SYMBOLS", "").split(",")):
+    SYMBOLS.setdefault(extra.strip().upper(), (100.0, 3, 1))
+
+
+def ok(data):
+    return {"code": "00000", "msg": "success", "requestTime": int(time.time() * 1000), "data": data}
+
+
+def fail(status, code, msg):
+    return JSONResponse({"code": code, "msg": msg, "requestTime": int(time.time() * 1000), "data": None},
+                        status_code=status)
+
+
+class Market:
+    """Precio (paseo aleatorio), libro L2 y último trade de un contrato."""
+
+    def __init__(self, symbol, price, price_place, volume_place):
+        self.symbol = symbol
+        self.price = price
+        self.tick = 10 ** -price_place
+        self.price_place = price_place
+        self.volume_place = volume_place
+        self.contract = Contract({
+            "symbol": symbol, "baseCoin": symbol[:-4], "quoteCoin": "USDT", "pricePlace": str(price_place),
+            "volumePlace": str(volume_place), "sizeMultiplier": str(10 ** -volume_place) if volume_place else "1",
+            "priceEndStep": "1", "minTradeNum": str(10 ** -volume_place) if volume_place else "1",
+            "symbolStatus": "normal", "productType": PRODUCT_TYPE, "makerFeeRate": "0.0002",
+            "takerFeeRate": "0.0006"})
+        self.asks, self.bids = {}, {}
+        self.last_trade = None
+        self.__rebuild()
+
+    def __fmt_price(self, price):
+        return "%.*f" % (self.price_place, price)
+
+    def __fmt_size(self, size):
+        return "%.*f" % (max(self.volume_place, 1), size)
+
+    def __rebuild(self):
+        self.asks = {self.__fmt_price(self.price + self.tick * (i + 1)): self.__fmt_size(random.uniform(0.1, 20))
+                     for i in range(BOOK_DEPTH)}
+        self.bids = {self.__fmt_price(self.price - self.tick * (i + 1)): self.__fmt_size(random.uniform(0.1, 20))
+                     for i in range(BOOK_DEPTH)}
+
+    def levels(self, depth=None):
+        """(asks, bids) como [precio, tamaño] en texto, del mejor al peor."""
+        asks = sorted(self.asks.items(), key=lambda level: float(level[0]))[:depth]
+        bids = sorted(self.bids.items(), key=lambda level: -float(level[0]))[:depth]
+        return [list(level) for level in asks], [list(level) for level in bids]
+
+    def checksum(self):
+        # como lo documenta Bitget, calculado aquí y no con el OrderBook del cliente que se quiere probar:
+        # crc32 de "bid1:tam:ask1:tam:bid2:..." con los 25 mejores de cada lado, como int32 con signo
+        asks, bids = self.levels(CHECKSUM_DEPTH)
+        parts = []
+        for i in range(max(len(asks), len(bids))):
+            if i < len(bids):
+                parts.append("%s:%s" % tuple(bids[i]))
+            if i < len(asks):
+                parts.append("%s:%s" % tuple(asks[i]))
+        crc = zlib.crc32(":".join(parts).encode())
+        return crc - (1 << 32) if crc >= 1 << 31 else crc
+
+    def snapshot(self, depth=None):
+        asks, bids = self.levels(depth)
+        return {"asks": asks, "bids": bids, "checksum": self.checksum(), "ts": str(int(time.time() * 1000))}
+
+    def step(self):
+        """Mueve el precio un tick y cambia algunos niveles; devuelve el update de libro (checksum incluido)."""
+        self.price = max(self.tick, self.price + random.choice((-1, 0, 1)) * self.tick)
+        asks, bids = [], []
+        for side, changes, sign in ((self.asks, asks, 1), (self.bids, bids, -1)):
+            for i in random.sample(range(BOOK_DEPTH), 3):
+                price = self.__fmt_price(self.price + sign * self.tick * (i + 1))
+                size = self.__fmt_size(random.uniform(0.1, 20))
+                side[price] = size
+                changes.append([price, size])
+            # lo que quedó del lado equivocado del precio, y lo más lejano si el libro crece, se borra con tamaño 0
+            stale = [p for p in side if (float(p) - self.price) * sign <= 0]
+            rest = sorted((p for p in side if p not in stale), key=lambda p: abs(float(p) - self.price))
+            stale += rest[2 * BOOK_DEPTH:]
+            for price in stale:
+                del side[price]
+                changes.append([price, "0"])
+        side = random.choice(("buy", "sell"))
+        self.last_trade = {"ts": str(int(time.time() * 1000)), "price": self.__fmt_price(self.price),
+                           "size": self.__fmt_size(random.uniform(0.01, 2)), "side": side,
+                           "tradeId": str(next(TRADE_IDS))}
+        return {"asks": asks, "bids": bids, "checksum": self.checksum(), "ts": self.last_trade["ts"]}
+
+    def ticker(self):
+        asks, bids = self.levels(1)
+        return {"symbol": self.symbol, "instId": self.symbol, "lastPr": self.__fmt_price(self.price),
+                "bidPr": bids[0][0] if bids else None, "askPr": asks[0][0] if asks else None,
+                "markPrice": self.__fmt_price(self.price), "indexPrice": self.__fmt_price(self.price),
+                "fundingRate": "0.0001", "ts": str(int(time.time() * 1000))}
+
+
+# books5/books15 son siempre snapshots de los N mejores niveles; books, snapshot y luego updates
+SHALLOW_BOOKS = {"books5": 5, "books15": 15}
+TRADE_IDS = itertools.count(1)
+ORDER_IDS = itertools.count(1000000)
+markets = {symbol: Market(symbol, *spec) for symbol, spec in SYMBOLS.items()}
+# posición neta one-way por símbolo: (tamaño con signo, precio medio)
+positions = {}
+orders = {}
+connections = set()
+
+
+def position_list(symbol=None):
+    out = []
+    for sym, (net, avg) in positions.items():
+        if not net or (symbol and sym != symbol):
+            continue
+        size = "%g" % abs(net)
+        mark = markets[sym].price
+        out.append({"symbol": sym, "marginCoin": "USDT", "holdSide": "long" if net > 0 else "short",
+                    "openDelegateSize": "0", "available": size, "locked": "0", "total": size, "leverage": "10",
+                    "openPriceAvg": "%g" % avg, "marginMode": "isolated", "posMode": "one_way_mode",
+                    "unrealizedPL": "%g" % ((mark - avg) * net), "markPrice": "%g" % mark,
+                    "uTime": str(int(time.time() * 1000))})
+    return out
+
+
+def fill(symbol, qty):
+    net, avg = positions.get(symbol, (0.0, 0.0))
+    price = markets[symbol].price
+    new = round(net + qty, 10)
+    if net * qty >= 0:
+        avg = (avg * abs(net) + price * abs(qty)) / abs(new) if new else 0.0
+    elif new * net < 0:
+        avg = price
+    positions[symbol] = (new, avg if new else 0.0)
+    return price
+
+
+def place(params):
+    """Una orden de mercado: (orderId, clientOid) o (código, mensaje) de error como los de Bitget."""
+    market = markets.get(params.get("symbol"))
+    if market is None:
+        return None, ("40034", "Parameter symbol does not exist")
+    client_oid = params.get("clientOid") or "standin%d" % next(ORDER_IDS)
+    if client_oid in orders:
+        return None, ("40786", "Duplicate clientOid")
+    try:
+        size = float(market.contract.normalize_size(params.get("size")))
+    except (BitgetParamsException, ArithmeticError, TypeError, ValueError) as e:
+        return None, ("45111", "less than the minimum order quantity: %s" % e)
+    qty = size if params.get("side") == "buy" else -size
+    if params.get("reduceOnly") == "YES":
+        net = positions.get(market.symbol, (0.0, 0.0))[0]
+        qty = max(-abs(net), min(abs(net), qty)) if net * qty < 0 else 0.0
+    price = fill(market.symbol, qty)
+    order_id = str(next(ORDER_IDS))
+    orders[client_oid] = orders[order_id] = {
+        "symbol": market.symbol, "size": "%g" % size, "orderId": order_id, "clientOid": client_oid,
+        "priceAvg": "%g" % price, "baseVolume": "%g" % abs(qty), "state": "filled", "side": params.get("side"),
+        "orderType": "market", "cTime": str(int(time.time() * 1000))}
+    stats["orders"] += 1
+    broadcast_positions()
+    return {"orderId": order_id, "clientOid": client_oid}, None
+
+
+# ---------------- WebSocket ----------------
+
+class Connection:
+    def __init__(self, ws, private):
+        self.ws = ws
+        self.private = private
+        self.logged_in = False
+        self.channels = set()
+        self.queue = asyncio.Queue()
+
+    async def writer(self):
+        while True:
+            message = await self.queue.get()
+            await self.ws.send_text(message)
+
+    def push(self, message):
+        self.queue.put_nowait(message)
+
+
+def broadcast(key, message):
+    encoded = None
+    for conn in list(connections):
+        if key in conn.channels:
+            encoded = encoded or json.dumps(message)
+            conn.push(encoded)
+            stats["pushes"] += 1
+
+
+def broadcast_positions():
+    arg = {"instType": PRODUCT_TYPE, "channel": "positions", "instId": "default"}
+    broadcast((PRODUCT_TYPE, "positions", "default"), {"action": "snapshot", "arg": arg, "data": position_list()})
+
+
+def first_push(conn, arg):
+    channel, symbol = arg.get("channel"), arg.get("instId")
+    if channel == "positions":
+        return {"action": "snapshot", "arg": arg, "data": position_list()}
+    market = markets.get(symbol)
+    if market is None:
+        return None
+    if channel == "books" or channel in SHALLOW_BOOKS:
+        return {"action": "snapshot", "arg": arg, "data": [market.snapshot(SHALLOW_BOOKS.get(channel))]}
+    if channel == "ticker":
+        return {"action": "snapshot", "arg": arg, "data": [market.ticker()]}
+    return None
+
+
+async def handle_op(conn, request):
+    op = request.get("op")
+    if op == "login":
+        arg = (request.get("args") or [{}])[0]
+        if STANDIN_API_SECRET:
+            expected = Signer(STANDIN_API_SECRET).sign(arg.get("timestamp"), c.GET, c.REQUEST_PATH)
+            if arg.get("sign") != expected:
+                conn.push(json.dumps({"event": "error", "code": 30005, "msg": "Invalid sign"}))
+                return
+        conn.logged_in = True
+        conn.push(json.dumps({"event": "login", "code": 0}))
+        return
+    for arg in request.get("args") or []:
+        key = (arg.get("instType"), arg.get("channel"), arg.get("instId") or arg.get("coin"))
+        if op == "subscribe":
+            if conn.private and not conn.logged_in:
+                conn.push(json.dumps({"event": "error", "arg": arg, "code": 30002, "msg": "Illegal request"}))
+                continue
+            if key[2] != "default" and key[2] not in markets:
+                conn.push(json.dumps({"event": "error", "arg": arg, "code": 30001,
+                                      "msg": "instType:%s,channel:%s,instId:%s doesn't exist" % key}))
+                continue
+            conn.channels.add(key)
+            stats["subscribes"] += 1
+            conn.push(json.dumps({"event": "subscribe", "arg": arg}))
+            message = first_push(conn, arg)
+            if message:
+                conn.push(json.dumps(message))
+        elif op == "unsubscribe":
+            conn.channels.discard(key)
+            conn.push(json.dumps({"event": "unsubscribe", "arg": arg}))
+
+
+async def serve_ws(ws, private):
+    await ws.accept()
+    conn = Connection(ws, private)
+    connections.add(conn)
+    stats["ws_connections"] += 1
+    writer = asyncio.create_task(conn.writer())
+    try:
+        while True:
+            message = await ws.receive_text()
+            if message == "ping":
+                conn.push("pong")
+                continue
+            await handle_op(conn, json.loads(message))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        connections.discard(conn)
+        writer.cancel()
+
+
+async def pump():
+    # un tick para todo el mercado: libro, ticker y trade a quien esté suscrito
+    while True:
+        await asyncio.sleep(config["push_ms"] / 1000)
+        for symbol, market in markets.items():
+            update = market.step()
+            arg = {"instType": PRODUCT_TYPE, "channel": "books", "instId": symbol}
+            broadcast((PRODUCT_TYPE, "books", symbol), {"action": "update", "arg": arg, "data": [update]})
+            for channel, depth in SHALLOW_BOOKS.items():
+                key = (PRODUCT_TYPE, channel, symbol)
+                if any(key in conn.channels for conn in connections):
+                    arg = {"instType": PRODUCT_TYPE, "channel": channel, "instId": symbol}
+                    broadcast(key, {"action": "snapshot", "arg": arg, "data": [market.snapshot(depth)]})
+            arg = {"instType": PRODUCT_TYPE, "channel": "ticker", "instId": symbol}
+            broadcast((PRODUCT_TYPE, "ticker", symbol), {"action": "snapshot", "arg": arg, "data": [market.ticker()]})
+            arg = {"instType": PRODUCT_TYPE, "channel": "trade", "instId": symbol}
+            broadcast((PRODUCT_TYPE, "trade", symbol), {"action": "update", "arg": arg, "data": [market.last_trade]})
+        if config["ws_drop_rate"]:
+            for conn in list(connections):
+                if random.random() < config["ws_drop_rate"]:
+                    stats["ws_drops"] += 1
+                    connections.discard(conn)
+                    await conn.ws.close(code=1001)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    task = asyncio.create_task(pump())
+    yield
+    task.cancel()
+
+app = FastAPI(lifespan=lifespan)
+
+
+@app.middleware("http")
+async def inject(request: Request, call_next):
+    if not request.url.path.startswith("/api/"):
+        return await call_next(request)
+    stats["requests"] += 1
+    delay = config["latency_ms"] + random.uniform(-1, 1) * config["jitter_ms"]
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    if random.random() < config["error_rate"]:
+        stats["errors"] += 1
+        return fail(config["error_status"], str(config["error_status"]), "injected error")
+    private = "/order/" in request.url.path or "/position/" in request.url.path
+    if private:
+        key = request.headers.get(c.OK_ACCESS_KEY)
+        if not key:
+            return fail(400, "40001", "ACCESS_KEY cannot be empty")
+        if STANDIN_API_SECRET:
+            body = (await request.body()).decode("utf-8")
+            path = request.url.path + ("?" + request.url.query if request.url.query else "")
+            expected = Signer(STANDIN_API_SECRET).sign(request.headers.get(c.OK_ACCESS_TIMESTAMP),
+                                                       request.method, path, body)
+            if request.headers.get(c.OK_ACCESS_SIGN) != expected:
+                return fail(400, "40009", "sign signature error")
+    response = await call_next(request)
+    if request.method == c.POST and random.random() < config["lost_rate"]:
+        # ya se ejecutó: el cliente no lo sabe y tiene que reintentar sin duplicar
+        stats["lost"] += 1
+        return fail(502, "502", "injected lost response")
+    return response
+
+
+@app.get("/api/v2/public/time")
+async def server_time():
+    return ok({"serverTime": str(int(time.time() * 1000))})
+
+
+@app.get("/api/v2/mix/market/contracts")
+async def contracts(symbol: str = None):
+    return ok([m.contract.info for m in markets.values() if symbol in (None, m.symbol)])
+
+
+@app.get("/api/v2/mix/market/tickers")
+async def tickers():
+    return ok([m.ticker() for m in markets.values()])
+
+
+@app.get("/api/v2/mix/market/ticker")
+async def ticker(symbol: str):
+    market = markets.get(symbol)
+    if market is None:
+        return fail(400, "40034", "Parameter symbol does not exist")
+    return ok([market.ticker()])
+
+
+@app.get("/api/v2/mix/market/orderbook")
+async def orderbook(symbol: str):
+    market = markets.get(symbol)
+    if market is None:
+        return fail(400, "40034", "Parameter symbol does not exist")
+    return ok(market.snapshot())
+
+
+@app.post("/api/v2/mix/order/place-order")
+async def place_order(request: Request):
+    data, error = place(await request.json())
+    if error:
+        return fail(400, *error)
+    return ok(data)
+
+
+@app.post("/api/v2/mix/order/batch-place-order")
+async def batch_place_order(request: Request):
+    body = await request.json()
+    success, failure = [], []
+    for order in body.get("orderList") or []:
+        data, error = place(dict(order, symbol=body.get("symbol")))
+        if error:
+            failure.append({"clientOid": order.get("clientOid"), "errorCode": error[0], "errorMsg": error[1]})
+        else:
+            success.append(data)
+    return ok({"successList": success, "failureList": failure})
+
+
+@app.get("/api/v2/mix/order/detail")
+async def detail(symbol: str, orderId: str = None, clientOid: str = None):
+    order = orders.get(orderId or clientOid)
+    if order is None or order["symbol"] != symbol:
+        return fail(400, "40109", "The data of the order cannot be found")
+    return ok(order)
+
+
+@app.post("/api/v2/mix/order/close-positions")
+async def close_positions(request: Request):
+    body = await request.json()
+    symbol = body.get("symbol")
+    net = positions.get(symbol, (0.0, 0.0))[0]
+    hold_side = body.get("holdSide")
+    if not net or hold_side not in (None, "long" if net > 0 else "short"):
+        return fail(400, "22002", "No position to close")
+    fill(symbol, -net)
+    order_id = str(next(ORDER_IDS))
+    stats["orders"] += 1
+    broadcast_positions()
+    return ok({"successList": [{"orderId": order_id, "clientOid": order_id, "symbol": symbol}], "failureList": []})
+
+
+@app.get("/api/v2/mix/position/all-position")
+async def all_position():
+    return ok(position_list())
+
+
+@app.get("/api/v2/mix/position/single-position")
+async def single_position(symbol: str):
+    return ok(position_list(symbol))
+
+
+@app.websocket("/v2/ws/public")
+async def ws_public(ws: WebSocket):
+    await serve_ws(ws, private=False)
+
+
+@app.websocket("/v2/ws/private")
+async def ws_private(ws: WebSocket):
+    await serve_ws(ws, private=True)
+
+
+@app.get("/standin/config")
+async def get_config():
+    return config
+
+
+@app.post("/standin/config")
+async def set_config(request: Request):
+    changes = await request.json()
+    for key, value in changes.items():
+        if key in config:
+            config[key] = type(config[key])(value)
+    return config
+
+
+@app.get("/standin/stats")
+async def get_stats():
+    return dict(stats, ws_open=len(connections), positions=position_list())
+
+
+@app.post("/standin/reset")
+async def reset():
+    positions.clear()
+    orders.clear()
+    broadcast_positions()
+    return {"status": "ok"}
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=os.getenv("STANDIN_HOST", "127.0.0.1"), port=STANDIN_PORT, log_level="warning")
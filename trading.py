@@ -0,0 +1,233 @@
+# Ejecución de señales contra Bitget, compartida por main.py (modo memoria) y executor.py (modo durable)
+import os
+import asyncio
+import logging
+import threading
+import time
+from bitget import clock, log, metrics, retry
+from bitget.log import SAMPLED
+from bitget.aio.bitget_api import AsyncBitgetApi
+from bitget.aio.v2.mix.order_api import OrderApi
+from bitget.contracts import ContractRegistry
+from bitget.exceptions import BitgetParamsException
+from bitget.v2.mix.market_api import MarketApi
+from bitget.ws.position_book import PositionBook
+from bitget.ws.ticker_table import TickerTable
+from dedup import payload_key
+
+API_KEY = os.getenv("BITGET_API_KEY")
+API_SECRET = os.getenv("BITGET_API_SECRET")
+API_PASSPHRASE = os.getenv("BITGET_API_PASSPHRASE")
+
+logger = logging.getLogger(__name__)
+
+
+def setup_logging():
+    # logs en JSON por una cola: el I/O a stdout ocurre en otro hilo, fuera del camino de la orden
+    log.setup_logging(level=os.getenv("LOG_LEVEL", "INFO"),
+                      sample_rate=float(os.getenv("LOG_SAMPLE_RATE", 1.0)),
+                      max_length=int(os.getenv("LOG_MAX_LENGTH", 2000)),
+                      secrets=[API_KEY, API_SECRET, API_PASSPHRASE])
+    # httpx registra cada petición a INFO: demasiado ruido en el camino caliente
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+
+api = AsyncBitgetApi(API_KEY, API_SECRET, API_PASSPHRASE, use_server_time=os.getenv("USE_SERVER_TIME") == "1")
+
+market_api = MarketApi(API_KEY, API_SECRET, API_PASSPHRASE)
+contracts = ContractRegistry(market_api, ttl=int(os.getenv("CONTRACTS_TTL", 3600)))
+
+order_api = OrderApi(API_KEY, API_SECRET, API_PASSPHRASE, use_server_time=api.use_server_time)
+
+# place_order: lectura de posición + orden opuesta por lo disponible (como siempre);
+# close_positions: flash close de todo el símbolo en un round trip, hay que pedirlo
+EXIT_MODE = os.getenv("EXIT_MODE", "place_order")
+exit_latency = metrics.histogram("webhook_exit_latency_seconds", "Exit signal execution time",
+                                 ("mode", "outcome"))
+signal_latency = metrics.histogram("signal_latency_seconds", "Alert received to exchange acknowledgement",
+                                   ("signal", "outcome"))
+
+position_book = None
+if API_KEY and os.getenv("POSITION_BOOK", "1") == "1":
+    position_book = PositionBook(API_KEY, API_SECRET, API_PASSPHRASE)
+
+# últimos precios de todos los contratos por el canal público ticker; REST solo si un símbolo se queda viejo.
+# Apagado por defecto: abre un WebSocket por cada 50 contratos y las órdenes de mercado no lo necesitan.
+# El canal ticker y el snapshot REST son públicos: no hacen falta credenciales
+tickers = None
+if os.getenv("TICKER_TABLE", "0") == "1":
+    tickers = TickerTable(market_api, max_age=float(os.getenv("TICKER_MAX_AGE", 5)))
+
+
+async def start():
+    # primera muestra de hora del servidor fuera del event loop; luego se refresca sola
+    await asyncio.to_thread(clock.default_clock)
+    contracts.start()
+    if position_book:
+        # el arranque del WebSocket bloquea: se hace en segundo plano y mientras tanto se usa REST
+        threading.Thread(target=position_book.start, daemon=True).start()
+    if tickers:
+        threading.Thread(target=tickers.start, daemon=True).start()
+
+
+def stop():
+    contracts.stop()
+    if position_book:
+        position_book.stop()
+    if tickers:
+        tickers.stop()
+
+
+# ✅ Validación común al webhook y al replay
+# devuelve (outcome, señal, símbolo del contrato, clave de dedup, signal_id); outcome: ok, invalid_symbol o ignored
+def validate_signal(signal: str, symbol: str, alert_id=None, received_ns=None):
+    signal = signal.upper()
+    symbol = symbol.upper()
+    # hasta que cargue el registro de contratos el símbolo se pasa tal cual
+    if contracts.loaded:
+        contract = contracts.lookup(symbol)
+        if contract is None:
+            return "invalid_symbol", signal, symbol, None, None
+        symbol = contract.symbol
+    if not is_actionable(signal):
+        return "ignored", signal, symbol, None, None
+    key = payload_key({"signal": signal, "symbol": symbol, "alert_id": alert_id})
+    # con alert_id el clientOid es estable entre reenvíos; sin él, cada señal nueva es distinta
+    if alert_id:
+        return "ok", signal, symbol, key, key
+    return "ok", signal, symbol, key, f"{key}|{time.time_ns() if received_ns is None else received_ns}"
+
+KNOWN_SIGNALS = ("ENTRY_LONG", "ENTRY_SHORT", "EXIT_LONG", "EXIT_SHORT")
+
+def signal_label(signal: str):
+    # la señal la escribe el usuario: etiqueta acotada para no disparar la cardinalidad
+    if signal in KNOWN_SIGNALS:
+        return signal
+    return "EXIT_OTHER" if signal.startswith("EXIT_") else "other"
+
+def is_actionable(signal: str):
+    return signal in ("ENTRY_LONG", "ENTRY_SHORT") or signal.startswith("EXIT_")
+
+# ✅ Lógica para obtener posiciones abiertas
+async def get_open_position(symbol: str):
+    # justo después de una entrada nuestra el push de posiciones aún no ha llegado: ese símbolo va por REST
+    if position_book and position_book.ready and not position_book.dirty(symbol):
+        return position_book.positions(symbol)
+
+    params = {
+        "productType": "USDT-FUTURES",
+        "marginCoin": "USDT"
+    }
+    try:
+        response = await api.get("/api/v2/mix/position/all-position", params)
+        logger.info("📊 Posiciones obtenidas: %s", response, extra=SAMPLED)
+    except Exception as e:
+        logger.error(f"❌ Error al obtener posiciones: {e}")
+        return []
+    if response.get("code") != "00000":
+        return []
+    return [pos for pos in response.get("data") or [] if pos.get("symbol") == symbol]
+
+# ✅ Cierre en un solo round trip: flash close por símbolo (y holdSide si la señal lo indica)
+async def close_positions(symbol: str, signal: str):
+    params = {"symbol": symbol, "productType": "USDT-FUTURES"}
+    hold_side = {"EXIT_LONG": "long", "EXIT_SHORT": "short"}.get(signal)
+    if hold_side:
+        params["holdSide"] = hold_side
+    try:
+        logger.info("🔁 Cerrando posiciones en %s con close-positions: %s", symbol, params)
+        # reintentar es seguro: un segundo cierre no encuentra posición que cerrar
+        response = await retry.call_async(lambda: order_api.closePositions(params))
+        logger.info("✅ Cierre enviado: %s", response, extra=SAMPLED)
+    except Exception as e:
+        logger.error(f"❌ Error cerrando posición: {e}")
+        return "error"
+    return "error" if (response.get("data") or {}).get("failureList") else "ok"
+
+# ✅ Modo por defecto: leer la posición y abrir en sentido opuesto
+async def exit_with_order(symbol: str, signal_id: str):
+    for pos in await get_open_position(symbol):
+        if float(pos.get("available", 0)) > 0:
+            side = pos.get("holdSide")
+            size = pos.get("available")
+            opposite_side = "sell" if side == "long" else "buy"
+            params = {
+                "symbol": symbol,
+                "marginCoin": "USDT",
+                "productType": "USDT-FUTURES",
+                "marginMode": "isolated",
+                "size": size,
+                "side": opposite_side,
+                "orderType": "market",
+                # one-way: con un tamaño viejo solo reduce hasta cero, nunca abre la posición contraria
+                "reduceOnly": "YES",
+                "clientOid": retry.client_oid(signal_id, "exit", side)
+            }
+            try:
+                logger.info(f"🔁 Cerrando posición {side.upper()} con orden {opposite_side.upper()} en {symbol}")
+                response = await retry.place_order_idempotent_async(order_api, params)
+                logger.info("✅ Orden de cierre enviada: %s", response, extra=SAMPLED)
+            except Exception as e:
+                logger.error(f"❌ Error cerrando posición: {e}")
+                return "error"
+            return "ok"
+    return "no_position"
+
+async def exit_position(symbol: str, signal: str, signal_id: str):
+    start = time.perf_counter()
+    if EXIT_MODE == "place_order":
+        outcome = await exit_with_order(symbol, signal_id)
+    else:
+        outcome = await close_positions(symbol, signal)
+    exit_latency.observe(time.perf_counter() - start, EXIT_MODE, outcome)
+    return outcome
+
+# ✅ Entradas long / short
+async def place_entry_order(symbol: str, direction: str, signal_id: str):
+    side = "buy" if direction == "long" else "sell"
+    size = "1"
+    contract = contracts.lookup(symbol)
+    if contract:
+        try:
+            size = contract.normalize_size(size)
+        except BitgetParamsException as e:
+            logger.error(f"❌ Tamaño no válido: {e}")
+            return "invalid_size"
+    params = {
+        "symbol": symbol,
+        "marginCoin": "USDT",
+        "productType": "USDT-FUTURES",
+        "marginMode": "isolated",
+        "size": size,
+        "side": side,
+        "orderType": "market",
+        # mismo clientOid en cada reintento: Bitget nunca la ejecuta dos veces
+        "clientOid": retry.client_oid(signal_id, "entry", direction)
+    }
+    try:
+        logger.info("🟢 Colocando orden %s en %s con params: %s", side.upper(), symbol, params)
+        response = await retry.place_order_idempotent_async(order_api, params)
+        logger.info("✅ Orden colocada: %s", response, extra=SAMPLED)
+    except Exception as e:
+        logger.error(f"❌ Error colocando orden de entrada: {e}")
+        return "error"
+    finally:
+        # también si falló: con una respuesta perdida la orden puede haberse ejecutado igualmente
+        if position_book:
+            position_book.mark_dirty(symbol)
+    return "ok"
+
+# ✅ Ejecución en segundo plano (ordenada por símbolo)
+# received: hora de pared (time.time()) de llegada; sirve también si la ejecuta otro proceso
+async def execute_signal(signal: str, symbol: str, signal_id: str, received: float):
+    outcome = "ignored"
+    if signal == "ENTRY_LONG":
+        outcome = await place_entry_order(symbol, "long", signal_id)
+    elif signal == "ENTRY_SHORT":
+        outcome = await place_entry_order(symbol, "short", signal_id)
+    elif signal.startswith("EXIT_"):
+        logger.info(f"🚨 Señal de salida: {signal}")
+        outcome = await exit_position(symbol, signal, signal_id)
+    # desde que llegó la alerta: validación + cola + firma + round trip a Bitget
+    signal_latency.observe(time.time() - received, signal_label(signal), outcome)
+    return outcome